@@ -0,0 +1,219 @@
+import json
+import sqlite3
+import time
+import threading
+
+
+class CrawlTaskQueue:
+    """基于SQLite的共享爬取任务队列，供多个数据生成进程/节点协同工作
+
+    - 任务以 (task_type, target) 为主键，重复入队会被忽略，实现全局去重
+    - 工作进程通过租约领取任务，进程崩溃后租约过期，任务会被其他进程重新领取
+    - host_slots 表记录每个主机下一次允许请求的时间，所有工作进程共享同一份限速
+    """
+
+    def __init__(self, queue_path="crawl_queue.db", lease_seconds=300, max_attempts=3):
+        """初始化任务队列"""
+        self.queue_path = queue_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.local = threading.local()  # 使用线程本地存储
+        self.connect()
+        self.create_tables()
+
+    def connect(self):
+        """连接到队列数据库，每个线程使用独立的连接"""
+        try:
+            if not hasattr(self.local, 'conn') or self.local.conn is None:
+                # isolation_level=None 以便手动控制 BEGIN IMMEDIATE 事务
+                self.local.conn = sqlite3.connect(self.queue_path, timeout=30, isolation_level=None)
+                self.local.conn.row_factory = sqlite3.Row
+                self.local.conn.execute('PRAGMA journal_mode=WAL')
+                self.local.conn.execute('PRAGMA busy_timeout=30000')
+        except sqlite3.Error as e:
+            print(f"任务队列连接错误: {e}")
+
+    def close(self):
+        """关闭队列数据库连接"""
+        if hasattr(self.local, 'conn') and self.local.conn:
+            self.local.conn.close()
+            self.local.conn = None
+
+    def ensure_connection(self):
+        """确保当前线程有可用的数据库连接"""
+        if not hasattr(self.local, 'conn') or self.local.conn is None:
+            self.connect()
+
+    def create_tables(self):
+        """创建任务表和主机限速表"""
+        self.ensure_connection()
+        try:
+            self.local.conn.execute('''
+            CREATE TABLE IF NOT EXISTS crawl_tasks (
+                task_type TEXT,
+                target TEXT,
+                params JSON,
+                status TEXT DEFAULT 'pending',
+                priority INTEGER DEFAULT 0,
+                attempts INTEGER DEFAULT 0,
+                worker TEXT,
+                lease_until INTEGER DEFAULT 0,
+                created INTEGER,
+                updated INTEGER,
+                error TEXT,
+                PRIMARY KEY (task_type, target)
+            )
+            ''')
+            self.local.conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_crawl_tasks_claim
+            ON crawl_tasks (status, priority DESC, created)
+            ''')
+            self.local.conn.execute('''
+            CREATE TABLE IF NOT EXISTS host_slots (
+                host TEXT PRIMARY KEY,
+                next_allowed REAL
+            )
+            ''')
+        except sqlite3.Error as e:
+            print(f"创建任务队列表错误: {e}")
+
+    def enqueue(self, task_type, target, params=None, priority=0):
+        """添加任务，已存在的同类型同目标任务会被忽略，返回是否为新任务"""
+        self.ensure_connection()
+        try:
+            now = int(time.time())
+            cursor = self.local.conn.execute('''
+            INSERT OR IGNORE INTO crawl_tasks
+            (task_type, target, params, status, priority, attempts, lease_until, created, updated)
+            VALUES (?, ?, ?, 'pending', ?, 0, 0, ?, ?)
+            ''', (task_type, str(target), json.dumps(params or {}, ensure_ascii=False), priority, now, now))
+            return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            print(f"添加任务错误: {e}")
+            return False
+
+    def claim(self, worker_id):
+        """领取一个待处理任务（或租约已过期的任务），没有任务时返回None"""
+        self.ensure_connection()
+        conn = self.local.conn
+        try:
+            now = int(time.time())
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('''
+            SELECT task_type, target, params, attempts FROM crawl_tasks
+            WHERE status = 'pending' OR (status = 'running' AND lease_until < ?)
+            ORDER BY priority DESC, created
+            LIMIT 1
+            ''', (now,)).fetchone()
+            if not row:
+                conn.execute('COMMIT')
+                return None
+
+            conn.execute('''
+            UPDATE crawl_tasks
+            SET status = 'running', worker = ?, lease_until = ?, attempts = attempts + 1, updated = ?
+            WHERE task_type = ? AND target = ?
+            ''', (worker_id, now + self.lease_seconds, now, row['task_type'], row['target']))
+            conn.execute('COMMIT')
+
+            return {
+                "task_type": row['task_type'],
+                "target": row['target'],
+                "params": json.loads(row['params'] or '{}'),
+                "attempts": row['attempts'] + 1
+            }
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            print(f"领取任务错误: {e}")
+            return None
+
+    def complete(self, task_type, target):
+        """标记任务完成"""
+        self.ensure_connection()
+        try:
+            self.local.conn.execute('''
+            UPDATE crawl_tasks SET status = 'done', lease_until = 0, error = NULL, updated = ?
+            WHERE task_type = ? AND target = ?
+            ''', (int(time.time()), task_type, str(target)))
+            return True
+        except sqlite3.Error as e:
+            print(f"标记任务完成错误: {e}")
+            return False
+
+    def fail(self, task_type, target, error=""):
+        """标记任务失败，未超过最大重试次数时重新放回队列"""
+        self.ensure_connection()
+        try:
+            self.local.conn.execute('''
+            UPDATE crawl_tasks
+            SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                lease_until = 0, error = ?, updated = ?
+            WHERE task_type = ? AND target = ?
+            ''', (self.max_attempts, str(error)[:500], int(time.time()), task_type, str(target)))
+            return True
+        except sqlite3.Error as e:
+            print(f"标记任务失败错误: {e}")
+            return False
+
+    def retry_failed(self):
+        """将所有失败的任务重新放回队列"""
+        self.ensure_connection()
+        try:
+            cursor = self.local.conn.execute('''
+            UPDATE crawl_tasks SET status = 'pending', attempts = 0, updated = ?
+            WHERE status = 'failed'
+            ''', (int(time.time()),))
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            print(f"重置失败任务错误: {e}")
+            return 0
+
+    def pending_count(self):
+        """获取尚未完成的任务数量（包括正在处理的任务）"""
+        self.ensure_connection()
+        try:
+            row = self.local.conn.execute('''
+            SELECT COUNT(*) AS count FROM crawl_tasks WHERE status IN ('pending', 'running')
+            ''').fetchone()
+            return row['count'] if row else 0
+        except sqlite3.Error as e:
+            print(f"获取任务数量错误: {e}")
+            return 0
+
+    def stats(self):
+        """按状态统计任务数量"""
+        self.ensure_connection()
+        try:
+            rows = self.local.conn.execute('''
+            SELECT status, COUNT(*) AS count FROM crawl_tasks GROUP BY status
+            ''').fetchall()
+            return {row['status']: row['count'] for row in rows}
+        except sqlite3.Error as e:
+            print(f"统计任务错误: {e}")
+            return {}
+
+    def wait_for_host(self, host, min_interval):
+        """在所有工作进程之间共享的主机限速：预约下一个请求时间槽并等待到该时间"""
+        if not host or min_interval <= 0:
+            return
+        self.ensure_connection()
+        conn = self.local.conn
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            now = time.time()
+            row = conn.execute('SELECT next_allowed FROM host_slots WHERE host = ?', (host,)).fetchone()
+            slot = max(now, row['next_allowed']) if row else now
+            conn.execute('''
+            INSERT OR REPLACE INTO host_slots (host, next_allowed) VALUES (?, ?)
+            ''', (host, slot + min_interval))
+            conn.execute('COMMIT')
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            print(f"主机限速错误: {e}")
+            return
+
+        delay = slot - time.time()
+        if delay > 0:
+            time.sleep(delay)
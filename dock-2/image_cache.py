@@ -0,0 +1,136 @@
+import os
+import shutil
+import threading
+import time
+
+from thumbnails import all_variant_paths, sheet_dir
+
+
+# 淘汰顺序：只被预览图引用的图片最先淘汰，其次是封面和头像，收藏影片的图片最后淘汰
+KIND_SAMPLE = 0
+KIND_COVER = 1
+KIND_FAVORITE = 2
+
+
+class ImageCacheManager:
+    """按磁盘预算淘汰图片仓库中最久未访问的图片
+
+    - 图片总大小超出预算时，按 预览图 -> 封面和头像 -> 收藏影片的图片 的顺序淘汰，
+      同一类中最久未访问的先淘汰，直到回到预算以内
+    - 每删除batch_size个文件暂停一下，在后台线程中分批执行，不会长时间占满磁盘
+    - stats()返回查找命中率、已回收的字节数等统计
+    预算为0时不淘汰任何图片。缩略图和预览图拼图随原图一起删除，但不计入预算。
+    """
+
+    def __init__(self, store, budget_bytes, protected_ids=None, interval=300, batch_size=50, batch_pause=0.5):
+        self.store = store
+        self.budget_bytes = budget_bytes
+        self.protected_ids = protected_ids  # 返回收藏影片ID的函数，这些影片的图片最后淘汰
+        self.interval = interval  # 两轮检查之间的秒数
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.stop_event = threading.Event()
+        self.run_lock = threading.Lock()  # 同一时间只执行一轮清理
+        self.thread = None
+        self.usage_bytes = 0
+        self.evicted_files = 0
+        self.reclaimed_bytes = 0
+        self.last_run = None
+
+    def blob_kind(self, blob, protected):
+        """图片的淘汰类别，数值越小越先淘汰"""
+        movie_ids = (blob["movie_ids"] or "").split(",")
+        if protected and any(movie_id in protected for movie_id in movie_ids):
+            return KIND_FAVORITE
+        return blob["kind"]
+
+    def run_once(self):
+        """执行一轮检查，超出预算时淘汰图片，返回本轮回收的字节数"""
+        with self.run_lock:
+            self.store.flush_access()
+            usage = self.store.db.get_image_usage()
+            self.usage_bytes = usage
+            self.last_run = time.time()
+            if self.budget_bytes <= 0 or usage <= self.budget_bytes:
+                return 0
+
+            protected = set(self.protected_ids()) if self.protected_ids else set()
+            blobs = sorted(self.store.db.get_image_blobs(),
+                           key=lambda blob: (self.blob_kind(blob, protected), blob["last_access"]))
+            reclaimed = 0
+            evicted = 0
+            for blob in blobs:
+                if usage <= self.budget_bytes or self.stop_event.is_set():
+                    break
+                if not self.evict(blob):
+                    continue
+                usage -= blob["size"]
+                reclaimed += blob["size"]
+                evicted += 1
+                if evicted % self.batch_size == 0:
+                    # 分批删除，批次之间让出磁盘
+                    self.stop_event.wait(self.batch_pause)
+
+            self.usage_bytes = usage
+            print(f"图片缓存清理: 删除 {evicted} 个文件，回收 {reclaimed / 1024 / 1024:.1f} MB，"
+                  f"当前占用 {usage / 1024 / 1024:.1f} MB")
+            return reclaimed
+
+    def evict(self, blob):
+        """删除一个图片文件及其缩略图和所属影片的预览图拼图，先删除索引，之后的查找不会再指向该文件"""
+        if not self.store.db.delete_image_blob_refs(blob["hash"]):
+            return False
+        path = self.store.blob_path(blob["hash"], blob["ext"])
+        paths = [path] + all_variant_paths(path, self.store.image_root)
+        for file_path in paths:
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"删除图片文件失败 {file_path}: {e}")
+        # 拼图包含该图片，下次访问时按剩余的图片重新生成
+        for movie_id in (blob["movie_ids"] or "").split(","):
+            if movie_id:
+                shutil.rmtree(sheet_dir(movie_id, self.store.image_root), ignore_errors=True)
+        self.evicted_files += 1
+        self.reclaimed_bytes += blob["size"]
+        return True
+
+    def stats(self):
+        """返回缓存统计：预算、当前占用、查找命中率、已淘汰的文件数和回收的字节数"""
+        with self.store.lock:
+            hits, misses = self.store.hits, self.store.misses
+        lookups = hits + misses
+        return {
+            "budget_bytes": self.budget_bytes,
+            "usage_bytes": self.usage_bytes,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "evicted_files": self.evicted_files,
+            "reclaimed_bytes": self.reclaimed_bytes,
+            "last_run": self.last_run,
+        }
+
+    def run(self):
+        """定期检查直到stop()被调用，在后台线程中执行"""
+        while not self.stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"图片缓存清理出错: {e}")
+            self.stop_event.wait(self.interval)
+
+    def start(self):
+        """在守护线程中开始定期检查"""
+        if self.thread is None or not self.thread.is_alive():
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self.run, name="image_cache", daemon=True)
+            self.thread.start()
+        return self.thread
+
+    def stop(self):
+        """停止后台检查，并把尚未写入的访问时间保存到数据库"""
+        self.stop_event.set()
+        self.store.flush_access()
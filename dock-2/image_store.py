@@ -0,0 +1,193 @@
+import hashlib
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+
+from PIL import Image
+
+
+IMAGE_ROOT = "buspic"
+BLOB_DIR = "blobs"  # 图片文件保存在 buspic/blobs/<哈希前2位>/<哈希第3-4位>/<哈希><扩展名>
+TEMP_DIR = "tmp"  # 下载中的临时文件，入库时移动到blobs中
+HASH_CHUNK_SIZE = 64 * 1024
+
+# 旧版本目录中的文件名：cover.jpg、sample_1.jpg
+LEGACY_SAMPLE_PATTERN = re.compile(r"^sample_(\d+)$")
+
+
+def file_digest(path):
+    """流式计算文件的SHA-256，返回(十六进制哈希, 文件大小)"""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def image_dimensions(path):
+    """只读取文件头获取图片的宽和高，无法识别时返回(None, None)"""
+    try:
+        with Image.open(path) as image:
+            return image.size
+    except Exception:
+        return None, None
+
+
+class ImageStore:
+    """按内容哈希保存图片的存储
+
+    - 图片文件按哈希分两级子目录保存，单个目录中的文件数量有限
+    - 数据库中的image_index表将(实体类型, 实体ID, 角色, 序号)映射到图片哈希，并记录大小和尺寸，
+      查找图片只需一次索引查询，不需要列出目录或检查文件是否存在
+    - 内容相同的图片（如多部影片共用的演员头像）只保存一份
+    实体类型为"movie"或"star"，角色为"cover"、"sample"或"avatar"。
+    读取图片时只在内存中记录访问时间和命中次数，由flush_access()批量写入数据库。
+    """
+
+    def __init__(self, db, image_root=IMAGE_ROOT):
+        self.db = db
+        self.image_root = image_root
+        self.blob_root = os.path.join(image_root, BLOB_DIR)
+        self.temp_root = os.path.join(image_root, TEMP_DIR)
+        self.lock = threading.Lock()
+        self.accessed = {}  # (实体类型, 实体ID, 角色, 序号) -> 最近访问时间，尚未写入数据库
+        self.hits = 0
+        self.misses = 0
+
+    def record_access(self, keys, hit):
+        """记录一次查找的结果和被访问的图片"""
+        now = int(time.time())
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            for key in keys:
+                self.accessed[key] = now
+
+    def flush_access(self):
+        """将内存中记录的访问时间写入数据库，返回写入的数量"""
+        with self.lock:
+            accessed, self.accessed = self.accessed, {}
+        if accessed:
+            self.db.touch_image_refs([(when,) + key for key, when in accessed.items()])
+        return len(accessed)
+
+    def blob_path(self, digest, ext):
+        """返回哈希对应的图片文件路径"""
+        return os.path.join(self.blob_root, digest[:2], digest[2:4], digest + ext)
+
+    def temp_path(self, ext=""):
+        """返回一个新的临时文件路径，用于下载后再入库"""
+        os.makedirs(self.temp_root, exist_ok=True)
+        return os.path.join(self.temp_root, f"{uuid.uuid4().hex}{ext}.part")
+
+    def get(self, entity_type, entity_id, role, idx=0):
+        """返回已入库图片的路径，没有时返回None"""
+        ref = self.db.get_image_ref(entity_type, entity_id, role, idx)
+        path = self.blob_path(ref["hash"], ref["ext"]) if ref else None
+        self.record_access([(entity_type, entity_id, role, idx)] if path else [], bool(path))
+        return path
+
+    def manifest(self, entity_type, entity_id):
+        """返回一个实体的图片清单，每项包含role、idx、path、size、width、height，按角色和序号排序"""
+        images = []
+        for ref in self.db.get_image_refs(entity_type, entity_id):
+            ref["path"] = self.blob_path(ref["hash"], ref["ext"])
+            images.append(ref)
+        self.record_access([(entity_type, entity_id, image["role"], image["idx"]) for image in images], bool(images))
+        return images
+
+    def list_images(self, entity_type, entity_id):
+        """返回一个实体的全部图片[(角色, 序号, 路径)]，按角色和序号排序"""
+        return [(image["role"], image["idx"], image["path"]) for image in self.manifest(entity_type, entity_id)]
+
+    def count_images(self, entity_type, entity_ids):
+        """批量统计多个实体已入库的图片数量，返回{实体ID: 数量}"""
+        return self.db.count_entity_images(entity_type, entity_ids)
+
+    def forget(self, entity_type, entity_id, role, idx=0):
+        """图片文件在仓库之外被删除时，移除失效的索引记录"""
+        return self.db.delete_image_ref(entity_type, entity_id, role, idx)
+
+    def put_file(self, path, entity_type, entity_id, role, idx=0, ext=None, move=True):
+        """将文件存入仓库并登记索引，返回图片路径，失败时返回None
+
+        move为True时源文件会被移动，内容已存在时直接删除源文件；为False时复制一份。
+        """
+        try:
+            digest, size = file_digest(path)
+            if size == 0:
+                print(f"图片文件为空，不入库: {path}")
+                if move:
+                    os.remove(path)
+                return None
+            ext = (ext or os.path.splitext(path)[1] or ".jpg").lower()
+            width, height = image_dimensions(path)
+            blob = self.blob_path(digest, ext)
+            if os.path.exists(blob):
+                if move:
+                    os.remove(path)
+            else:
+                os.makedirs(os.path.dirname(blob), exist_ok=True)
+                if move:
+                    os.replace(path, blob)
+                else:
+                    temp = self.temp_path(ext)
+                    shutil.copyfile(path, temp)
+                    os.replace(temp, blob)
+        except OSError as e:
+            print(f"图片入库失败 {path}: {e}")
+            return None
+        if not self.db.save_image_ref(entity_type, entity_id, role, idx, digest, ext, size, width, height):
+            return None
+        return blob
+
+    def download(self, fetch, entity_type, entity_id, role, idx=0, ext=".jpg"):
+        """下载图片并入库，返回图片路径，失败时返回None
+
+        fetch(temp_path)负责把图片保存到临时文件并返回是否成功。
+        """
+        temp = self.temp_path(ext)
+        try:
+            if not fetch(temp) or not os.path.exists(temp):
+                return None
+            return self.put_file(temp, entity_type, entity_id, role, idx, ext)
+        finally:
+            if os.path.exists(temp):
+                os.remove(temp)
+
+    def import_legacy(self, path, entity_type, entity_id, role, idx=0):
+        """将旧目录结构中的单个图片移入仓库，文件不存在时返回None"""
+        if not os.path.isfile(path):
+            return None
+        return self.put_file(path, entity_type, entity_id, role, idx)
+
+    def import_legacy_movie_dir(self, movie_id):
+        """将旧版本 buspic/<影片ID>/ 目录中的封面和预览图移入仓库，返回导入的数量"""
+        directory = os.path.join(self.image_root, movie_id)
+        if not os.path.isdir(directory):
+            return 0
+        imported = 0
+        for filename in os.listdir(directory):
+            path = os.path.join(directory, filename)
+            name = os.path.splitext(filename)[0].lower()
+            if name == "cover":
+                role, idx = "cover", 0
+            else:
+                match = LEGACY_SAMPLE_PATTERN.match(name)
+                if not match:
+                    continue
+                role, idx = "sample", int(match.group(1))
+            if self.import_legacy(path, "movie", movie_id, role, idx):
+                imported += 1
+        try:
+            os.rmdir(directory)
+        except OSError:
+            pass  # 目录中还有其他文件时保留
+        return imported
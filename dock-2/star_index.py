@@ -0,0 +1,166 @@
+import re
+import unicodedata
+
+
+# 平假名到罗马字（平文式）的对照表，片假名会先转换为平假名再查表
+_KANA_ROMAJI = {
+    'あ': 'a', 'い': 'i', 'う': 'u', 'え': 'e', 'お': 'o',
+    'か': 'ka', 'き': 'ki', 'く': 'ku', 'け': 'ke', 'こ': 'ko',
+    'さ': 'sa', 'し': 'shi', 'す': 'su', 'せ': 'se', 'そ': 'so',
+    'た': 'ta', 'ち': 'chi', 'つ': 'tsu', 'て': 'te', 'と': 'to',
+    'な': 'na', 'に': 'ni', 'ぬ': 'nu', 'ね': 'ne', 'の': 'no',
+    'は': 'ha', 'ひ': 'hi', 'ふ': 'fu', 'へ': 'he', 'ほ': 'ho',
+    'ま': 'ma', 'み': 'mi', 'む': 'mu', 'め': 'me', 'も': 'mo',
+    'や': 'ya', 'ゆ': 'yu', 'よ': 'yo',
+    'ら': 'ra', 'り': 'ri', 'る': 'ru', 'れ': 're', 'ろ': 'ro',
+    'わ': 'wa', 'ゐ': 'i', 'ゑ': 'e', 'を': 'o', 'ん': 'n',
+    'が': 'ga', 'ぎ': 'gi', 'ぐ': 'gu', 'げ': 'ge', 'ご': 'go',
+    'ざ': 'za', 'じ': 'ji', 'ず': 'zu', 'ぜ': 'ze', 'ぞ': 'zo',
+    'だ': 'da', 'ぢ': 'ji', 'づ': 'zu', 'で': 'de', 'ど': 'do',
+    'ば': 'ba', 'び': 'bi', 'ぶ': 'bu', 'べ': 'be', 'ぼ': 'bo',
+    'ぱ': 'pa', 'ぴ': 'pi', 'ぷ': 'pu', 'ぺ': 'pe', 'ぽ': 'po',
+    'ゔ': 'vu',
+    'ぁ': 'a', 'ぃ': 'i', 'ぅ': 'u', 'ぇ': 'e', 'ぉ': 'o',
+    'ゃ': 'ya', 'ゅ': 'yu', 'ょ': 'yo', 'ゎ': 'wa',
+}
+
+# 拗音：前一个假名的词尾 i 与小写 ゃゅょ 合并，如 きょ -> kyo、しゃ -> sha
+_SMALL_Y = {'ゃ': 'a', 'ゅ': 'u', 'ょ': 'o'}
+
+# 外来语中的小写元音替换前一个假名的元音，如 てぃ -> ti、じぇ -> je、ふぁ -> fa
+_SMALL_VOWELS = {'ぁ': 'a', 'ぃ': 'i', 'ぅ': 'u', 'ぇ': 'e', 'ぉ': 'o'}
+
+# 名字中常见的别名分隔符，如 "三上悠亜（鬼頭桃菜）"、"Aoi / 葵"
+_ALIAS_PATTERN = re.compile(r'[（(【\[]([^）)】\]]+)[）)】\]]')
+_ALIAS_SEPARATORS = re.compile(r'[、，,/／|｜]')
+
+# 归一化时去掉的空白和符号
+_STRIP_PATTERN = re.compile(r'[\s\-_.・·•\'"’‘`~〜=]+')
+
+
+def katakana_to_hiragana(text):
+    """将片假名转换为平假名，其他字符保持不变"""
+    result = []
+    for ch in text:
+        code = ord(ch)
+        if 0x30A1 <= code <= 0x30F6:
+            result.append(chr(code - 0x60))
+        else:
+            result.append(ch)
+    return ''.join(result)
+
+
+def normalize_name(text):
+    """归一化名字：全角/半角统一（NFKC）、转小写、片假名转平假名、去掉空白和符号"""
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFKC', text).lower()
+    text = katakana_to_hiragana(text)
+    return _STRIP_PATTERN.sub('', text)
+
+
+def kana_to_romaji(text):
+    """将归一化后的名字中的假名转换为罗马字
+
+    汉字无法在没有词典的情况下转换读音，因此只有假名部分会被转换；
+    名字中含有汉字时返回空字符串，避免生成半截的罗马字索引。
+    带附加符号的拉丁字母按基本字母处理，如 yūki 与 yuki 相同。
+
+    >>> kana_to_romaji('まっちゃ'), kana_to_romaji('きっちゃ'), kana_to_romaji('きょうこ')
+    ('matcha', 'kitcha', 'kyoko')
+    >>> kana_to_romaji('yūki'), kana_to_romaji('ゆうき'), kana_to_romaji('悠亜')
+    ('yuki', 'yuki', '')
+    >>> kana_to_romaji('てぃあ'), kana_to_romaji('じぇしか'), kana_to_romaji('ふぁん')
+    ('tia', 'jeshika', 'fan')
+    >>> kana_to_romaji('うぃんでぃ'), kana_to_romaji('ゔぁねっさ'), kana_to_romaji('ちぇるしー')
+    ('windi', 'vanessa', 'cherushi')
+    """
+    if not text:
+        return ''
+    result = []  # [罗马字, 是否因促音重复首字母]，拗音合并后再加上促音
+    double_next = False
+    for ch in text:
+        if ch == 'っ':
+            double_next = True
+            continue
+        if ch == 'ー':
+            # 长音符号：省略，使 ゆーき 与 ゆき 的罗马字一致
+            continue
+        if ch in _SMALL_Y and result and result[-1][0].endswith('i') and len(result[-1][0]) > 1:
+            prev = result[-1][0]
+            # しゃ -> sha、ちゃ -> cha、じゃ -> ja，其余如 きゃ -> kya
+            if prev in ('shi', 'chi', 'ji'):
+                result[-1][0] = prev[:-1] + _SMALL_Y[ch]
+            else:
+                result[-1][0] = prev[:-1] + 'y' + _SMALL_Y[ch]
+            continue
+        if ch in _SMALL_VOWELS and result:
+            prev = result[-1][0]
+            vowel = _SMALL_VOWELS[ch]
+            # うぃ -> wi、いぇ -> ye，其余替换前一个假名的元音，如 てぃ -> ti、しぇ -> she
+            if prev == 'u':
+                result[-1][0] = 'w' + vowel
+                continue
+            if prev == 'i':
+                result[-1][0] = 'y' + vowel
+                continue
+            if len(prev) > 1 and prev[-1] in 'aiueo':
+                result[-1][0] = prev[:-1] + vowel
+                continue
+        romaji = _KANA_ROMAJI.get(ch)
+        if romaji is None:
+            # 拉丁字母去掉附加符号，汉字等其他字符无法转换
+            romaji = ''.join(c for c in unicodedata.normalize('NFKD', ch) if c.isascii() and c.isalnum())
+            if not romaji:
+                return ''
+        result.append([romaji, double_next])
+        double_next = False
+    syllables = []
+    for romaji, doubled in result:
+        if doubled:
+            romaji = ('t' if romaji.startswith('ch') else romaji[0]) + romaji
+        syllables.append(romaji)
+    return fold_romaji(''.join(syllables))
+
+
+def fold_romaji(text):
+    """折叠罗马字的长音写法，使 yuuki / yūki / youko 与 yuki / yoko 匹配"""
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(ch for ch in text if ch.isascii() and ch.isalnum())
+    text = re.sub(r'ou|oo', 'o', text)
+    text = re.sub(r'uu', 'u', text)
+    return text
+
+
+def split_aliases(name):
+    """从名字中拆分出主名和别名，返回去重后的名字列表（主名在前）"""
+    if not name:
+        return []
+    aliases = _ALIAS_PATTERN.findall(name)
+    main = _ALIAS_PATTERN.sub('', name)
+    names = []
+    for part in [main] + aliases:
+        for alias in _ALIAS_SEPARATORS.split(part):
+            alias = alias.strip()
+            if alias and alias not in names:
+                names.append(alias)
+    return names
+
+
+def index_entries(name):
+    """生成名字的索引项列表，每项为 (名字, 归一化名, 罗马字, 是否为别名)"""
+    entries = []
+    for i, alias in enumerate(split_aliases(name)):
+        norm = normalize_name(alias)
+        if not norm:
+            continue
+        romaji = kana_to_romaji(norm)
+        entries.append((alias, norm, romaji, 1 if i > 0 else 0))
+    return entries
+
+
+def query_keys(text):
+    """将用户输入转换为查询用的 (归一化名, 罗马字) 前缀"""
+    norm = normalize_name(text)
+    romaji = kana_to_romaji(norm) if norm else ''
+    return norm, romaji
@@ -0,0 +1,73 @@
+// Images that were not stored yet when the page was rendered have no ?v= version in
+// their URL. The server downloads them in the background and may answer with a
+// placeholder, so poll their state and swap in the versioned URL once stored.
+// Scripts that add such images later call window.watchPendingImages().
+(function () {
+    const POLL_INTERVAL = 2000;
+    const MAX_POLLS = 30;
+    let polls = 0;
+    let timer = null;
+
+    function schedule() {
+        if (timer === null) {
+            timer = setTimeout(poll, POLL_INTERVAL);
+        }
+    }
+
+    function imageName(url) {
+        return decodeURIComponent(url.pathname.substring('/images/'.length));
+    }
+
+    function unversionedImages() {
+        return Array.from(document.querySelectorAll('img[src^="/images/"]')).filter(function (img) {
+            const url = new URL(img.src, window.location.origin);
+            return !url.searchParams.has('v') && !img.dataset.imageFailed;
+        });
+    }
+
+    function poll() {
+        timer = null;
+        const images = unversionedImages();
+        if (images.length === 0 || polls++ >= MAX_POLLS) {
+            return;
+        }
+
+        const params = new URLSearchParams();
+        new Set(images.map(function (img) {
+            return imageName(new URL(img.src, window.location.origin));
+        })).forEach(function (name) {
+            params.append('path', name);
+        });
+
+        fetch('/api/images/status?' + params.toString())
+            .then(function (response) { return response.json(); })
+            .then(function (data) {
+                images.forEach(function (img) {
+                    const url = new URL(img.src, window.location.origin);
+                    const state = data.images[imageName(url)];
+                    if (!state) {
+                        return;
+                    }
+                    if (state.status === 'ready') {
+                        url.searchParams.set('v', state.version);
+                        img.src = url.pathname + url.search;
+                    } else if (state.status === 'failed') {
+                        // Download failed; the server will not retry it for a while
+                        img.dataset.imageFailed = '1';
+                    }
+                });
+                schedule();
+            })
+            .catch(function (error) {
+                console.error('Error checking image status:', error);
+                schedule();
+            });
+    }
+
+    window.watchPendingImages = function () {
+        polls = 0;
+        schedule();
+    };
+
+    document.addEventListener('DOMContentLoaded', schedule);
+})();
@@ -5,14 +5,21 @@ import os
 import sys
 import json
 import time
+import threading
 import requests
-from flask import Flask, request, jsonify, render_template, redirect, url_for, send_from_directory, Response, stream_with_context
+from flask import Flask, request, jsonify, render_template, redirect, url_for, send_from_directory, send_file, Response, stream_with_context
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
+from werkzeug.exceptions import NotFound
 from javbus_db import JavbusDatabase
+from thumbnails import (SIZES as THUMBNAIL_SIZES, FORMATS as THUMBNAIL_FORMATS, width_size_name, sheet_dir,
+                        get_generator as get_thumbnail_generator)
+from image_store import ImageStore
+from image_cache import ImageCacheManager
 from translator import get_translator
 import logging
 import traceback
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 import movieinfo  # Import the movieinfo module
 # 导入视频播放器适配器
 try:
@@ -78,18 +85,22 @@ DB_FILE = "data/javbus.db"
 
 # Directory setup
 os.makedirs("data", exist_ok=True)
-os.makedirs("buspic/covers", exist_ok=True)
-os.makedirs("buspic/actor", exist_ok=True)
 
 # Initialize database
 db = JavbusDatabase(db_file=DB_FILE)
 
+# Content-addressed image store, indexed in the database
+image_store = ImageStore(db)
+
 # Initialize translator
 translator = get_translator()
 
 # Create a FanzaScraper instance
 fanza_scraper = movieinfo.FanzaScraper()
 
+# Fixed-size image variants, generated in a process pool
+thumbnail_generator = get_thumbnail_generator()
+
 # Load configuration
 def load_config():
     """Load configuration file"""
@@ -104,7 +115,12 @@ def load_config():
             "target_lang": "中文",
             "api_token": "",
             "model": "THUDM/glm-4-9b-chat"
-        }
+        },
+        "image_cache_budget_mb": 2048,  # Disk budget for buspic; least recently used images are evicted beyond it, 0 = unlimited
+        "image_cache_interval": 300,  # Seconds between image cache checks
+        "image_max_age": 86400,  # Seconds browsers may reuse an image URL without a version before revalidating
+        "use_x_sendfile": False,  # Let a fronting web server (nginx, Apache) send image files via X-Sendfile
+        "image_fetch_wait": 1.5  # Seconds a request waits for a missing image before a placeholder is sent
     }
     try:
         if os.path.exists(CONFIG_FILE):
@@ -126,6 +142,7 @@ def load_config():
 
 # Get current configuration
 CURRENT_CONFIG = load_config()
+app.use_x_sendfile = CURRENT_CONFIG.get("use_x_sendfile", False)
 
 # 优先使用环境变量中的 API_URL
 CURRENT_API_URL = os.environ.get("API_URL", "")
@@ -146,6 +163,9 @@ else:
 
 CURRENT_WATCH_URL_PREFIX = CURRENT_CONFIG.get("watch_url_prefix", "https://missav.ai")
 
+# Number of concurrent API requests when resolving several uncached movies
+MOVIE_FETCH_WORKERS = 6
+
 # Favorites management
 FAVORITES_FILE = "data/favorites.json"
 
@@ -334,6 +354,14 @@ def search_actor():
     # First try to find actor by name in database
     actors = db.search_stars(actor_name)
     
+    # Then try the local name index (stars seen in cached movies, kana/romaji/aliases)
+    if not actors:
+        indexed_actors = db.suggest_stars(actor_name, limit=20)
+        if len(indexed_actors) == 1:
+            # Only id and name are indexed, let the actor page load the full profile
+            return redirect(url_for('actor_detail', actor_id=indexed_actors[0]["id"]))
+        actors = indexed_actors
+    
     # If not found in DB, search via API
     if not actors:
         try:
@@ -355,6 +383,7 @@ def search_actor():
         
         # Format actor data
         formatted_actor = {
+            "id": actor_id,
             "name": actor.get("name", ""),
             "image_url": actor.get("avatar", ""),
             "birthdate": actor.get("birthday", ""),
@@ -366,7 +395,7 @@ def search_actor():
         }
         
         # Get actor's movies
-        actor_movies = get_actor_movies(actor_id)
+        actor_movies, _ = get_actor_movies(actor_id)
         formatted_movies = [format_movie_data(movie) for movie in actor_movies]
         
         return render_template('search.html', actor=formatted_actor, actor_movies=formatted_movies, actor_query=actor_name)
@@ -395,6 +424,7 @@ def actor_detail(actor_id):
     
     # Format actor data
     formatted_actor = {
+        "id": actor_id,
         "name": actor_data.get("name", ""),
         "image_url": actor_data.get("avatar", ""),
         "birthdate": actor_data.get("birthday", ""),
@@ -405,11 +435,28 @@ def actor_detail(actor_id):
         "hobby": actor_data.get("hobby", "")
     }
     
-    # Get actor's movies
-    actor_movies = get_actor_movies(actor_id)
+    # Get actor's movies, one page at a time like the remote API
+    page = request.args.get('page', 1, type=int)
+    after = None
+    if request.args.get('after_id'):
+        after = [request.args.get('after_date', ''), request.args.get('after_id')]
+    actor_movies, pagination = get_actor_movies(actor_id, page, after)
     formatted_movies = [format_movie_data(movie) for movie in actor_movies]
     
-    return render_template('actor.html', actor=formatted_actor, actor_movies=formatted_movies)
+    page_info = None
+    if pagination:
+        next_cursor = pagination.get("nextCursor")
+        page_info = {
+            "current_page": pagination.get("currentPage", page),
+            "has_next": pagination.get("hasNextPage", False),
+            "next_page": pagination.get("nextPage"),
+            "pages": pagination.get("pages", []),
+            # Keyset cursor for the next page of locally cached movies
+            "next_after_date": next_cursor[0] if next_cursor else None,
+            "next_after_id": next_cursor[1] if next_cursor else None
+        }
+    
+    return render_template('actor.html', actor=formatted_actor, actor_movies=formatted_movies, pagination=page_info)
 
 @app.route('/movie/<movie_id>')
 def movie_detail(movie_id):
@@ -552,13 +599,7 @@ def video_player(movie_id):
 def favorites():
     """Show favorites page"""
     favorites_list = load_favorites()
-    favorite_movies = []
-    
-    for movie_id in favorites_list:
-        movie_data = get_movie_data(movie_id)
-        if movie_data:
-            formatted_movie = format_movie_data(movie_data)
-            favorite_movies.append(formatted_movie)
+    favorite_movies = [format_movie_data(movie_data) for movie_data in get_movies_data(favorites_list)]
     
     return render_template('favorites.html', favorites=favorite_movies)
 
@@ -586,6 +627,20 @@ def refresh_movie(movie_id):
                               error_message=f"An error occurred: {str(e)}"), 500
 
 # Routes: API endpoints
+@app.route('/api/suggest_actor', methods=['GET'])
+def suggest_actor():
+    """Typeahead suggestions for actor names from the local name index"""
+    prefix = request.args.get('q', '').strip()
+    if not prefix:
+        return jsonify({"suggestions": []})
+    
+    try:
+        limit = min(int(request.args.get('limit', 10)), 50)
+    except ValueError:
+        limit = 10
+    
+    return jsonify({"suggestions": db.suggest_stars(prefix, limit=limit)})
+
 @app.route('/api/check_connection', methods=['GET'])
 def check_api_connection():
     """Check API connection status"""
@@ -773,6 +828,66 @@ def toggle_favorite(movie_id):
     
     return jsonify({"status": "success", "is_favorite": is_favorite})
 
+@app.route('/api/image_cache/stats', methods=['GET'])
+def image_cache_stats():
+    """Image cache budget, usage, lookup hit rate and bytes reclaimed by eviction"""
+    return jsonify(image_cache.stats())
+
+@app.route('/api/images/status', methods=['GET'])
+def image_status():
+    """Download state of images requested as ?path=<image path>, with the content version once stored
+    
+    Pages poll this for images that had no version when rendered and swap in the
+    versioned URL when the background download has finished.
+    """
+    images = {}
+    for filename in request.args.getlist('path')[:100]:
+        parts = filename.split('/')
+        key = image_key(parts[0], parts[-1]) if len(parts) >= 2 else None
+        if key is None:
+            images[filename] = {"status": "failed"}
+            continue
+        ref = image_store.db.get_image_ref(*key)
+        if ref:
+            images[filename] = {"status": "ready", "version": ref["hash"][:IMAGE_VERSION_LENGTH]}
+        else:
+            images[filename] = {"status": image_fetch_status(key)}
+    return jsonify({"images": images})
+
+@app.route('/api/movies/<movie_id>/sample_sheet', methods=['GET'])
+def sample_sheet(movie_id):
+    """Contact sheet of a movie's stored samples and the position of each sample in it
+    
+    Samples that are not stored yet are listed in "missing"; those still downloading in the
+    background are also listed in "pending". No sheet is built while samples are pending,
+    so a gallery gets one sheet rather than one per arriving sample; ?partial=1 builds one
+    from the samples stored so far. ?fmt= selects the sheet format as for image variants.
+    """
+    if movie_id in ('.', '..'):
+        return jsonify({"error": "Invalid movie ID"}), 400
+    movie_data = get_movie_data(movie_id)
+    count = len(movie_data.get("samples", [])) if movie_data else 0
+    fmt, negotiated = requested_format()
+    
+    stored = [(image["idx"], image["hash"], image["path"]) for image in image_store.manifest("movie", movie_id)
+              if image["role"] == "sample" and 0 < image["idx"] <= count]
+    stored_indices = {idx for idx, _, _ in stored}
+    missing = [idx for idx in range(1, count + 1) if idx not in stored_indices]
+    # Samples that failed recently are not retried and are not waited for
+    pending = [idx for idx in missing if start_image_fetch(("movie", movie_id, "sample", idx)) is not None]
+    
+    sheet = None
+    if stored and (not pending or request.args.get('partial') == '1'):
+        sheet = thumbnail_generator.contact_sheet(movie_id, stored, fmt)
+    if sheet:
+        sheet = dict(sheet, url=f"/images/sheets/{urllib.parse.quote(movie_id)}/{sheet['file']}")
+    response = jsonify({"samples": count, "missing": missing, "pending": pending, "sheet": sheet})
+    # The manifest changes as missing samples arrive; the sheet it points to does not
+    response.cache_control.no_cache = True
+    if negotiated:
+        response.vary.add('Accept')
+    return response
+
 @app.route('/api/clear_favorites', methods=['POST'])
 def clear_favorites():
     """Clear all favorites"""
@@ -780,160 +895,315 @@ def clear_favorites():
     
     return jsonify({"status": "success"})
 
+# Versioned image URLs never change content and may be cached for a year
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+IMAGE_VERSION_LENGTH = 16
+
+# Missing images are downloaded by a small pool; concurrent requests for the same image
+# share one download, and a failed image is not retried for IMAGE_FETCH_RETRY seconds
+IMAGE_FETCH_WORKERS = 4
+IMAGE_FETCH_RETRY = 300
+image_fetch_executor = ThreadPoolExecutor(max_workers=IMAGE_FETCH_WORKERS, thread_name_prefix="image_fetch")
+pending_image_fetches = {}  # store key -> Future of the running download
+failed_image_fetches = {}  # store key -> time the last download failed
+image_fetch_lock = threading.RLock()  # a finished Future runs its done callback inside submit
+
+# Sent while an image is still downloading; the page swaps in the real image when it is stored
+PENDING_IMAGE_SVG = (
+    '<svg xmlns="http://www.w3.org/2000/svg" width="450" height="300" viewBox="0 0 450 300">'
+    '<rect width="450" height="300" fill="#e9ecef"/>'
+    '<text x="225" y="155" font-family="sans-serif" font-size="20" fill="#6c757d" text-anchor="middle">Loading...</text>'
+    '</svg>'
+)
+
 @app.route('/images/<path:filename>')
 def serve_image(filename):
-    """Serve images from the buspic directory"""
-    # Split the path to get the movie ID and actual filename
+    """Serve images from the content-addressed image store
+
+    Image URLs keep their old shape (actor/<id>.jpg, covers/<id>.jpg, <movie_id>/cover.jpg,
+    <movie_id>/actor_<id>.jpg, <movie_id>/sample_<n>.jpg) and are mapped to image store keys,
+    so an avatar or cover is stored once however many URLs point at it.
+    """
     parts = filename.split('/')
-    if len(parts) < 2:
+    if len(parts) < 2 or any(part in ('', '.', '..') for part in parts):
         return "Invalid path", 400
+    if parts[0] == 'sheets':
+        return send_sample_sheet(parts)
     
-    # Check if this is an actor image from the unified actor directory
-    if parts[0] == 'actor':
-        actor_id = parts[1].split('.')[0]  # Extract actor_id from filename
-        directory = os.path.join("buspic", "actor")
-        
-        # Check if the directory exists
-        if not os.path.exists(directory):
-            os.makedirs(directory, exist_ok=True)
-        
-        # Check if the file exists
-        file_path = os.path.join(directory, parts[1])
-        if not os.path.exists(file_path):
-            # Try to download the image
-            try:
-                actor_data = get_actor_data(actor_id)
-                if actor_data:
-                    image_url = actor_data.get("avatar", "")
-                    if image_url:
-                        download_image(image_url, file_path)
-            except Exception as e:
-                logging.error(f"Failed to download actor image: {str(e)}")
-        
-        # If file exists now, serve it
-        if os.path.exists(file_path):
-            return send_from_directory(directory, parts[1])
-        
-        # Otherwise return a default image
-        return send_from_directory('static/img', 'no_image.jpg')
+    key = image_key(parts[0], parts[-1])
+    if key is None:
+        logging.error(f"Unknown image path: {filename}")
+        return send_placeholder()
     
-    # Check if this is a cover image
-    if parts[0] == 'covers':
-        movie_id = parts[1].split('.')[0]  # Extract movie_id from filename
-        directory = os.path.join("buspic", "covers")
-        
-        # Check if the directory exists
-        if not os.path.exists(directory):
-            os.makedirs(directory, exist_ok=True)
-        
-        # Check if the file exists
-        file_path = os.path.join(directory, parts[1])
-        if not os.path.exists(file_path):
-            # Try to download the image
-            try:
-                movie_data = get_movie_data(movie_id)
-                if movie_data:
-                    image_url = movie_data.get("img", "")
-                    if image_url:
-                        success = download_image(image_url, file_path)
-                        if not success and "sample" in movie_data:
-                            # 如果主图下载失败且有样本图，尝试使用第一个样本图
-                            samples = movie_data.get("samples", [])
-                            if samples and len(samples) > 0:
-                                sample_url = samples[0].get("src", "")
-                                if sample_url:
-                                    download_image(sample_url, file_path)
-            except Exception as e:
-                logging.error(f"Failed to download cover image: {str(e)}")
-        
-        # If file exists now, serve it
-        if os.path.exists(file_path):
-            return send_from_directory(directory, parts[1])
-        
-        # Otherwise return a default image
-        return send_from_directory('static/img', 'no_image.jpg')
-    
-    # Regular movie image handling (sample images and movie-specific covers)
-    movie_id = parts[0]
-    image_name = parts[-1]
-    directory = os.path.join("buspic", movie_id)
+    # One index lookup, no filesystem checks; images saved by older versions are moved
+    # into the store on first access
+    path = image_store.get(*key) or import_legacy_image(key, parts)
+    if not path:
+        # Download in the background and wait only briefly, so slow upstream images
+        # do not hold server threads; the page polls /api/images/status for the rest
+        future = start_image_fetch(key)
+        if future is None:
+            return send_placeholder()
+        try:
+            path = future.result(timeout=CURRENT_CONFIG.get("image_fetch_wait", 1.5))
+        except FutureTimeout:
+            return send_pending_placeholder()
     
-    # Check if the directory exists
-    if not os.path.exists(directory):
-        os.makedirs(directory, exist_ok=True)
+    if path:
+        try:
+            return send_image(path)
+        except NotFound:
+            # The file was removed outside the store; drop the entry so the next request downloads it again
+            logging.warning(f"Image file missing from store: {path}")
+            image_store.forget(*key)
     
-    # Check if the file exists
-    file_path = os.path.join(directory, image_name)
-    if not os.path.exists(file_path):
-        # Try to download the image
+    # Otherwise return a default image
+    return send_placeholder()
+
+def image_key(prefix, image_name):
+    """Map an image URL to its image store key (entity_type, entity_id, role, idx), or None"""
+    name = os.path.splitext(image_name)[0]
+    if prefix == 'actor':
+        return ("star", name, "avatar", 0)
+    if prefix == 'covers':
+        return ("movie", name, "cover", 0)
+    if name.startswith("cover"):
+        return ("movie", prefix, "cover", 0)
+    if name.startswith("actor_"):
+        return ("star", name.split('_', 1)[1], "avatar", 0)
+    if name.startswith("sample_"):
         try:
-            movie_data = get_movie_data(movie_id)
-            if movie_data:
-                if "cover" in image_name:
-                    # First check if the cover exists in covers directory
-                    cover_path = os.path.join("buspic", "covers", f"{movie_id}.jpg")
-                    if os.path.exists(cover_path):
-                        # Copy the file from covers directory
-                        import shutil
-                        shutil.copy2(cover_path, file_path)
-                    else:
-                        # Download directly
-                        image_url = movie_data.get("img", "")
-                        if image_url:
-                            success = download_image(image_url, file_path)
-                            # Also save to covers directory
-                            if success:
-                                os.makedirs(os.path.dirname(cover_path), exist_ok=True)
-                                shutil.copy2(file_path, cover_path)
-                            elif "sample" in movie_data:
-                                # 如果主图下载失败且有样本图，尝试使用第一个样本图
-                                samples = movie_data.get("samples", [])
-                                if samples and len(samples) > 0:
-                                    sample_url = samples[0].get("src", "")
-                                    if sample_url:
-                                        if download_image(sample_url, file_path):
-                                            shutil.copy2(file_path, cover_path)
-                elif "actor_" in image_name:
-                    # Extract actor ID from filename (e.g., actor_123.jpg)
-                    actor_id = image_name.split('_')[1].split('.')[0]
-                    
-                    # First check if the actor image exists in the actor directory
-                    actor_path = os.path.join("buspic", "actor", f"{actor_id}.jpg")
-                    if os.path.exists(actor_path):
-                        # Copy the file from actor directory
-                        import shutil
-                        shutil.copy2(actor_path, file_path)
-                    else:
-                        # Download actor image to both locations
-                        actor_data = get_actor_data(actor_id)
-                        if actor_data:
-                            image_url = actor_data.get("avatar", "")
-                            if image_url:
-                                # Download to unified actor directory first
-                                os.makedirs(os.path.dirname(actor_path), exist_ok=True)
-                                if download_image(image_url, actor_path):
-                                    # Copy to movie-specific location
-                                    shutil.copy2(actor_path, file_path)
-                elif "sample_" in image_name:
-                    # Extract sample index from filename (e.g., sample_1.jpg)
-                    try:
-                        sample_index = int(image_name.split('_')[1].split('.')[0]) - 1
-                        samples = movie_data.get("samples", [])
-                        if samples and 0 <= sample_index < len(samples):
-                            sample_url = samples[sample_index].get("src", "")
-                            if sample_url:
-                                download_image(sample_url, file_path)
-                    except (ValueError, IndexError):
-                        logging.error(f"Invalid sample index in filename: {image_name}")
-        except Exception as e:
-            logging.error(f"Failed to download image: {str(e)}")
+            return ("movie", prefix, "sample", int(name.split('_', 1)[1]))
+        except ValueError:
+            logging.error(f"Invalid sample index in filename: {image_name}")
+    return None
+
+def import_legacy_image(key, parts):
+    """Move an image saved by older versions (per-movie, covers/ and actor/ directories) into the store"""
+    entity_type, entity_id, role, idx = key
+    candidates = [os.path.join("buspic", *parts)]
+    if role == "cover":
+        candidates.append(os.path.join("buspic", "covers", f"{entity_id}.jpg"))
+    elif role == "avatar":
+        candidates.append(os.path.join("buspic", "actor", f"{entity_id}.jpg"))
+    for candidate in candidates:
+        path = image_store.import_legacy(candidate, *key)
+        if path:
+            return path
+    return None
+
+def start_image_fetch(key):
+    """Start downloading an image in the background and return its Future
     
-    # If file exists now, serve it
-    if os.path.exists(file_path):
-        return send_from_directory(directory, image_name)
+    Joins the download already running for the same key. Returns None while a recent
+    failure for the key is still within IMAGE_FETCH_RETRY.
+    """
+    with image_fetch_lock:
+        future = pending_image_fetches.get(key)
+        if future is not None:
+            return future
+        failed_at = failed_image_fetches.get(key)
+        if failed_at is not None and time.time() - failed_at < IMAGE_FETCH_RETRY:
+            return None
+        future = image_fetch_executor.submit(fetch_image_safely, key)
+        pending_image_fetches[key] = future
+        future.add_done_callback(lambda done, key=key: finish_image_fetch(key, done))
+        return future
+
+def finish_image_fetch(key, future):
+    """Forget a finished download and remember it if it failed"""
+    with image_fetch_lock:
+        pending_image_fetches.pop(key, None)
+        if future.result():
+            failed_image_fetches.pop(key, None)
+        else:
+            failed_image_fetches[key] = time.time()
+
+def fetch_image_safely(key):
+    """fetch_image for the background pool: errors are logged and reported as None"""
+    try:
+        return fetch_image(key)
+    except Exception as e:
+        logging.error(f"Failed to download image {key}: {str(e)}")
+        return None
+
+def image_fetch_status(key):
+    """'pending', 'failed' or 'unknown' for an image that is not in the store"""
+    with image_fetch_lock:
+        if key in pending_image_fetches:
+            return "pending"
+        failed_at = failed_image_fetches.get(key)
+        if failed_at is not None and time.time() - failed_at < IMAGE_FETCH_RETRY:
+            return "failed"
+    return "unknown"
+
+def fetch_image(key):
+    """Download the image behind a store key from its source URL, returning the stored path or None"""
+    entity_type, entity_id, role, idx = key
+    if entity_type == "star":
+        actor_data = get_actor_data(entity_id)
+        urls = [actor_data.get("avatar", "")] if actor_data else []
+    else:
+        movie_data = get_movie_data(entity_id)
+        if not movie_data:
+            return None
+        samples = movie_data.get("samples", [])
+        if role == "cover":
+            # Fall back to the first sample image when the cover cannot be downloaded
+            urls = [movie_data.get("img", "")] + [sample.get("src", "") for sample in samples[:1]]
+        else:
+            urls = [samples[idx - 1].get("src", "")] if 0 < idx <= len(samples) else []
     
-    # Otherwise return a default image
-    return send_from_directory('static/img', 'no_image.jpg')
+    for url in urls:
+        if url:
+            path = download_to_store(url, key)
+            if path:
+                return path
+    return None
+
+def download_to_store(url, key):
+    """Download an image into the store under the given key, returning the stored path or None"""
+    ext = os.path.splitext(urllib.parse.urlparse(url).path)[1].lower() or ".jpg"
+    path = image_store.download(lambda temp_path: download_image(url, temp_path), *key, ext=ext)
+    if path:
+        # Pre-generate the card-size variants used by the listing pages
+        for fmt in THUMBNAIL_FORMATS:
+            thumbnail_generator.pregenerate(path, ("card",), fmt)
+    return path
+
+def image_digest(path):
+    """Content hash of a stored image, taken from its blob file name"""
+    return os.path.splitext(os.path.basename(path))[0]
+
+def image_variant():
+    """Read the variant a request asks for: (size name, format, whether the format depends on Accept)
+    
+    ?size= names a fixed box from THUMBNAIL_SIZES; otherwise ?w= is rounded up to one of the
+    width steps, so arbitrary widths cannot fill the disk. ?fmt= is jpeg, webp or auto, which
+    picks webp when the browser accepts it. The size name is None for the original image.
+    """
+    size = request.args.get('size')
+    if size not in THUMBNAIL_SIZES:
+        width = request.args.get('w', type=int)
+        size = width_size_name(width) if width and width > 0 else None
+    fmt, negotiated = requested_format()
+    return size, fmt, negotiated
+
+def requested_format():
+    """Read ?fmt=: (format, whether it was negotiated from the Accept header)"""
+    fmt = request.args.get('fmt', 'jpeg')
+    if fmt == 'auto':
+        return ('webp' if 'image/webp' in request.headers.get('Accept', '') else 'jpeg'), True
+    return (fmt if fmt in THUMBNAIL_FORMATS else 'jpeg'), False
+
+def send_image(path):
+    """Send an image, or a resized and re-encoded variant (?size=, ?w=, ?fmt=, see image_variant)
+    
+    Blob files are named by content hash, so the hash (plus the variant) is a strong ETag
+    that needs no hashing. A matching If-None-Match is answered with 304 before the file
+    is opened or a variant generated. URLs carrying ?v=<hash> from image_url() cannot change
+    and are cached as immutable for a year; other URLs are revalidated after image_max_age.
+    Variants are generated once in the thumbnail process pool and kept on disk.
+    """
+    size, fmt, negotiated = image_variant()
+    digest = image_digest(path)
+    etag = f"{digest}-{size}-{fmt}" if size else digest
+    version = request.args.get('v')
+    if version and len(version) >= 8 and digest.startswith(version):
+        max_age, immutable = IMMUTABLE_MAX_AGE, True
+    else:
+        max_age, immutable = CURRENT_CONFIG.get("image_max_age", 86400), False
+    
+    if request.if_none_match.contains(etag):
+        response = not_modified(etag)
+    else:
+        if size:
+            variant = thumbnail_generator.get(path, size, fmt=fmt)
+            if variant:
+                path = variant
+            else:
+                # Send the original, and keep it from being cached as the variant
+                etag, max_age, immutable = digest, 0, False
+        if not os.path.isfile(path):
+            raise NotFound()
+        # conditional=True also handles If-Modified-Since and Range requests
+        response = send_file(path, conditional=True, etag=etag, max_age=max_age)
+    set_image_cache_headers(response, max_age, immutable)
+    if negotiated:
+        response.vary.add('Accept')
+    return response
+
+def not_modified(etag):
+    """304 response for a request whose If-None-Match matches etag"""
+    response = Response(status=304)
+    response.set_etag(etag)
+    return response
+
+def set_image_cache_headers(response, max_age, immutable=False):
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    response.cache_control.immutable = immutable
+
+def send_sample_sheet(parts):
+    """Send a sample contact sheet (sheets/<movie_id>/<sheet_id>.<ext>)
+    
+    The sheet ID is derived from the sample hashes, so a sheet file never changes and is
+    cached as immutable; a changed gallery gets a new ID from /api/movies/<id>/sample_sheet.
+    """
+    if len(parts) != 3:
+        return send_placeholder()
+    path = os.path.join(sheet_dir(parts[1], image_store.image_root), parts[2])
+    if not os.path.isfile(path):
+        return send_placeholder()
+    etag = os.path.splitext(parts[2])[0]
+    if request.if_none_match.contains(etag):
+        response = not_modified(etag)
+    else:
+        response = send_file(path, conditional=True, etag=etag, max_age=IMMUTABLE_MAX_AGE)
+    set_image_cache_headers(response, IMMUTABLE_MAX_AGE, True)
+    return response
+
+def send_placeholder():
+    """Send the default image; it stands in for a missing image, so browsers must not keep it"""
+    response = send_from_directory('static/img', 'no_image.jpg', max_age=0)
+    response.cache_control.no_store = True
+    return response
+
+def send_pending_placeholder():
+    """Send the placeholder for an image that is still downloading"""
+    response = Response(PENDING_IMAGE_SVG, mimetype='image/svg+xml')
+    response.cache_control.no_store = True
+    response.headers['Retry-After'] = '2'
+    return response
+
+@app.template_global()
+def image_url(filename, size=None, width=None, fmt=None):
+    """Build an /images/ URL, versioned by content hash when the image is already stored
+    
+    A versioned URL points at fixed content, so repeat visits use the browser cache
+    without revalidating. size, width and fmt select a variant, see image_variant().
+    """
+    params = {}
+    if size:
+        params['size'] = size
+    if width:
+        params['w'] = width
+    if fmt:
+        params['fmt'] = fmt
+    parts = filename.split('/')
+    key = image_key(parts[0], parts[-1]) if len(parts) >= 2 else None
+    path = image_store.get(*key) if key else None
+    if path:
+        params['v'] = image_digest(path)[:IMAGE_VERSION_LENGTH]
+    query = urllib.parse.urlencode(params)
+    return f"/images/{filename}?{query}" if query else f"/images/{filename}"
+
+# Evict least recently used images once buspic exceeds the disk budget;
+# favorites are protected until everything else is gone
+image_cache = ImageCacheManager(image_store,
+                                CURRENT_CONFIG.get("image_cache_budget_mb", 2048) * 1024 * 1024,
+                                protected_ids=load_favorites,
+                                interval=CURRENT_CONFIG.get("image_cache_interval", 300))
 
 # Helper functions
 def get_movie_data(movie_id):
@@ -954,6 +1224,43 @@ def get_movie_data(movie_id):
     
     return movie_data
 
+def fetch_movie_from_api(movie_id):
+    """Fetch a single movie from API and save it to database, returns None on failure"""
+    try:
+        response = requests.get(f"{CURRENT_API_URL}/movies/{movie_id}", timeout=15)
+        if response.status_code == 200:
+            movie_data = response.json()
+            db.save_movie(movie_data)
+            return movie_data
+        logging.warning(f"Failed to get movie {movie_id} from API: HTTP {response.status_code}")
+    except Exception as e:
+        logging.error(f"Failed to get movie data from API: {str(e)}")
+    return None
+
+def get_movies_data(movie_ids):
+    """Get several movies at once, in the given order
+    
+    Cached movies are resolved with one bulk query; only missing or stale
+    movies are requested from the API, concurrently. Stale copies are used
+    when the refresh fails.
+    """
+    movies, missing, stale = db.get_movies(movie_ids)
+    to_fetch = missing + stale
+    
+    if to_fetch:
+        with ThreadPoolExecutor(max_workers=min(MOVIE_FETCH_WORKERS, len(to_fetch))) as executor:
+            for movie_id, movie_data in zip(to_fetch, executor.map(fetch_movie_from_api, to_fetch)):
+                if movie_data:
+                    movies[movie_id] = movie_data
+        
+        # Fall back to the expired copies for movies that could not be refreshed
+        unresolved = [movie_id for movie_id in stale if movie_id not in movies]
+        if unresolved:
+            old_movies, _, _ = db.get_movies(unresolved, max_age=36500)
+            movies.update(old_movies)
+    
+    return [movies[movie_id] for movie_id in movie_ids if movie_id in movies]
+
 def get_actor_data(actor_id):
     """Get actor data from database or API"""
     # Try to get from database first
@@ -972,59 +1279,40 @@ def get_actor_data(actor_id):
     
     return actor_data
 
-def get_actor_movies(actor_id):
-    """Get actor's movies from database or API"""
+def get_actor_movies(actor_id, page=1, after=None):
+    """Get one page of actor's movies from database or API
+    
+    Returns (movies, pagination); pagination uses the remote API format and
+    is None when nothing could be loaded.
+    """
     # Try to get from database first
-    movies = db.get_star_movies(actor_id)
+    movies, pagination = db.get_star_movies_page(actor_id, page, after=after)
+    if pagination:
+        return movies, pagination
     
-    # If not in database, try to get from API
-    if not movies:
-        try:
-            all_movies = []
-            page = 1
-            max_pages = 3  # Limit to 3 pages for performance
-            
-            while page <= max_pages:
-                response = requests.get(
-                    f"{CURRENT_API_URL}/movies",
-                    params={
-                        "filterType": "star",
-                        "filterValue": actor_id,
-                        "page": str(page),
-                        "magnet": "all"
-                    }
-                )
-                
-                if response.status_code != 200:
-                    break
-                
-                data = response.json()
-                movies_list = data.get("movies", [])
-                pagination = data.get("pagination", {})
-                
-                if not movies_list:
-                    break
-                
-                # Get detailed movie info for each movie
-                for movie in movies_list:
-                    movie_id = movie.get("id")
-                    if movie_id:
-                        movie_data = get_movie_data(movie_id)
-                        if movie_data:
-                            all_movies.append(movie_data)
-                
-                # Check if there's a next page
-                has_next_page = pagination.get("hasNextPage", False)
-                if not has_next_page:
-                    break
-                
-                page += 1
+    # If not in database, get the same page from API
+    movies = []
+    try:
+        response = requests.get(
+            f"{CURRENT_API_URL}/movies",
+            params={
+                "filterType": "star",
+                "filterValue": actor_id,
+                "page": str(page),
+                "magnet": "all"
+            }
+        )
+        
+        if response.status_code == 200:
+            data = response.json()
+            pagination = data.get("pagination", {})
             
-            movies = all_movies
-        except Exception as e:
-            logging.error(f"Failed to get actor movies from API: {str(e)}")
+            # Get detailed movie info for the whole page at once
+            movies = get_movies_data([movie.get("id") for movie in data.get("movies", []) if movie.get("id")])
+    except Exception as e:
+        logging.error(f"Failed to get actor movies from API: {str(e)}")
     
-    return movies
+    return movies, pagination
 
 def format_movie_data(movie_data):
     """Format movie data for template rendering"""
@@ -1120,9 +1408,26 @@ def download_image(url, save_path):
         
         # 如果下载成功，保存图片
         if response.status_code == 200:
-            with open(save_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+            # Stream into a temp file and rename it into place only when complete,
+            # so an interrupted download never leaves a truncated image behind
+            expected = response.headers.get("Content-Length", "")
+            if response.headers.get("Content-Encoding", "identity") != "identity":
+                expected = ""
+            temp_path = f"{save_path}.{threading.get_ident()}.part"
+            try:
+                written = 0
+                with open(temp_path, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=65536):
+                        if chunk:
+                            f.write(chunk)
+                            written += len(chunk)
+                if written == 0 or (expected.isdigit() and int(expected) != written):
+                    logging.error(f"Incomplete download from {url}: expected {expected or 'unknown'} bytes, got {written}")
+                    return False
+                os.replace(temp_path, save_path)
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
             return True
         
         logging.error(f"Failed to download image from {url}, status code: {response.status_code}")
@@ -1378,4 +1683,5 @@ def proxy_stream():
 
 # Start the server
 if __name__ == '__main__':
+    image_cache.start()
     app.run(host='0.0.0.0', port=8080, debug=False) 
\ No newline at end of file
@@ -4,19 +4,72 @@
 import os
 import sys
 import time
+import socket
 import argparse
+import multiprocessing
+from collections import OrderedDict
+from urllib.parse import urlparse
 import requests
 from tqdm import tqdm
 from javbus_db import JavbusDatabase
+from crawl_queue import CrawlTaskQueue
+
+class CrawlMemo:
+    """单次运行内的实体缓存：记录已访问的ID，并缓存最近获取的实体数据"""
+    
+    def __init__(self, max_entries=5000):
+        """初始化缓存，max_entries限制缓存的实体数据条数，已访问ID集合不受限制"""
+        self.visited = set()
+        self.entities = OrderedDict()
+        self.max_entries = max_entries
+    
+    def visit(self, entity_id):
+        """标记实体为已访问，首次访问时返回True"""
+        if entity_id in self.visited:
+            return False
+        self.visited.add(entity_id)
+        return True
+    
+    def get(self, entity_id):
+        """获取缓存的实体数据，不存在时返回None"""
+        data = self.entities.get(entity_id)
+        if data is not None:
+            self.entities.move_to_end(entity_id)
+        return data
+    
+    def put(self, entity_id, data):
+        """缓存实体数据，超出容量时淘汰最久未使用的条目"""
+        self.visited.add(entity_id)
+        self.entities[entity_id] = data
+        self.entities.move_to_end(entity_id)
+        while len(self.entities) > self.max_entries:
+            self.entities.popitem(last=False)
+
 
 class JavbusDataGenerator:
     """JavBus数据生成器，用于从API获取数据并存储到数据库"""
     
-    def __init__(self, api_base_url, db_path="javbus_data.db"):
+    def __init__(self, api_base_url, db_path="javbus_data.db", task_queue=None, request_interval=None):
         """初始化数据生成器"""
         self.api_base_url = api_base_url
         self.db = JavbusDatabase(db_path)
         
+        # 分布式模式下使用共享任务队列，演员和影片会被拆分为独立任务由各工作进程领取
+        self.task_queue = task_queue
+        if self.task_queue:
+            # 多个进程同时写入同一个数据库
+            self.db.enable_wal()
+        
+        # 同一主机两次请求之间的最小间隔（秒），默认只在多进程共享队列时限速，单进程运行保持原有速度
+        if request_interval is None:
+            request_interval = 0.5 if self.task_queue else 0
+        self.request_interval = request_interval
+        self.last_request_time = {}
+        
+        # 本次运行的演员和影片缓存，同一实体在一次运行中只查询一次数据库或API
+        self.star_memo = CrawlMemo()
+        self.movie_memo = CrawlMemo()
+        
         # 设置请求头，模拟浏览器行为
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
@@ -30,18 +83,40 @@ class JavbusDataGenerator:
     def close(self):
         """关闭数据库连接"""
         self.db.close()
+        if self.task_queue:
+            self.task_queue.close()
+    
+    def api_get(self, path, params=None):
+        """请求API，遵守对同一主机的请求间隔"""
+        host = urlparse(self.api_base_url).netloc
+        if self.task_queue:
+            # 限速状态保存在共享队列中，所有工作进程共同遵守
+            self.task_queue.wait_for_host(host, self.request_interval)
+        else:
+            wait = self.last_request_time.get(host, 0) + self.request_interval - time.time()
+            if wait > 0:
+                time.sleep(wait)
+            self.last_request_time[host] = time.time()
+        
+        return requests.get(f"{self.api_base_url}{path}", params=params, headers=self.headers, timeout=30)
     
     def fetch_star(self, star_id):
         """获取演员信息并保存到数据库"""
         try:
+            # 本次运行中已获取过的演员直接返回
+            memo_star = self.star_memo.get(star_id)
+            if memo_star:
+                return memo_star
+            
             # 检查数据库中是否已有最新数据
             cached_star = self.db.get_star(star_id)
             if cached_star:
                 print(f"使用缓存的演员数据: {star_id}")
+                self.star_memo.put(star_id, cached_star)
                 return cached_star
             
             # 从API获取演员信息
-            response = requests.get(f"{self.api_base_url}/stars/{star_id}", headers=self.headers)
+            response = self.api_get(f"/stars/{star_id}")
             
             if response.status_code != 200:
                 print(f"获取演员信息失败: {response.status_code}")
@@ -52,6 +127,7 @@ class JavbusDataGenerator:
             # 保存到数据库
             if self.db.save_star(star_data):
                 print(f"保存演员信息成功: {star_data.get('name', '')} ({star_id})")
+                self.star_memo.put(star_id, star_data)
                 return star_data
             else:
                 print(f"保存演员信息失败: {star_id}")
@@ -63,14 +139,20 @@ class JavbusDataGenerator:
     def fetch_movie(self, movie_id):
         """获取影片信息并保存到数据库"""
         try:
+            # 本次运行中已获取过的影片直接返回
+            memo_movie = self.movie_memo.get(movie_id)
+            if memo_movie:
+                return memo_movie
+            
             # 检查数据库中是否已有最新数据
             cached_movie = self.db.get_movie(movie_id)
             if cached_movie:
                 print(f"使用缓存的影片数据: {movie_id}")
+                self.movie_memo.put(movie_id, cached_movie)
                 return cached_movie
             
             # 从API获取影片信息
-            response = requests.get(f"{self.api_base_url}/movies/{movie_id}", headers=self.headers)
+            response = self.api_get(f"/movies/{movie_id}")
             
             if response.status_code != 200:
                 print(f"获取影片信息失败: {response.status_code}")
@@ -81,13 +163,18 @@ class JavbusDataGenerator:
             # 保存到数据库
             if self.db.save_movie(movie_data):
                 print(f"保存影片信息成功: {movie_data.get('title', '')} ({movie_id})")
+                self.movie_memo.put(movie_id, movie_data)
                 
-                # 同时保存演员信息
+                # 同时保存演员信息，常见的共演演员在本次运行中只处理一次
                 stars = movie_data.get('stars', [])
                 for star in stars:
                     star_id = star.get('id')
-                    if star_id:
-                        self.fetch_star(star_id)
+                    if star_id and self.star_memo.visit(star_id):
+                        if self.task_queue:
+                            # 分布式模式下演员信息作为独立任务，由空闲的工作进程处理
+                            self.task_queue.enqueue("star", star_id)
+                        else:
+                            self.fetch_star(star_id)
                 
                 return movie_data
             else:
@@ -108,14 +195,15 @@ class JavbusDataGenerator:
             
             # 从API搜索演员
             all_stars = []
+            found_star_ids = set()
             
             for page in range(1, max_pages + 1):
                 # 搜索影片
-                response = requests.get(f"{self.api_base_url}/movies/search", params={
+                response = self.api_get("/movies/search", params={
                     "keyword": keyword,
                     "page": str(page),
                     "magnet": "all"
-                }, headers=self.headers)
+                })
                 
                 if response.status_code != 200:
                     print(f"搜索影片失败: {response.status_code}")
@@ -137,10 +225,11 @@ class JavbusDataGenerator:
                             for star in stars:
                                 star_id = star.get("id")
                                 star_name = star.get("name", "")
-                                if star_id and keyword.lower() in star_name.lower():
+                                if star_id and star_id not in found_star_ids and keyword.lower() in star_name.lower():
                                     # 获取完整的演员信息
                                     star_data = self.fetch_star(star_id)
-                                    if star_data and star_data not in all_stars:
+                                    if star_data:
+                                        found_star_ids.add(star_id)
                                         all_stars.append(star_data)
             
             print(f"共找到 {len(all_stars)} 个匹配的演员")
@@ -160,15 +249,16 @@ class JavbusDataGenerator:
             
             # 从API获取演员影片
             all_movies = []
+            found_movie_ids = set()
             
             for page in range(1, max_pages + 1):
                 # 搜索演员参演的影片
-                response = requests.get(f"{self.api_base_url}/movies", params={
+                response = self.api_get("/movies", params={
                     "filterType": "star",
                     "filterValue": star_id,
                     "page": str(page),
                     "magnet": "all"
-                }, headers=self.headers)
+                })
                 
                 if response.status_code != 200:
                     print(f"获取演员影片失败: {response.status_code}")
@@ -184,9 +274,10 @@ class JavbusDataGenerator:
                 # 获取每部影片的详细信息
                 for movie in tqdm(movies, desc=f"处理第{page}页影片"):
                     movie_id = movie.get("id")
-                    if movie_id:
+                    if movie_id and movie_id not in found_movie_ids:
                         movie_data = self.fetch_movie(movie_id)
                         if movie_data:
+                            found_movie_ids.add(movie_id)
                             all_movies.append(movie_data)
                 
                 # 检查是否有下一页
@@ -200,6 +291,95 @@ class JavbusDataGenerator:
             print(f"获取演员影片异常: {str(e)}")
             return []
     
+    def enqueue_star_movies(self, star_id, max_pages=5):
+        """将演员影片列表的抓取加入共享任务队列，从第一页开始逐页展开"""
+        self.task_queue.enqueue("star_movies", f"{star_id}:1", {
+            "star_id": star_id,
+            "page": 1,
+            "max_pages": max_pages
+        })
+    
+    def process_star_movies_page(self, star_id, page, max_pages):
+        """处理演员影片列表的一页：每部影片作为独立任务入队，并在需要时将下一页入队"""
+        response = self.api_get("/movies", params={
+            "filterType": "star",
+            "filterValue": star_id,
+            "page": str(page),
+            "magnet": "all"
+        })
+        
+        if response.status_code != 200:
+            print(f"获取演员影片失败: {response.status_code}")
+            return False
+        
+        data = response.json()
+        movies = data.get("movies", [])
+        pagination = data.get("pagination", {})
+        
+        for movie in movies:
+            movie_id = movie.get("id")
+            if movie_id:
+                self.task_queue.enqueue("movie", movie_id)
+        
+        if movies and pagination.get("hasNextPage", False) and page < max_pages:
+            # 列表页优先处理，让影片任务尽快铺开到所有工作进程
+            self.task_queue.enqueue("star_movies", f"{star_id}:{page + 1}", {
+                "star_id": star_id,
+                "page": page + 1,
+                "max_pages": max_pages
+            }, priority=1)
+        
+        print(f"演员 {star_id} 第{page}页: 加入 {len(movies)} 个影片任务")
+        return True
+    
+    def run_task(self, task):
+        """执行从队列领取的任务，返回是否成功"""
+        task_type = task["task_type"]
+        target = task["target"]
+        params = task["params"]
+        
+        if task_type == "star":
+            return self.fetch_star(target) is not None
+        if task_type == "movie":
+            return self.fetch_movie(target) is not None
+        if task_type == "star_movies":
+            return self.process_star_movies_page(params["star_id"], params["page"], params["max_pages"])
+        
+        print(f"未知的任务类型: {task_type}")
+        return False
+    
+    def run_worker(self, worker_id, idle_timeout=30):
+        """作为工作进程循环领取任务，队列中没有未完成任务或空闲超时后退出"""
+        processed = 0
+        idle_since = None
+        
+        while True:
+            task = self.task_queue.claim(worker_id)
+            if not task:
+                # 其他工作进程仍在处理的任务可能会产生新任务，因此不立即退出
+                if self.task_queue.pending_count() == 0:
+                    break
+                if idle_since is None:
+                    idle_since = time.time()
+                elif time.time() - idle_since > idle_timeout:
+                    break
+                time.sleep(1)
+                continue
+            
+            idle_since = None
+            try:
+                if self.run_task(task):
+                    self.task_queue.complete(task["task_type"], task["target"])
+                else:
+                    self.task_queue.fail(task["task_type"], task["target"], "任务执行失败")
+            except Exception as e:
+                print(f"任务执行异常: {task['task_type']} {task['target']}: {str(e)}")
+                self.task_queue.fail(task["task_type"], task["target"], str(e))
+            processed += 1
+        
+        print(f"工作进程 {worker_id} 结束，共处理 {processed} 个任务")
+        return processed
+    
     def clean_database(self):
         """清理过期数据"""
         print("开始清理过期数据...")
@@ -209,6 +389,15 @@ class JavbusDataGenerator:
             print("清理过期数据失败")
 
 
+def run_worker_process(api_base_url, db_path, queue_path, worker_id, request_interval, idle_timeout):
+    """工作进程入口，每个进程使用独立的数据库和队列连接"""
+    generator = JavbusDataGenerator(api_base_url, db_path, CrawlTaskQueue(queue_path), request_interval)
+    try:
+        generator.run_worker(worker_id, idle_timeout)
+    finally:
+        generator.close()
+
+
 def main():
     """主函数"""
     parser = argparse.ArgumentParser(description="JavBus数据生成器")
@@ -220,29 +409,81 @@ def main():
     parser.add_argument("--search", type=str, help="搜索演员")
     parser.add_argument("--star-movies", type=str, help="获取演员的所有影片")
     parser.add_argument("--max-pages", type=int, default=5, help="最大页数")
+    parser.add_argument("--interval", type=float, default=None, help="同一主机两次请求之间的最小间隔（秒），默认使用--queue时为0.5，否则不限速")
+    parser.add_argument("--queue", type=str, help="共享任务队列数据库路径，指定后--star/--movie/--star-movies改为加入队列")
+    parser.add_argument("--worker", action="store_true", help="作为工作进程从任务队列领取任务")
+    parser.add_argument("--workers", type=int, default=1, help="本机启动的工作进程数量")
+    parser.add_argument("--worker-id", type=str, default="", help="工作进程标识，默认为主机名和进程号")
+    parser.add_argument("--idle-timeout", type=int, default=30, help="工作进程空闲多少秒后退出")
+    parser.add_argument("--retry-failed", action="store_true", help="将队列中失败的任务重新放回队列")
+    parser.add_argument("--merge", type=str, nargs="+", help="将其他节点的数据库分片合并到--db指定的数据库")
     
     args = parser.parse_args()
     
-    generator = JavbusDataGenerator(args.api, args.db)
+    task_queue = CrawlTaskQueue(args.queue) if args.queue else None
+    generator = JavbusDataGenerator(args.api, args.db, task_queue, args.interval)
     
     try:
+        if args.merge:
+            for shard_path in args.merge:
+                success, counts = generator.db.merge_from(shard_path)
+                if success:
+                    print(f"合并分片 {shard_path} 完成: 演员 {counts['stars']}，影片 {counts['movies']}，关联 {counts['star_movie']}")
+                else:
+                    print(f"合并分片 {shard_path} 失败")
+        
         if args.clean:
             generator.clean_database()
         
-        if args.star:
-            generator.fetch_star(args.star)
-        
-        if args.movie:
-            generator.fetch_movie(args.movie)
-        
-        if args.search:
-            generator.search_and_save_stars(args.search, args.max_pages)
-        
-        if args.star_movies:
-            generator.fetch_star_movies(args.star_movies, args.max_pages)
+        if task_queue:
+            if args.retry_failed:
+                print(f"重新放回队列的失败任务: {task_queue.retry_failed()}")
+            if args.star:
+                task_queue.enqueue("star", args.star)
+            if args.movie:
+                task_queue.enqueue("movie", args.movie)
+            if args.star_movies:
+                generator.enqueue_star_movies(args.star_movies, args.max_pages)
+            if args.search:
+                # 关键字搜索需要汇总结果，仍在本进程中执行
+                generator.search_and_save_stars(args.search, args.max_pages)
+            
+            if args.worker:
+                worker_id = args.worker_id or f"{socket.gethostname()}-{os.getpid()}"
+                if args.workers > 1:
+                    # 使用spawn启动工作进程，子进程不会继承父进程已打开的sqlite连接，
+                    # 各自在run_worker_process中建立自己的连接
+                    context = multiprocessing.get_context("spawn")
+                    processes = []
+                    for i in range(args.workers):
+                        process = context.Process(
+                            target=run_worker_process,
+                            args=(args.api, args.db, args.queue, f"{worker_id}-{i + 1}", args.interval, args.idle_timeout)
+                        )
+                        process.start()
+                        processes.append(process)
+                    for process in processes:
+                        process.join()
+                else:
+                    generator.run_worker(worker_id, args.idle_timeout)
+            
+            print(f"任务队列状态: {task_queue.stats()}")
+        else:
+            if args.star:
+                generator.fetch_star(args.star)
+            
+            if args.movie:
+                generator.fetch_movie(args.movie)
+            
+            if args.search:
+                generator.search_and_save_stars(args.search, args.max_pages)
+            
+            if args.star_movies:
+                generator.fetch_star_movies(args.star_movies, args.max_pages)
         
         # 如果没有指定任何操作，显示帮助信息
-        if not (args.clean or args.star or args.movie or args.search or args.star_movies):
+        if not (args.clean or args.star or args.movie or args.search or args.star_movies
+                or args.merge or args.worker or args.retry_failed):
             parser.print_help()
     finally:
         generator.close()
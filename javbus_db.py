@@ -4,10 +4,25 @@ import sqlite3
 import time
 import threading
 from datetime import datetime, timedelta
+from star_index import index_entries, query_keys
 
 class JavbusDatabase:
     """JavBus数据库类，用于存储和检索演员和影片信息"""
     
+    # 与远程API一致的每页影片数量
+    PAGE_SIZE = 30
+    
+    # 批量查询时每条IN语句包含的ID数量，低于SQLite的参数个数上限
+    BULK_CHUNK_SIZE = 500
+    
+    # 演员影片的排序方式：(ORDER BY子句, 键集分页条件)
+    # 没有日期的影片按空字符串排序，与nextCursor一致，否则键集分页会跳过这些影片
+    STAR_MOVIE_SORTS = {
+        "date": ("COALESCE(m.date, '') DESC, m.id DESC",
+                 "(COALESCE(m.date, '') < ? OR (COALESCE(m.date, '') = ? AND m.id < ?))"),
+        "id": ("m.id ASC", "m.id > ?"),
+    }
+    
     def __init__(self, db_path="javbus_data.db"):
         """初始化数据库连接"""
         self.db_path = db_path
@@ -19,7 +34,8 @@ class JavbusDatabase:
         """连接到数据库，每个线程使用独立的连接"""
         try:
             if not hasattr(self.local, 'conn') or self.local.conn is None:
-                self.local.conn = sqlite3.connect(self.db_path)
+                # 多个进程共享数据库时，写锁冲突会等待而不是立即报错
+                self.local.conn = sqlite3.connect(self.db_path, timeout=30)
                 self.local.conn.row_factory = sqlite3.Row  # 使查询结果可以通过列名访问
                 self.local.cursor = self.local.conn.cursor()
         except sqlite3.Error as e:
@@ -93,7 +109,65 @@ class JavbusDatabase:
             )
             ''')
             
+            # 创建演员名字索引表，包含归一化名字、罗马字和别名，用于前缀搜索
+            self.local.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS star_names (
+                star_id TEXT,
+                name TEXT,
+                norm TEXT,
+                romaji TEXT,
+                is_alias INTEGER DEFAULT 0,
+                PRIMARY KEY (star_id, name)
+            )
+            ''')
+            self.local.cursor.execute('CREATE INDEX IF NOT EXISTS idx_star_names_norm ON star_names (norm)')
+            self.local.cursor.execute('CREATE INDEX IF NOT EXISTS idx_star_names_romaji ON star_names (romaji)')
+            
+            # 图片索引表：(实体类型, 实体ID, 角色, 序号) -> 按内容哈希保存的图片文件及其大小和尺寸，
+            # 判断图片是否存在只需查询该表，不需要访问文件系统
+            self.local.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS image_index (
+                entity_type TEXT,
+                entity_id TEXT,
+                role TEXT,
+                idx INTEGER,
+                hash TEXT,
+                ext TEXT,
+                size INTEGER,
+                width INTEGER,
+                height INTEGER,
+                last_updated INTEGER,
+                last_access INTEGER,
+                PRIMARY KEY (entity_type, entity_id, role, idx)
+            )
+            ''')
+            self.local.cursor.execute('CREATE INDEX IF NOT EXISTS idx_image_index_hash ON image_index (hash)')
+            
+            # 批量图片下载队列，程序关闭后可以继续下载
+            self.local.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS download_queue (
+                movie_id TEXT PRIMARY KEY,
+                full_gallery INTEGER DEFAULT 1,
+                status TEXT,
+                attempts INTEGER DEFAULT 0,
+                error TEXT,
+                added INTEGER,
+                last_updated INTEGER
+            )
+            ''')
+            
+            # 演员影片分页使用的索引
+            self.local.cursor.execute('CREATE INDEX IF NOT EXISTS idx_star_movie_movie ON star_movie (movie_id)')
+            self.local.cursor.execute("CREATE INDEX IF NOT EXISTS idx_movies_date_key ON movies (COALESCE(date, ''), id)")
+            # 旧版本按 (date, id) 建的索引已被上面的表达式索引取代，删除以免每次写入影片时都要维护
+            self.local.cursor.execute('DROP INDEX IF EXISTS idx_movies_date')
+            
             self.local.conn.commit()
+            
+            # 旧数据库首次升级时，从已有的演员和影片数据中建立名字索引
+            self.local.cursor.execute('SELECT COUNT(*) AS count FROM star_names')
+            if self.local.cursor.fetchone()['count'] == 0:
+                self.rebuild_star_index()
         except sqlite3.Error as e:
             print(f"创建表错误: {e}")
     
@@ -130,6 +204,9 @@ class JavbusDatabase:
                 data_json
             ))
             
+            # 更新名字索引
+            self.index_star_name(star_id, star_data.get('name', ''))
+            
             self.local.conn.commit()
             return True
         except sqlite3.Error as e:
@@ -177,6 +254,8 @@ class JavbusDatabase:
                         INSERT OR IGNORE INTO star_movie (star_id, movie_id)
                         VALUES (?, ?)
                         ''', (star_id, movie_id))
+                        # 影片中出现过的演员也加入名字索引，即使没有获取过演员详情
+                        self.index_star_name(star_id, star.get('name', ''))
             
             self.local.conn.commit()
             return True
@@ -224,6 +303,40 @@ class JavbusDatabase:
             print(f"获取影片信息错误: {e}")
             return None
     
+    def get_movies(self, movie_ids, max_age=30):
+        """批量获取影片信息
+        
+        返回(影片字典, 缺失ID列表, 过期ID列表)：影片字典以ID为键，只包含未过期的影片；
+        缺失为数据库中不存在的影片，过期为存在但已超过max_age天的影片，两者都需要重新获取。
+        """
+        self.ensure_connection()
+        movies = {}
+        stale = []
+        # 去重并保持原有顺序
+        ids = list(dict.fromkeys(movie_id for movie_id in movie_ids if movie_id))
+        try:
+            expire_time = int(time.time()) - (max_age * 24 * 60 * 60)
+            
+            for start in range(0, len(ids), self.BULK_CHUNK_SIZE):
+                chunk = ids[start:start + self.BULK_CHUNK_SIZE]
+                placeholders = ','.join('?' * len(chunk))
+                self.local.cursor.execute(f'''
+                SELECT id, last_updated, data FROM movies
+                WHERE id IN ({placeholders})
+                ''', chunk)
+                
+                for row in self.local.cursor.fetchall():
+                    if row['last_updated'] > expire_time:
+                        movies[row['id']] = json.loads(row['data'])
+                    else:
+                        stale.append(row['id'])
+        except sqlite3.Error as e:
+            print(f"批量获取影片信息错误: {e}")
+        
+        stale_set = set(stale)
+        missing = [movie_id for movie_id in ids if movie_id not in movies and movie_id not in stale_set]
+        return movies, missing, stale
+    
     def search_stars(self, keyword, max_age=7):
         """搜索演员，返回匹配的演员列表"""
         self.ensure_connection()
@@ -231,12 +344,16 @@ class JavbusDatabase:
             # 计算过期时间（默认7天）
             expire_time = int(time.time()) - (max_age * 24 * 60 * 60)
             
-            # 使用LIKE进行模糊匹配
+            # 使用LIKE进行模糊匹配，同时通过名字索引匹配全角/半角、假名、罗马字和别名
             search_term = f"%{keyword}%"
+            norm, romaji = query_keys(keyword)
             self.local.cursor.execute('''
             SELECT data FROM stars 
-            WHERE name LIKE ? AND last_updated > ?
-            ''', (search_term, expire_time))
+            WHERE (name LIKE ? OR id IN (
+                SELECT star_id FROM star_names
+                WHERE (? != '' AND norm LIKE ?) OR (? != '' AND romaji LIKE ?)
+            )) AND last_updated > ?
+            ''', (search_term, norm, f"%{norm}%", romaji, f"{romaji}%", expire_time))
             
             results = self.local.cursor.fetchall()
             return [json.loads(row['data']) for row in results]
@@ -244,18 +361,125 @@ class JavbusDatabase:
             print(f"搜索演员错误: {e}")
             return []
     
-    def get_star_movies(self, star_id, max_age=30):
-        """获取演员的所有影片"""
+    def index_star_name(self, star_id, name):
+        """将演员名字及其别名写入名字索引，由调用方负责提交事务"""
+        if not star_id or not name:
+            return
+        for alias, norm, romaji, is_alias in index_entries(name):
+            self.local.cursor.execute('''
+            INSERT OR REPLACE INTO star_names (star_id, name, norm, romaji, is_alias)
+            VALUES (?, ?, ?, ?, ?)
+            ''', (star_id, alias, norm, romaji, is_alias))
+    
+    def rebuild_star_index(self):
+        """从演员表和影片的演员列表重建名字索引，返回索引的演员数量"""
+        self.ensure_connection()
+        try:
+            names = {}
+            self.local.cursor.execute('SELECT data FROM movies')
+            for row in self.local.cursor.fetchall():
+                try:
+                    for star in json.loads(row['data']).get('stars', []):
+                        if star.get('id') and star.get('name'):
+                            names[star['id']] = star['name']
+                except (ValueError, TypeError, AttributeError):
+                    continue
+            
+            # 演员表中的名字优先于影片中的名字
+            self.local.cursor.execute('SELECT id, name FROM stars')
+            for row in self.local.cursor.fetchall():
+                if row['name']:
+                    names[row['id']] = row['name']
+            
+            if not names:
+                return 0
+            
+            print(f"正在建立演员名字索引: {len(names)} 个演员")
+            for star_id, name in names.items():
+                self.index_star_name(star_id, name)
+            
+            self.local.conn.commit()
+            return len(names)
+        except sqlite3.Error as e:
+            print(f"重建演员名字索引错误: {e}")
+            return 0
+    
+    def suggest_stars(self, prefix, limit=10):
+        """按名字前缀联想演员（支持全角/半角、平假名/片假名、罗马字和别名），只查询本地索引"""
+        self.ensure_connection()
+        norm, romaji = query_keys(prefix)
+        if not norm:
+            return []
+        try:
+            # 前缀查询转换为范围查询，以便使用索引
+            upper = chr(0x10FFFF)
+            self.local.cursor.execute('''
+            SELECT n.star_id, n.name,
+                   (SELECT p.name FROM star_names p WHERE p.star_id = n.star_id AND p.is_alias = 0 LIMIT 1) AS main_name
+            FROM star_names n
+            WHERE (n.norm >= ? AND n.norm < ?)
+               OR (? != '' AND n.romaji >= ? AND n.romaji < ?)
+            ORDER BY n.is_alias, length(n.norm)
+            LIMIT ?
+            ''', (norm, norm + upper, romaji, romaji, romaji + upper, limit * 4))
+            
+            results = []
+            seen = set()
+            for row in self.local.cursor.fetchall():
+                if row['star_id'] in seen:
+                    continue
+                seen.add(row['star_id'])
+                results.append({
+                    "id": row['star_id'],
+                    "name": row['main_name'] or row['name'],
+                    "matched": row['name']
+                })
+                if len(results) >= limit:
+                    break
+            return results
+        except sqlite3.Error as e:
+            print(f"联想演员错误: {e}")
+            return []
+    
+    def get_star_movies(self, star_id, max_age=30, page=None, limit=None, sort="date", after=None):
+        """获取演员的影片
+        
+        page为None时返回所有影片；否则按limit条分页（默认与API一致的每页30条）。
+        sort为"date"（发行日期从新到旧）或"id"（番号升序）。
+        after为上一页最后一部影片的排序键（date排序时为(date, id)，id排序时为id），
+        提供时使用键集分页，避免OFFSET扫描前面所有页。
+        """
         self.ensure_connection()
         try:
             # 计算过期时间（默认30天）
             expire_time = int(time.time()) - (max_age * 24 * 60 * 60)
             
-            self.local.cursor.execute('''
+            order_by, keyset = self.STAR_MOVIE_SORTS.get(sort, self.STAR_MOVIE_SORTS["date"])
+            sql = '''
             SELECT m.data FROM movies m
             JOIN star_movie sm ON m.id = sm.movie_id
             WHERE sm.star_id = ? AND m.last_updated > ?
-            ''', (star_id, expire_time))
+            '''
+            params = [star_id, expire_time]
+            
+            if page is not None:
+                limit = limit or self.PAGE_SIZE
+                if after:
+                    sql += f" AND {keyset}"
+                    if sort == "id":
+                        params.append(after)
+                    else:
+                        params.extend([after[0], after[0], after[1]])
+                sql += f" ORDER BY {order_by} LIMIT ?"
+                params.append(limit)
+                if not after and page > 1:
+                    # 没有上一页的排序键时（如直接跳页），退回到OFFSET分页
+                    sql += " OFFSET ?"
+                    params.append((page - 1) * limit)
+            else:
+                sql += f" ORDER BY {order_by}"
+            
+            self.local.cursor.execute(sql, params)
             
             results = self.local.cursor.fetchall()
             return [json.loads(row['data']) for row in results]
@@ -263,6 +487,51 @@ class JavbusDatabase:
             print(f"获取演员影片错误: {e}")
             return []
     
+    def count_star_movies(self, star_id, max_age=30):
+        """获取数据库中演员未过期的影片数量"""
+        self.ensure_connection()
+        try:
+            expire_time = int(time.time()) - (max_age * 24 * 60 * 60)
+            self.local.cursor.execute('''
+            SELECT COUNT(*) AS count FROM movies m
+            JOIN star_movie sm ON m.id = sm.movie_id
+            WHERE sm.star_id = ? AND m.last_updated > ?
+            ''', (star_id, expire_time))
+            result = self.local.cursor.fetchone()
+            return result['count'] if result else 0
+        except sqlite3.Error as e:
+            print(f"获取演员影片数量错误: {e}")
+            return 0
+    
+    def get_star_movies_page(self, star_id, page=1, limit=None, sort="date", after=None, max_age=30):
+        """按页获取演员的影片，返回(影片列表, 分页信息)，分页信息的格式与远程API一致
+        
+        分页信息中的nextCursor为本页最后一部影片的排序键，可作为下一页的after参数。
+        数据库中没有该演员的影片时返回([], None)。
+        """
+        limit = limit or self.PAGE_SIZE
+        total = self.count_star_movies(star_id, max_age)
+        if total == 0:
+            return [], None
+        
+        movies = self.get_star_movies(star_id, max_age, page=page, limit=limit, sort=sort, after=after)
+        total_pages = (total + limit - 1) // limit
+        has_next = page < total_pages
+        
+        next_cursor = None
+        if movies:
+            last = movies[-1]
+            next_cursor = last.get('id') if sort == "id" else [last.get('date') or '', last.get('id')]
+        
+        pagination = {
+            "currentPage": page,
+            "hasNextPage": has_next,
+            "nextPage": page + 1 if has_next else None,
+            "pages": list(range(1, total_pages + 1)),
+            "nextCursor": next_cursor
+        }
+        return movies, pagination
+    
     def save_search_history(self, keyword):
         """保存搜索历史"""
         self.ensure_connection()
@@ -366,4 +635,276 @@ class JavbusDatabase:
             return True, len(movie_ids)
         except sqlite3.Error as e:
             print(f"清除演员数据错误: {e}")
-            return False, 0 
\ No newline at end of file
+            return False, 0
+
+    def save_image_ref(self, entity_type, entity_id, role, idx, digest, ext, size, width=None, height=None):
+        """登记图片索引，同一位置已有的图片会被替换"""
+        self.ensure_connection()
+        try:
+            now = int(time.time())
+            self.local.cursor.execute('''
+            INSERT OR REPLACE INTO image_index
+            (entity_type, entity_id, role, idx, hash, ext, size, width, height, last_updated, last_access)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (entity_type, entity_id, role, idx, digest, ext, size, width, height, now, now))
+            
+            self.local.conn.commit()
+            return True
+        except sqlite3.Error as e:
+            print(f"保存图片索引错误: {e}")
+            return False
+    
+    def get_image_ref(self, entity_type, entity_id, role, idx=0):
+        """获取一张图片的索引记录，没有时返回None"""
+        self.ensure_connection()
+        try:
+            self.local.cursor.execute('''
+            SELECT hash, ext, size, width, height FROM image_index
+            WHERE entity_type = ? AND entity_id = ? AND role = ? AND idx = ?
+            ''', (entity_type, entity_id, role, idx))
+            
+            result = self.local.cursor.fetchone()
+            return dict(result) if result else None
+        except sqlite3.Error as e:
+            print(f"获取图片索引错误: {e}")
+            return None
+    
+    def get_image_refs(self, entity_type, entity_id):
+        """获取一个实体的全部图片索引，按角色和序号排序"""
+        self.ensure_connection()
+        try:
+            self.local.cursor.execute('''
+            SELECT role, idx, hash, ext, size, width, height FROM image_index
+            WHERE entity_type = ? AND entity_id = ?
+            ORDER BY role, idx
+            ''', (entity_type, entity_id))
+            
+            return [dict(row) for row in self.local.cursor.fetchall()]
+        except sqlite3.Error as e:
+            print(f"获取图片索引错误: {e}")
+            return []
+    
+    def count_entity_images(self, entity_type, entity_ids):
+        """批量统计多个实体已登记的图片数量，返回{实体ID: 数量}，没有图片的实体不在结果中"""
+        self.ensure_connection()
+        counts = {}
+        ids = list(dict.fromkeys(entity_id for entity_id in entity_ids if entity_id))
+        try:
+            for start in range(0, len(ids), self.BULK_CHUNK_SIZE):
+                chunk = ids[start:start + self.BULK_CHUNK_SIZE]
+                placeholders = ','.join('?' * len(chunk))
+                self.local.cursor.execute(f'''
+                SELECT entity_id, COUNT(*) AS count FROM image_index
+                WHERE entity_type = ? AND entity_id IN ({placeholders})
+                GROUP BY entity_id
+                ''', [entity_type] + chunk)
+                
+                for row in self.local.cursor.fetchall():
+                    counts[row['entity_id']] = row['count']
+        except sqlite3.Error as e:
+            print(f"统计图片数量错误: {e}")
+        return counts
+    
+    def delete_image_ref(self, entity_type, entity_id, role, idx=0):
+        """删除一张图片的索引记录"""
+        self.ensure_connection()
+        try:
+            self.local.cursor.execute('''
+            DELETE FROM image_index
+            WHERE entity_type = ? AND entity_id = ? AND role = ? AND idx = ?
+            ''', (entity_type, entity_id, role, idx))
+            
+            self.local.conn.commit()
+            return True
+        except sqlite3.Error as e:
+            print(f"删除图片索引错误: {e}")
+            return False
+    
+    def touch_image_refs(self, accesses):
+        """批量记录图片的最近访问时间，参数为[(访问时间, 实体类型, 实体ID, 角色, 序号)]"""
+        self.ensure_connection()
+        try:
+            self.local.cursor.executemany('''
+            UPDATE image_index SET last_access = ?
+            WHERE entity_type = ? AND entity_id = ? AND role = ? AND idx = ?
+            ''', accesses)
+            
+            self.local.conn.commit()
+            return True
+        except sqlite3.Error as e:
+            print(f"记录图片访问时间错误: {e}")
+            return False
+    
+    def get_image_blobs(self):
+        """获取所有图片文件及其引用情况，每个哈希一行
+        
+        kind为0表示只被预览图引用，1表示被封面或头像引用；
+        movie_ids为引用该图片的影片ID（逗号分隔），last_access取各引用中最近的访问时间。
+        """
+        self.ensure_connection()
+        try:
+            self.local.cursor.execute('''
+            SELECT hash, ext, MAX(size) AS size,
+                   MAX(CASE WHEN role = 'sample' THEN 0 ELSE 1 END) AS kind,
+                   MAX(COALESCE(last_access, last_updated, 0)) AS last_access,
+                   GROUP_CONCAT(CASE WHEN entity_type = 'movie' THEN entity_id END) AS movie_ids
+            FROM image_index
+            GROUP BY hash
+            ''')
+            
+            return [dict(row) for row in self.local.cursor.fetchall()]
+        except sqlite3.Error as e:
+            print(f"获取图片文件列表错误: {e}")
+            return []
+    
+    def get_image_usage(self):
+        """统计图片文件占用的总字节数，同一哈希只计算一次"""
+        self.ensure_connection()
+        try:
+            self.local.cursor.execute('''
+            SELECT COALESCE(SUM(size), 0) AS total FROM (
+                SELECT MAX(size) AS size FROM image_index GROUP BY hash
+            )
+            ''')
+            return self.local.cursor.fetchone()['total']
+        except sqlite3.Error as e:
+            print(f"统计图片占用空间错误: {e}")
+            return 0
+    
+    def delete_image_blob_refs(self, digest):
+        """删除引用某个图片文件的全部索引记录"""
+        self.ensure_connection()
+        try:
+            self.local.cursor.execute('DELETE FROM image_index WHERE hash = ?', (digest,))
+            self.local.conn.commit()
+            return True
+        except sqlite3.Error as e:
+            print(f"删除图片索引错误: {e}")
+            return False
+
+    def enqueue_downloads(self, movie_ids, full_gallery=True):
+        """将影片加入批量下载队列，已在队列中的影片重新开始，返回加入的数量"""
+        self.ensure_connection()
+        ids = list(dict.fromkeys(movie_id for movie_id in movie_ids if movie_id))
+        try:
+            now = int(time.time())
+            self.local.cursor.executemany('''
+            INSERT OR REPLACE INTO download_queue (movie_id, full_gallery, status, attempts, error, added, last_updated)
+            VALUES (?, ?, 'pending', 0, '', ?, ?)
+            ''', [(movie_id, 1 if full_gallery else 0, now, now) for movie_id in ids])
+            
+            self.local.conn.commit()
+            return len(ids)
+        except sqlite3.Error as e:
+            print(f"加入下载队列错误: {e}")
+            return 0
+    
+    def get_downloads(self):
+        """获取下载队列中的全部影片，按加入顺序排列"""
+        self.ensure_connection()
+        try:
+            self.local.cursor.execute('''
+            SELECT movie_id, full_gallery, status, attempts, error FROM download_queue
+            ORDER BY added, rowid
+            ''')
+            
+            return [dict(row) for row in self.local.cursor.fetchall()]
+        except sqlite3.Error as e:
+            print(f"获取下载队列错误: {e}")
+            return []
+    
+    def update_download(self, movie_id, status, attempts=0, error=""):
+        """更新下载队列中一部影片的状态"""
+        self.ensure_connection()
+        try:
+            self.local.cursor.execute('''
+            UPDATE download_queue SET status = ?, attempts = ?, error = ?, last_updated = ?
+            WHERE movie_id = ?
+            ''', (status, attempts, error, int(time.time()), movie_id))
+            
+            self.local.conn.commit()
+            return True
+        except sqlite3.Error as e:
+            print(f"更新下载队列错误: {e}")
+            return False
+    
+    def remove_downloads(self, statuses):
+        """从下载队列中删除指定状态的影片，返回删除的数量"""
+        self.ensure_connection()
+        try:
+            placeholders = ','.join('?' * len(statuses))
+            self.local.cursor.execute(f'DELETE FROM download_queue WHERE status IN ({placeholders})', list(statuses))
+            
+            self.local.conn.commit()
+            return self.local.cursor.rowcount
+        except sqlite3.Error as e:
+            print(f"清理下载队列错误: {e}")
+            return 0
+
+    def enable_wal(self):
+        """启用WAL模式，允许多个爬取进程同时读写同一个数据库"""
+        self.ensure_connection()
+        try:
+            self.local.cursor.execute('PRAGMA journal_mode=WAL')
+            return True
+        except sqlite3.Error as e:
+            print(f"启用WAL模式错误: {e}")
+            return False
+
+    def merge_from(self, shard_path):
+        """将另一个数据库分片合并到当前数据库，同一记录保留较新的版本"""
+        self.ensure_connection()
+        counts = {"stars": 0, "movies": 0, "star_movie": 0}
+        try:
+            self.local.cursor.execute('ATTACH DATABASE ? AS shard', (shard_path,))
+        except sqlite3.Error as e:
+            print(f"打开数据库分片错误: {e}")
+            return False, counts
+
+        try:
+            # 合并演员表
+            self.local.cursor.execute('''
+            INSERT OR REPLACE INTO stars
+            (id, name, avatar, birthday, age, height, bust, waistline, hipline, birthplace, hobby, last_updated, data)
+            SELECT s.id, s.name, s.avatar, s.birthday, s.age, s.height, s.bust, s.waistline, s.hipline,
+                   s.birthplace, s.hobby, s.last_updated, s.data
+            FROM shard.stars s LEFT JOIN stars m ON m.id = s.id
+            WHERE m.id IS NULL OR s.last_updated > m.last_updated
+            ''')
+            counts["stars"] = self.local.cursor.rowcount
+
+            # 合并影片表
+            self.local.cursor.execute('''
+            INSERT OR REPLACE INTO movies
+            (id, title, cover, date, publisher, last_updated, data)
+            SELECT s.id, s.title, s.cover, s.date, s.publisher, s.last_updated, s.data
+            FROM shard.movies s LEFT JOIN movies m ON m.id = s.id
+            WHERE m.id IS NULL OR s.last_updated > m.last_updated
+            ''')
+            counts["movies"] = self.local.cursor.rowcount
+
+            # 合并演员-影片关联
+            self.local.cursor.execute('''
+            INSERT OR IGNORE INTO star_movie (star_id, movie_id)
+            SELECT star_id, movie_id FROM shard.star_movie
+            ''')
+            counts["star_movie"] = self.local.cursor.rowcount
+
+            # 合并演员名字索引（旧版本生成的分片可能没有该表）
+            self.local.cursor.execute('''
+            SELECT name FROM shard.sqlite_master WHERE type = 'table' AND name = 'star_names'
+            ''')
+            if self.local.cursor.fetchone():
+                self.local.cursor.execute('''
+                INSERT OR IGNORE INTO star_names (star_id, name, norm, romaji, is_alias)
+                SELECT star_id, name, norm, romaji, is_alias FROM shard.star_names
+                ''')
+
+            self.local.conn.commit()
+            return True, counts
+        except sqlite3.Error as e:
+            self.local.conn.rollback()
+            print(f"合并数据库分片错误: {e}")
+            return False, counts
+        finally:
+            self.local.cursor.execute('DETACH DATABASE shard')
\ No newline at end of file
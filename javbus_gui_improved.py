@@ -6,7 +6,10 @@ import time
 import requests
 import shutil
 from datetime import datetime, timedelta
+from collections import OrderedDict
 import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from PIL import Image, ImageQt
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                             QLabel, QLineEdit, QPushButton, QListWidget, QListWidgetItem, QGridLayout, 
@@ -14,13 +17,18 @@ from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QH
                             QMessageBox, QSplitter, QProgressBar, QMenu, QTextBrowser,
                             QDialog, QListView, QStackedWidget, QAction, QMenuBar, QAbstractItemView,
                             QGroupBox, QFrame, QSizePolicy, QComboBox, QFileDialog, QTabWidget, 
-                            QCheckBox, QInputDialog, QStatusBar, QScrollArea, QSpinBox)
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QPoint, QEvent, QTimer, QObject
-from PyQt5.QtGui import QPixmap, QImage, QCursor, QTextCursor, QIcon, QColor
+                            QCheckBox, QInputDialog, QStatusBar, QScrollArea, QSpinBox, QCompleter, QTableView)
+from PyQt5.QtCore import (Qt, pyqtSignal, QPoint, QEvent, QTimer, QObject, QStringListModel,
+                          QAbstractTableModel, QModelIndex, QSortFilterProxyModel, QSize)
+from PyQt5.QtGui import QPixmap, QImage, QCursor, QTextCursor, QIcon, QColor, QImageReader
 import pyperclip  # 用于复制文本到剪贴板
 import sqlite3
 import queue
 from javbus_db import JavbusDatabase
+from task_scheduler import TaskScheduler, BackgroundTask
+from thumbnails import SIZES as THUMBNAIL_SIZES, get_generator as get_thumbnail_generator
+from image_store import ImageStore
+from image_cache import ImageCacheManager
 from movieinfo import FanzaScraper  # 导入FanzaScraper类
 import tkinter as tk
 from tkinter import messagebox
@@ -36,7 +44,19 @@ def load_config():
     config = {
         "api_url": DEFAULT_API_URL,
         "watch_url_prefix": DEFAULT_WATCH_URL_PREFIX,
-        "fanza_mappings": {}
+        "fanza_mappings": {},
+        "prefetch_pages": True,  # 加载完一页后在后台预取下一页
+        "prefetch_prev_page": False,  # 同时预取上一页
+        "page_cache_size": 8,  # 内存中最多缓存的影片列表页数
+        "prefetch_cover_limit": 30,  # 每次预取最多下载的封面缩略图数量
+        "show_thumbnails": False,  # 影片列表中显示封面缩略图
+        "thumbnail_cache_size": 300,  # 内存中最多保留的列表缩略图数量
+        "preview_cache_size": 40,  # 内存中最多保留的已缩放预览图数量
+        "lazy_gallery": True,  # 选择影片时只下载封面，预览图在翻到时再下载（同时预取下一张）
+        "image_cache_budget_mb": 0,  # 图片仓库的磁盘预算（MB），超出时淘汰最久未访问的图片，0表示不限制
+        "image_cache_interval": 300,  # 检查图片仓库大小的间隔（秒）
+        "batch_download_workers": 2,  # 批量下载时同时下载的影片数量
+        "batch_download_rate_kb": 0  # 批量下载的限速（KB/秒），0表示不限速
     }
     
     try:
@@ -880,16 +900,22 @@ class OptionsDialog(QDialog):
             QApplication.restoreOverrideCursor()
             QMessageBox.critical(self, "错误", f"连接测试失败: {str(e)}")
 
-class StarSearchThread(QThread):
-    """用于在后台搜索演员的线程"""
+class StarSearchTask(BackgroundTask):
+    """在后台搜索演员的任务"""
     search_complete = pyqtSignal(list)
+    search_partial = pyqtSignal(list)  # 参数：新找到的演员列表，用于逐步显示结果
     search_error = pyqtSignal(str)
     
-    def __init__(self, api_base_url, keyword, db):
+    MAX_MOVIES = 30  # 最多从前30部影片中提取演员
+    MAX_DETAIL_WORKERS = 6  # 并发获取影片详情的线程数
+    REQUEST_TIMEOUT = 10  # 单个请求的超时时间（秒）
+    
+    def __init__(self, api_base_url, keyword, db, max_stars=10):
         super().__init__()
         self.api_base_url = api_base_url
         self.keyword = keyword
         self.db = db
+        self.max_stars = max_stars  # 找到足够多的匹配演员后提前结束
         
     def run(self):
         try:
@@ -900,12 +926,21 @@ class StarSearchThread(QThread):
                 self.search_complete.emit(db_stars)
                 return
             
+            # 其次使用名字索引查找在影片中出现过、但未保存详情的演员
+            indexed_stars = self.db.suggest_stars(self.keyword, limit=self.max_stars or 10)
+            if indexed_stars:
+                print(f"从名字索引中找到 {len(indexed_stars)} 个匹配的演员")
+                self.search_complete.emit([
+                    {"id": star["id"], "name": star["name"]} for star in indexed_stars
+                ])
+                return
+            
             # 如果数据库中没有，则使用演员搜索API
             # 由于API可能没有直接搜索演员的端点，使用带magnet=all参数搜索影片
             response = requests.get(f"{self.api_base_url}/movies/search", params={
                 "keyword": self.keyword,
                 "page": "1",
-            })
+            }, timeout=self.REQUEST_TIMEOUT)
             
             if response.status_code != 200:
                 self.search_error.emit(f"API请求失败: {response.status_code}")
@@ -920,7 +955,7 @@ class StarSearchThread(QThread):
                     # 尝试直接查询演员端点
                     response = requests.get(f"{self.api_base_url}/stars", params={
                         "keyword": self.keyword,
-                    })
+                    }, timeout=self.REQUEST_TIMEOUT)
                     
                     if response.status_code == 200:
                         stars_data = response.json()
@@ -937,223 +972,1361 @@ class StarSearchThread(QThread):
                     print(f"尝试获取演员列表失败: {str(e)}")
             
             # 从影片中提取演员信息
-            # 获取前30部影片中的详细信息来提取演员
-            all_stars = []
-            unique_star_ids = set()
+            self.matched_stars = []
+            self.matched_star_ids = set()
             
-            for movie in movies[:30]:
-                movie_id = movie.get("id")
-                if movie_id:
-                    try:
-                        movie_response = requests.get(f"{self.api_base_url}/movies/{movie_id}")
-                        if movie_response.status_code == 200:
-                            movie_data = movie_response.json()
-                            stars = movie_data.get("stars", [])
-                            
-                            for star in stars:
-                                star_id = star.get("id")
-                                if star_id and star_id not in unique_star_ids:
-                                    unique_star_ids.add(star_id)
-                                    # 只保存基本信息，不获取详细资料
-                                    simplified_star = {
-                                        "id": star_id,
-                                        "name": star.get("name", "未知")
-                                    }
-                                    all_stars.append(simplified_star)
-                    except Exception as e:
-                        print(f"获取影片 {movie_id} 详情失败: {str(e)}")
+            movie_ids = [movie.get("id") for movie in movies[:self.MAX_MOVIES] if movie.get("id")]
             
-            # 只保留名称中包含关键词的演员
-            keyword_lower = self.keyword.lower()
-            filtered_stars = [
-                star for star in all_stars 
-                if keyword_lower in star.get("name", "").lower()
-            ]
+            # 第一步：本地已缓存的影片直接从数据库提取演员，不发起网络请求
+            remote_ids = []
+            for movie_id in movie_ids:
+                movie_data = self.db.get_movie(movie_id)
+                if movie_data:
+                    self.collect_stars(movie_data)
+                else:
+                    remote_ids.append(movie_id)
+            
+            # 第二步：剩余影片并发获取详情，找到足够多的演员后取消未开始的请求
+            if remote_ids and not self.has_enough_stars():
+                executor = ThreadPoolExecutor(max_workers=self.MAX_DETAIL_WORKERS)
+                futures = [executor.submit(self.fetch_movie_detail, movie_id) for movie_id in remote_ids]
+                try:
+                    for future in as_completed(futures):
+                        movie_data = future.result()
+                        if movie_data:
+                            # 顺便保存到数据库，下次搜索可直接使用
+                            self.db.save_movie(movie_data)
+                            self.collect_stars(movie_data)
+                        
+                        if self.has_enough_stars() or self.is_cancelled():
+                            break
+                finally:
+                    for future in futures:
+                        future.cancel()
+                    executor.shutdown(wait=False)
             
             # 返回结果
-            self.search_complete.emit(filtered_stars)
+            self.search_complete.emit(self.matched_stars)
             
         except Exception as e:
             self.search_error.emit(f"搜索失败: {str(e)}")
+    
+    def fetch_movie_detail(self, movie_id):
+        """获取影片详情，在线程池中执行，不访问数据库"""
+        if self.is_cancelled():
+            return None
+        try:
+            movie_response = requests.get(f"{self.api_base_url}/movies/{movie_id}", timeout=self.REQUEST_TIMEOUT)
+            if movie_response.status_code == 200:
+                return movie_response.json()
+        except Exception as e:
+            print(f"获取影片 {movie_id} 详情失败: {str(e)}")
+        return None
+    
+    def collect_stars(self, movie_data):
+        """从影片数据中提取名称包含关键词的演员，并立即发送新找到的演员"""
+        keyword_lower = self.keyword.lower()
+        new_stars = []
+        for star in movie_data.get("stars", []):
+            star_id = star.get("id")
+            star_name = star.get("name", "未知")
+            if star_id and star_id not in self.matched_star_ids and keyword_lower in star_name.lower():
+                self.matched_star_ids.add(star_id)
+                # 只保存基本信息，不获取详细资料
+                new_stars.append({"id": star_id, "name": star_name})
+        
+        if new_stars:
+            self.matched_stars.extend(new_stars)
+            self.search_partial.emit(new_stars)
+    
+    def has_enough_stars(self):
+        """是否已找到足够多的匹配演员"""
+        return self.max_stars and len(self.matched_stars) >= self.max_stars
+
+def fetch_movie_page(api_base_url, db, mode, target, page, magnet_only=True, star_name="", after=None):
+    """获取一页影片列表，返回(影片列表, 分页信息)，请求失败时抛出异常
+    
+    mode为"star"（演员参演的影片，优先使用数据库）、"title"（片名包含演员名称的影片）
+    或"keyword"（按关键字搜索影片）。after为数据库键集分页的排序键。
+    """
+    # 先从数据库中获取演员的影片，与API一样按页返回
+    if mode == "star":
+        db_movies, pagination = db.get_star_movies_page(target, page, after=after)
+        if pagination:
+            print(f"从数据库中加载演员影片第 {page}/{len(pagination['pages'])} 页，共 {len(db_movies)} 部")
+            return db_movies, pagination
+    
+    # 如果数据库中没有或者是按名称搜索，则从API获取
+    if mode == "star":
+        # 搜索演员参演的所有影片
+        params = {
+            "filterType": "star",
+            "filterValue": target,
+            "page": str(page)
+        }
+        url = f"{api_base_url}/movies"
+    else:
+        # 搜索影片名称中包含演员名称或关键字的影片
+        params = {
+            "keyword": star_name if mode == "title" else target,
+            "page": str(page)
+        }
+        url = f"{api_base_url}/movies/search"
+    
+    # 只有当需要包含无磁力影片时才添加magnet参数
+    if not magnet_only:
+        params["magnet"] = "all"
+    response = requests.get(url, params=params, timeout=15)
+    
+    if response.status_code != 200:
+        raise Exception(f"HTTP {response.status_code}")
+    
+    data = response.json()
+    movies = data.get("movies", [])
+    pagination = data.get("pagination", {})
+    
+    if mode == "title":
+        # 按名称搜索时直接使用API返回的结果，不获取每个影片的详细信息
+        # 更新分页信息
+        pagination["currentPage"] = page
+        pagination["hasNextPage"] = len(movies) >= 30  # 假设每页30个结果
+        pagination["nextPage"] = page + 1 if pagination["hasNextPage"] else None
+    elif mode == "star":
+        # 一次查询检查数据库中是否已有这些影片
+        db_movies, _, _ = db.get_movies([movie.get("id") for movie in movies])
+        for i, movie in enumerate(movies):
+            db_movie = db_movies.get(movie.get("id"))
+            if db_movie:
+                # 如果数据库中有，用数据库中的数据替换
+                movies[i] = db_movie
+            # 不再主动获取详情，减少API请求
+    
+    return movies, pagination
 
-class MovieLoadThread(QThread):
-    """用于在后台加载影片的线程"""
+class MovieLoadTask(BackgroundTask):
+    """在后台加载一页影片列表的任务"""
     load_complete = pyqtSignal(list, dict)
     load_error = pyqtSignal(str)
     
-    def __init__(self, api_base_url, star_id, page, db, star_name="", title_search=False, magnet_only=True):
+    def __init__(self, api_base_url, db, mode, target, page, magnet_only=True, star_name="", after=None):
         super().__init__()
         self.api_base_url = api_base_url
-        self.star_id = star_id
+        self.db = db
+        self.mode = mode  # 与fetch_movie_page相同："star"、"title"或"keyword"
+        self.target = target
         self.page = page
+        self.magnet_only = magnet_only
         self.star_name = star_name
-        self.title_search = title_search
+        self.after = after  # 上一页最后一部影片的排序键，用于数据库键集分页
+        
+    def run(self):
+        try:
+            movies, pagination = fetch_movie_page(self.api_base_url, self.db, self.mode, self.target, self.page,
+                                                  self.magnet_only, self.star_name, self.after)
+            if not self.is_cancelled():
+                self.load_complete.emit(movies, pagination)
+            
+        except Exception as e:
+            self.load_error.emit(f"获取影片列表失败: {str(e)}")
+
+class PageCache:
+    """影片列表页的内存缓存，按最近使用淘汰，键为(模式, 目标, 页码, 是否只含磁力)"""
+    
+    def __init__(self, max_pages=8):
+        self.max_pages = max_pages
+        self.pages = OrderedDict()
+    
+    def get(self, key):
+        """获取缓存的页面，返回(影片列表, 分页信息)或None"""
+        if key not in self.pages:
+            return None
+        self.pages.move_to_end(key)
+        return self.pages[key]
+    
+    def put(self, key, movies, pagination):
+        """缓存一页影片列表，超过容量时淘汰最久未使用的页面"""
+        self.pages[key] = (movies, pagination)
+        self.pages.move_to_end(key)
+        while len(self.pages) > self.max_pages:
+            self.pages.popitem(last=False)
+    
+    def __contains__(self, key):
+        return key in self.pages
+    
+    def clear(self):
+        self.pages.clear()
+
+class MovieTableModel(QAbstractTableModel):
+    """影片列表的数据模型
+    
+    每行只保存(影片编号, 影片名称, 发行日期, 封面地址)四个字符串，不为单元格创建控件；
+    视图只为可见的行请求数据，上万行的列表也能立即显示。
+    设置了缩略图加载器时，影片编号列显示封面缩略图，同样只为可见的行加载。
+    """
+    HEADERS = ["影片编号", "影片名称", "发行日期"]
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []
+        self.row_of = {}  # 影片编号 -> 行号，缩略图就绪时据此刷新对应的行
+        self.thumbnail_loader = None
+    
+    def set_movies(self, movies):
+        """用影片列表替换全部数据"""
+        if self.thumbnail_loader:
+            # 旧列表中尚未生成的缩略图不再需要
+            self.thumbnail_loader.cancel_pending()
+        self.beginResetModel()
+        self.rows = []
+        for movie in movies:
+            movie_id = movie.get("id", "")
+            # 设置影片名称 - 如果标题以影片编号开头，则去除这部分
+            title = movie.get("title", "")
+            if movie_id and title.startswith(movie_id):
+                title = title[len(movie_id):].strip()
+            self.rows.append((movie_id, title, movie.get("date", ""), movie.get("img", "")))
+        self.row_of = {row[0]: i for i, row in enumerate(self.rows)}
+        self.endResetModel()
+    
+    def set_thumbnail_loader(self, loader):
+        """设置缩略图加载器，为None时不显示缩略图"""
+        if self.thumbnail_loader:
+            self.thumbnail_loader.thumbnail_ready.disconnect(self.on_thumbnail_ready)
+        self.thumbnail_loader = loader
+        if loader:
+            loader.thumbnail_ready.connect(self.on_thumbnail_ready)
+        if self.rows:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self.rows) - 1, 0), [Qt.DecorationRole])
+    
+    def on_thumbnail_ready(self, movie_id):
+        row = self.row_of.get(movie_id)
+        if row is not None:
+            index = self.index(row, 0)
+            self.dataChanged.emit(index, index, [Qt.DecorationRole])
+    
+    def movie_ids(self):
+        """按加载顺序返回所有影片编号"""
+        return [row[0] for row in self.rows if row[0]]
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self.rows[index.row()]
+        if role == Qt.DisplayRole or (role == Qt.ToolTipRole and index.column() == 1):
+            return row[index.column()]
+        if role == Qt.DecorationRole and index.column() == 0 and self.thumbnail_loader:
+            return self.thumbnail_loader.get(row[0], row[3])
+        return None
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+class ThumbnailTask(BackgroundTask):
+    """在后台获取一部影片的列表缩略图
+    
+    从图片仓库中的封面取得"list"尺寸的缩略图，缩略图由缩略图生成器在进程池中生成并保存在磁盘上；
+    仓库中没有封面时先下载入库。
+    """
+    thumbnail_ready = pyqtSignal(str, QImage)  # 参数：(影片ID, 缩略图)
+    
+    def __init__(self, movie_id, cover_url, image_store):
+        super().__init__()
+        self.movie_id = movie_id
+        self.cover_url = cover_url
+        self.image_store = image_store
+        
+    def run(self):
+        cover_path = self.find_cover()
+        if not cover_path or self.is_cancelled():
+            return
+        
+        thumb_path = get_thumbnail_generator().get(cover_path, "list")
+        image = QImage(thumb_path) if thumb_path else QImage()
+        if image.isNull():
+            print(f"生成封面缩略图失败: {cover_path}")
+            return
+        
+        if not self.is_cancelled():
+            self.thumbnail_ready.emit(self.movie_id, image)
+    
+    def find_cover(self):
+        """查找已入库的封面，没有则下载入库，返回文件路径或None"""
+        cover_path = stored_cover(self.image_store, self.movie_id)
+        if cover_path or not self.cover_url:
+            return cover_path
+        try:
+            return download_cover(self.image_store, self.movie_id, self.cover_url)
+        except Exception as e:
+            print(f"下载封面 {self.movie_id} 失败: {str(e)}")
+            return None
+
+class ThumbnailLoader(QObject):
+    """影片列表缩略图的加载器
+    
+    界面请求缩略图时，内存中没有则在调度器的后台线程池中排队生成；
+    后请求的（即当前可见的）行先处理。内存中按最近使用保留有限数量的QPixmap。
+    """
+    thumbnail_ready = pyqtSignal(str)  # 参数：影片ID
+    
+    THUMB_WIDTH, THUMB_HEIGHT = THUMBNAIL_SIZES["list"]
+    GROUP = "thumbnails"
+    
+    def __init__(self, scheduler, image_store, max_pixmaps=300, parent=None):
+        super().__init__(parent)
+        self.scheduler = scheduler
+        self.image_store = image_store
+        self.max_pixmaps = max_pixmaps
+        self.pixmaps = OrderedDict()  # 影片ID -> QPixmap
+        self.pending = set()  # 已排队或正在生成的影片
+        self.failed = set()  # 无法生成缩略图的影片，避免每次重绘都重新排队
+        self.sequence = 0
+    
+    def get(self, movie_id, cover_url):
+        """返回缓存的缩略图；没有则安排后台生成并返回None"""
+        pixmap = self.pixmaps.get(movie_id)
+        if pixmap is not None:
+            self.pixmaps.move_to_end(movie_id)
+            return pixmap
+        if movie_id and movie_id not in self.pending and movie_id not in self.failed:
+            self.pending.add(movie_id)
+            self.sequence += 1
+            task = ThumbnailTask(movie_id, cover_url, self.image_store)
+            task.thumbnail_ready.connect(self.on_thumbnail_ready)
+            task.finished.connect(self.on_task_finished)
+            self.scheduler.submit(task, self.sequence, self.GROUP, exclusive=False, background=True)
+        return None
+    
+    def on_thumbnail_ready(self, movie_id, image):
+        self.pixmaps[movie_id] = QPixmap.fromImage(image)
+        self.pixmaps.move_to_end(movie_id)
+        while len(self.pixmaps) > self.max_pixmaps:
+            self.pixmaps.popitem(last=False)
+        self.thumbnail_ready.emit(movie_id)
+    
+    def on_task_finished(self):
+        task = self.sender()
+        if task is None or task.is_cancelled():
+            return
+        self.pending.discard(task.movie_id)
+        if task.movie_id not in self.pixmaps:
+            self.failed.add(task.movie_id)
+    
+    def cancel_pending(self):
+        """取消尚未完成的缩略图任务"""
+        self.scheduler.cancel_group(self.GROUP)
+        self.pending.clear()
+        self.failed.clear()
+
+class PreviewDecodeTask(BackgroundTask):
+    """在后台按预览区域的尺寸解码一张图片"""
+    image_decoded = pyqtSignal(str, QImage)  # 参数：(图片路径, 已缩放的图片)
+    
+    def __init__(self, path, width, height):
+        super().__init__()
+        self.path = path
+        self.width = width
+        self.height = height
+        
+    def run(self):
+        # 优先使用缩略图生成器保存的预览尺寸图片，生成失败时直接解码原图
+        reader = QImageReader(get_thumbnail_generator().get(self.path, "preview") or self.path)
+        size = reader.size()
+        if size.isValid() and (size.width() > self.width or size.height() > self.height):
+            # 解码时直接缩放到目标尺寸（JPEG可以跳过大部分像素），保持宽高比例
+            reader.setScaledSize(size.scaled(self.width, self.height, Qt.KeepAspectRatio))
+        image = reader.read()
+        if image.isNull():
+            print(f"解码图片 {self.path} 失败: {reader.errorString()}")
+            return
+        if image.width() > self.width or image.height() > self.height:
+            image = image.scaled(self.width, self.height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        if not self.is_cancelled():
+            self.image_decoded.emit(self.path, image)
+
+class PreviewImageLoader(QObject):
+    """预览区图片的加载器：在后台解码并缩放，内存中按最近使用保留有限数量的已缩放图片"""
+    image_ready = pyqtSignal(str)  # 参数：图片路径
+    
+    GROUP = "preview_decode"
+    
+    def __init__(self, scheduler, width, height, max_images=40, parent=None):
+        super().__init__(parent)
+        self.scheduler = scheduler
+        self.width = width
+        self.height = height
+        self.max_images = max_images
+        self.pixmaps = OrderedDict()  # 图片路径 -> 已缩放的QPixmap
+        self.pending = set()
+    
+    def get(self, path):
+        """返回已缩放的图片，没有时返回None"""
+        pixmap = self.pixmaps.get(path)
+        if pixmap is not None:
+            self.pixmaps.move_to_end(path)
+        return pixmap
+    
+    def request(self, path, priority=TaskScheduler.PRIORITY_NORMAL):
+        """安排后台解码，已缓存或正在解码的图片直接跳过"""
+        if path in self.pixmaps or path in self.pending:
+            return
+        self.pending.add(path)
+        task = PreviewDecodeTask(path, self.width, self.height)
+        task.image_decoded.connect(self.on_image_decoded)
+        task.finished.connect(self.on_task_finished)
+        self.scheduler.submit(task, priority, self.GROUP, exclusive=False)
+    
+    def on_image_decoded(self, path, image):
+        self.pixmaps[path] = QPixmap.fromImage(image)
+        self.pixmaps.move_to_end(path)
+        while len(self.pixmaps) > self.max_images:
+            self.pixmaps.popitem(last=False)
+        self.image_ready.emit(path)
+    
+    def on_task_finished(self):
+        task = self.sender()
+        if task is not None:
+            self.pending.discard(task.path)
+    
+    def cancel_pending(self):
+        """取消尚未完成的解码任务，已缓存的图片保留"""
+        self.scheduler.cancel_group(self.GROUP)
+        self.pending.clear()
+
+class PagePrefetchTask(BackgroundTask):
+    """在后台预取相邻的影片列表页及其封面缩略图"""
+    page_prefetched = pyqtSignal(object, list, dict)  # 参数：(缓存键, 影片列表, 分页信息)
+    
+    def __init__(self, api_base_url, db, image_store, page_requests, cover_limit=30):
+        super().__init__()
+        self.api_base_url = api_base_url
         self.db = db
-        self.magnet_only = magnet_only
+        self.image_store = image_store
+        self.page_requests = page_requests  # 每项包含 key、mode、target、page、magnet_only、star_name、after
+        self.cover_limit = cover_limit  # 本次预取最多下载的封面数量
+        
+    def run(self):
+        covers = []
+        for request in self.page_requests:
+            if self.is_cancelled():
+                return
+            try:
+                movies, pagination = fetch_movie_page(self.api_base_url, self.db, request["mode"], request["target"],
+                                                      request["page"], request["magnet_only"],
+                                                      request.get("star_name", ""), request.get("after"))
+            except Exception as e:
+                print(f"预取第 {request['page']} 页失败: {str(e)}")
+                continue
+            self.page_prefetched.emit(request["key"], movies, pagination)
+            covers.extend((movie.get("id"), movie.get("img")) for movie in movies)
+        
+        self.download_covers(covers)
+    
+    def download_covers(self, covers):
+        """在预算内下载封面入库，已入库的跳过"""
+        if self.cover_limit <= 0 or not covers:
+            return
+        downloaded = 0
+        for movie_id, url in covers:
+            if downloaded >= self.cover_limit or self.is_cancelled():
+                break
+            if not movie_id or not url:
+                continue
+            if stored_cover(self.image_store, movie_id):
+                continue
+            try:
+                if download_cover(self.image_store, movie_id, url):
+                    downloaded += 1
+            except Exception as e:
+                print(f"预取封面 {movie_id} 失败: {str(e)}")
+
+def fetch_movie_magnets(api_base_url, movie_data):
+    """通过gid和uc参数从API获取磁力链接列表，影片数据中没有这两个参数或请求失败时返回None"""
+    gid = movie_data.get("gid", "")
+    uc = movie_data.get("uc", "")
+    movie_id = movie_data.get("id", "")
+    if not (gid and uc):
+        return None
+    
+    magnet_response = requests.get(f"{api_base_url}/magnets/{movie_id}", params={
+        "gid": gid,
+        "uc": uc,
+        "sortBy": "date",
+        "sortOrder": "desc"
+    }, timeout=10)
+    if magnet_response.status_code != 200:
+        return None
+    
+    magnets_data = magnet_response.json()
+    # API返回的是直接的磁力链接数组，而不是包含magnets字段的对象
+    return magnets_data if isinstance(magnets_data, list) else magnets_data.get("magnets", [])
+
+class MagnetCache:
+    """磁力链接的内存缓存（LRU），由预取线程写入、界面线程读取"""
+    
+    def __init__(self, max_entries=300):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+    
+    def get(self, movie_id):
+        with self.lock:
+            if movie_id not in self.entries:
+                return None
+            self.entries.move_to_end(movie_id)
+            return self.entries[movie_id]
+    
+    def put(self, movie_id, magnets):
+        with self.lock:
+            self.entries[movie_id] = magnets
+            self.entries.move_to_end(movie_id)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+    
+    def __contains__(self, movie_id):
+        with self.lock:
+            return movie_id in self.entries
+
+class MovieWarmTask(BackgroundTask):
+    """预取单个影片的详情、磁力链接和封面"""
+    movie_warmed = pyqtSignal(str)  # 参数：已预取完成的影片ID
+    
+    def __init__(self, api_base_url, db, image_store, magnet_cache, movie_id, warmed):
+        super().__init__()
+        self.api_base_url = api_base_url
+        self.db = db
+        self.image_store = image_store
+        self.magnet_cache = magnet_cache
+        self.movie_id = movie_id
+        self.warmed = warmed  # 与DetailPrefetcher共用的已预取影片集合
+        
+    def run(self):
+        if self.movie_id in self.warmed:
+            return
+        try:
+            self.warm(self.movie_id)
+            self.warmed.add(self.movie_id)
+            self.movie_warmed.emit(self.movie_id)
+        except Exception as e:
+            print(f"预取影片 {self.movie_id} 失败: {str(e)}")
+    
+    def warm(self, movie_id):
+        """预取单个影片：写入数据库、磁力链接缓存和图片仓库中的封面"""
+        movie_data = self.db.get_movie(movie_id)
+        if not movie_data:
+            response = requests.get(f"{self.api_base_url}/movies/{movie_id}", timeout=10)
+            if response.status_code != 200:
+                return
+            movie_data = response.json()
+            self.db.save_movie(movie_data)
+        
+        if movie_id not in self.magnet_cache:
+            magnets = fetch_movie_magnets(self.api_base_url, movie_data)
+            if magnets is not None:
+                self.magnet_cache.put(movie_id, magnets)
+        
+        cover_url = movie_data.get("img")
+        if cover_url and not stored_cover(self.image_store, movie_id):
+            download_cover(self.image_store, movie_id, cover_url)
+
+class DetailPrefetcher:
+    """为影片列表中可见的行安排详情、磁力链接和封面的预取任务
+    
+    每次调用schedule()都会开始新的一轮，之前尚未处理的任务自动取消；
+    优先级数值越小越先处理（选中行、鼠标悬停行、选中行附近、其余可见行）。
+    任务在调度器的后台线程池中执行，不占用用户操作需要的线程。
+    """
+    GROUP = "detail_prefetch"
+    
+    def __init__(self, scheduler, api_base_url, db, image_store, magnet_cache):
+        self.scheduler = scheduler
+        self.api_base_url = api_base_url
+        self.db = db
+        self.image_store = image_store
+        self.magnet_cache = magnet_cache
+        self.warmed = set()  # 已经预取过的影片，避免重复请求
+        
+    def schedule(self, prioritized_ids):
+        """开始新一轮预取，参数为(优先级, 影片ID)列表"""
+        self.cancel()
+        if not self.api_base_url:
+            return
+        for priority, movie_id in prioritized_ids:
+            if movie_id and movie_id not in self.warmed:
+                task = MovieWarmTask(self.api_base_url, self.db, self.image_store, self.magnet_cache,
+                                     movie_id, self.warmed)
+                self.scheduler.submit(task, TaskScheduler.PRIORITY_LOW - priority, self.GROUP,
+                                      exclusive=False, background=True)
+    
+    def cancel(self):
+        """取消所有尚未完成的预取任务"""
+        self.scheduler.cancel_group(self.GROUP)
+
+class MovieDetailTask(BackgroundTask):
+    """在后台加载单个影片的详情和磁力链接，结果带上请求序号，界面据此丢弃过期的结果"""
+    detail_loaded = pyqtSignal(int, dict)  # 参数：(请求序号, 影片数据)
+    magnets_loaded = pyqtSignal(int, list)  # 参数：(请求序号, 磁力链接列表)
+    detail_error = pyqtSignal(int, str)  # 参数：(请求序号, 错误信息)
+    
+    def __init__(self, request_token, movie_id, api_base_url, db, magnet_cache):
+        super().__init__()
+        self.request_token = request_token  # 请求序号；self.token是基类的取消标记，不能覆盖
+        self.movie_id = movie_id
+        self.api_base_url = api_base_url
+        self.db = db
+        self.magnet_cache = magnet_cache
         
     def run(self):
         try:
-            # 先从数据库中获取演员的影片
-            if not self.title_search:
-                db_movies = self.db.get_star_movies(self.star_id)
-                if db_movies:
-                    print(f"从数据库中找到 {len(db_movies)} 部演员影片")
-                    # 创建分页信息
-                    pagination = {
-                        "currentPage": 1,
-                        "hasNextPage": False,
-                        "nextPage": None
-                    }
-                    self.load_complete.emit(db_movies, pagination)
+            # 先从数据库中获取影片信息，没有则从API获取
+            movie_data = self.db.get_movie(self.movie_id)
+            if not movie_data:
+                response = requests.get(f"{self.api_base_url}/movies/{self.movie_id}", timeout=15)
+                if response.status_code != 200:
+                    self.detail_error.emit(self.request_token, f"获取影片详情失败: {response.status_code}")
                     return
+                movie_data = response.json()
+                # 保存到数据库
+                self.db.save_movie(movie_data)
             
-            # 如果数据库中没有或者是按名称搜索，则从API获取
-            params = {}
-            if self.title_search and self.star_name:
-                # 搜索影片名称中包含演员名称的影片
-                params = {
-                    "keyword": self.star_name,
-                    "page": str(self.page)
-                }
-                # 只有当需要包含无磁力影片时才添加magnet参数
-                if not self.magnet_only:
-                    params["magnet"] = "all"
-                response = requests.get(f"{self.api_base_url}/movies/search", params=params)
-            else:
-                # 搜索演员参演的所有影片
-                params = {
-                    "filterType": "star",
-                    "filterValue": self.star_id,
-                    "page": str(self.page)
-                }
-                # 只有当需要包含无磁力影片时才添加magnet参数
-                if not self.magnet_only:
-                    params["magnet"] = "all"
-                response = requests.get(f"{self.api_base_url}/movies", params=params)
-            
-            if response.status_code != 200:
-                self.load_error.emit(f"获取影片列表失败: {response.status_code}")
+            if self.is_cancelled():
                 return
+            self.detail_loaded.emit(self.request_token, movie_data)
             
-            data = response.json()
-            movies = data.get("movies", [])
-            pagination = data.get("pagination", {})
+            # 磁力链接优先使用预取的缓存
+            magnets = self.magnet_cache.get(self.movie_id)
+            if magnets is None:
+                try:
+                    magnets = fetch_movie_magnets(self.api_base_url, movie_data)
+                except Exception as e:
+                    print(f"获取磁力链接失败: {str(e)}")
+                    magnets = None
+                if magnets is not None:
+                    self.magnet_cache.put(self.movie_id, magnets)
             
-            # 如果是按名称搜索，直接使用API返回的结果
-            if self.title_search and self.star_name:
-                # 不再创建filtered_movies列表，直接使用API返回的movies
-                # 不再检查数据库中是否已有该影片
-                # 不再获取每个影片的详细信息
-                
-                # 更新分页信息
-                pagination["currentPage"] = self.page
-                pagination["hasNextPage"] = len(movies) >= 30  # 假设每页30个结果
-                pagination["nextPage"] = self.page + 1 if pagination["hasNextPage"] else None
-            else:
-                # 检查数据库中是否已有这些影片
-                for i, movie in enumerate(movies):
-                    movie_id = movie.get("id")
-                    if movie_id:
-                        # 检查数据库中是否已有该影片
-                        db_movie = self.db.get_movie(movie_id)
-                        if db_movie:
-                            # 如果数据库中有，用数据库中的数据替换
-                            movies[i] = db_movie
-                        # 不再主动获取详情，减少API请求
-            
-            self.load_complete.emit(movies, pagination)
+            # 如果没有gid和uc参数，或者API获取失败，使用影片数据中的磁力链接
+            if not magnets:
+                magnets = movie_data.get("magnets", [])
             
+            if not self.is_cancelled():
+                self.magnets_loaded.emit(self.request_token, magnets)
         except Exception as e:
-            self.load_error.emit(f"获取影片列表失败: {str(e)}")
+            self.detail_error.emit(self.request_token, f"获取影片详情时出错: {str(e)}")
 
-class ImageDownloadThread(QThread):
-    """用于在后台下载图片的线程"""
-    image_downloaded = pyqtSignal(str, str)  # 参数：(图片路径, 图片类型)
+class StarInfoTask(BackgroundTask):
+    """在后台加载演员资料和头像，头像保存在图片仓库中，结果带上请求序号"""
+    info_loaded = pyqtSignal(int, dict)  # 参数：(请求序号, 演员资料)
+    avatar_loaded = pyqtSignal(int, str, QImage)  # 参数：(请求序号, 演员ID, 已缩放的头像)
+    avatar_failed = pyqtSignal(int, str)  # 参数：(请求序号, 提示文字)
+    info_error = pyqtSignal(int, str)  # 参数：(请求序号, 错误信息)
+    
+    AVATAR_DIR = os.path.join("buspic", "stars")  # 旧版本的头像目录，读取时移入图片仓库
+    AVATAR_SIZE = 200
+    
+    # 所有演员共用一个会话，通过防盗链检查后的Cookie可以继续使用
+    session = None
+    session_lock = threading.Lock()
+    
+    def __init__(self, request_token, star_id, api_base_url, db, image_store, load_avatar=True):
+        super().__init__()
+        self.request_token = request_token  # 请求序号；self.token是基类的取消标记，不能覆盖
+        self.star_id = star_id
+        self.api_base_url = api_base_url
+        self.db = db
+        self.image_store = image_store
+        self.load_avatar = load_avatar  # 内存中已有头像时无需再加载
+        
+    @classmethod
+    def get_session(cls):
+        """获取共享的图片下载会话"""
+        with cls.session_lock:
+            if cls.session is None:
+                cls.session = requests.Session()
+                cls.session.headers.update({
+                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+                    "Referer": "https://www.javbus.com/",
+                    "Accept": "image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8",
+                    "Accept-Language": "zh-CN,zh;q=0.9,en-US;q=0.8,en;q=0.7"
+                })
+            return cls.session
+        
+    def run(self):
+        try:
+            # 先从数据库中获取演员信息，没有则从API获取
+            star_info = self.db.get_star(self.star_id)
+            if not star_info:
+                response = requests.get(f"{self.api_base_url}/stars/{self.star_id}", timeout=15)
+                if response.status_code != 200:
+                    self.info_error.emit(self.request_token, f"获取演员信息失败: {response.status_code}")
+                    return
+                star_info = response.json()
+                # 保存到数据库
+                self.db.save_star(star_info)
+            
+            self.info_loaded.emit(self.request_token, star_info)
+        except Exception as e:
+            self.info_error.emit(self.request_token, f"获取演员信息失败: {str(e)}")
+            return
+        
+        if not self.load_avatar or self.is_cancelled():
+            return
+        
+        avatar_url = star_info.get('avatar')
+        if not avatar_url:
+            self.avatar_failed.emit(self.request_token, "无头像")
+            return
+        
+        try:
+            image = self.load_avatar_image(avatar_url)
+            if image is None or image.isNull():
+                self.avatar_failed.emit(self.request_token, "头像加载失败")
+                return
+            image = image.scaled(self.AVATAR_SIZE, self.AVATAR_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            self.avatar_loaded.emit(self.request_token, self.star_id, image)
+        except Exception as e:
+            print(f"加载头像失败: {str(e)}")
+            self.avatar_failed.emit(self.request_token, "头像加载失败")
+    
+    def load_avatar_image(self, avatar_url):
+        """从图片仓库读取头像，没有则下载入库"""
+        file_extension = os.path.splitext(avatar_url)[1] or ".jpg"
+        
+        # 检查仓库中是否已有头像，旧版本目录中的头像先移入仓库
+        save_path = (stored_image(self.image_store, "star", self.star_id, "avatar") or
+                     self.image_store.import_legacy(os.path.join(self.AVATAR_DIR, f"{self.star_id}{file_extension}"),
+                                                    "star", self.star_id, "avatar"))
+        if save_path:
+            print(f"从本地加载演员头像: {save_path}")
+            return QImage(save_path)
+        
+        session = self.get_session()
+        image_response = session.get(avatar_url, timeout=10)
+        if image_response.status_code != 200:
+            # 先访问演员页面建立会话，再次尝试下载图片
+            session.get(f"https://www.javbus.com/star/{self.star_id}", timeout=10)
+            image_response = session.get(avatar_url, timeout=10)
+            if image_response.status_code != 200:
+                return None
+        
+        # 保存头像
+        save_path = self.image_store.temp_path(file_extension)
+        with open(save_path, "wb") as f:
+            f.write(image_response.content)
+        save_path = self.image_store.put_file(save_path, "star", self.star_id, "avatar", ext=file_extension)
+        print(f"下载并保存演员头像: {save_path}")
+        
+        image = QImage()
+        image.loadFromData(image_response.content)
+        return image
+
+class RateLimiter:
+    """多个下载线程共用的限速器，rate为每秒字节数，0表示不限速
+    
+    每收到一块数据就扣除相应的额度，额度为负时等待到补足为止，所有线程合计的速度不超过rate。
+    """
+    
+    def __init__(self, rate=0):
+        self.rate = rate
+        self.allowance = 0.0
+        self.last_check = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def set_rate(self, rate):
+        with self.lock:
+            self.rate = rate
+            self.allowance = 0.0
+            self.last_check = time.monotonic()
+    
+    def consume(self, size):
+        with self.lock:
+            if self.rate <= 0:
+                return
+            now = time.monotonic()
+            # 额度按时间补充，最多积累一秒的量
+            self.allowance = min(self.rate, self.allowance + (now - self.last_check) * self.rate)
+            self.last_check = now
+            self.allowance -= size
+            wait = -self.allowance / self.rate if self.allowance < 0 else 0
+        if wait > 0:
+            time.sleep(wait)
+
+def download_image_file(url, save_path, headers, referer_page=None, timeout=10, rate_limiter=None):
+    """流式下载图片到临时文件，校验长度后原子地改名为最终文件，返回是否成功
+    
+    直接下载失败且提供了referer_page时，先访问该页面建立会话再重试一次。
+    中途出错或长度不符时只会留下被删除的临时文件，不会出现截断的图片。
+    提供rate_limiter时按其限制下载速度。
+    """
+    response = requests.get(url, headers=headers, stream=True, timeout=timeout)
+    if response.status_code != 200 and referer_page:
+        response.close()
+        session = requests.Session()
+        session.headers.update(headers)
+        session.get(referer_page, timeout=timeout)
+        response = session.get(url, stream=True, timeout=timeout)
+    if response.status_code != 200:
+        response.close()
+        return False
+    
+    # 压缩传输时解压后的长度与Content-Length不同，只校验未压缩的响应
+    expected = response.headers.get("Content-Length", "")
+    if response.headers.get("Content-Encoding", "identity") != "identity":
+        expected = ""
+    
+    temp_path = f"{save_path}.{threading.get_ident()}.part"
+    try:
+        written = 0
+        with response, open(temp_path, "wb") as f:
+            for chunk in response.iter_content(chunk_size=65536):
+                if chunk:
+                    f.write(chunk)
+                    written += len(chunk)
+                    if rate_limiter is not None:
+                        rate_limiter.consume(len(chunk))
+        if written == 0 or (expected.isdigit() and int(expected) != written):
+            print(f"下载 {url} 不完整: 期望 {expected or '未知'} 字节，实际 {written} 字节")
+            return False
+        os.replace(temp_path, save_path)
+        return True
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def stored_image(image_store, entity_type, entity_id, role, idx=0):
+    """返回已入库且文件仍存在的图片路径
+    
+    索引查找不检查文件，图片文件在程序之外被删除时移除失效的索引，视为没有该图片，之后会重新下载。
+    """
+    path = image_store.get(entity_type, entity_id, role, idx)
+    if path and not os.path.isfile(path):
+        print(f"图片文件已不存在，移除索引: {path}")
+        image_store.forget(entity_type, entity_id, role, idx)
+        return None
+    return path
+
+def stored_movie_images(image_store, movie_id):
+    """返回影片已入库且文件仍存在的图片[(角色, 序号, 路径)]，失效的索引被移除"""
+    images = []
+    for role, index, path in image_store.list_images("movie", movie_id):
+        if os.path.isfile(path):
+            images.append((role, index, path))
+        else:
+            print(f"图片文件已不存在，移除索引: {path}")
+            image_store.forget("movie", movie_id, role, index)
+    return images
+
+def stored_cover(image_store, movie_id):
+    """返回已入库的封面路径，旧版本目录中的封面先移入仓库，没有时返回None"""
+    cover_path = stored_image(image_store, "movie", movie_id, "cover")
+    if cover_path:
+        return cover_path
+    if image_store.import_legacy_movie_dir(movie_id) == 0:
+        # 旧版本预取的封面
+        image_store.import_legacy(os.path.join("buspic", "thumbs", f"{movie_id}.jpg"), "movie", movie_id, "cover")
+    return image_store.get("movie", movie_id, "cover")
+
+def download_cover(image_store, movie_id, cover_url):
+    """下载影片封面入库，返回图片路径，失败时返回None"""
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+        "Referer": "https://www.javbus.com/"
+    }
+    file_extension = os.path.splitext(cover_url)[1] or ".jpg"
+    return image_store.download(lambda path: download_image_file(cover_url, path, headers),
+                                "movie", movie_id, "cover", 0, file_extension)
+
+class ImageDownloadTask(BackgroundTask):
+    """在后台下载影片封面和预览图的任务
+    
+    每部影片使用一个小的线程池并发下载，总耗时接近最慢的一张图片；
+    已入库的图片直接通知界面，新下载的图片入库后逐张通知（顺序不固定）。
+    slots为None时下载完整图集，否则只处理其中列出的(图片类型, 序号)。
+    """
+    image_downloaded = pyqtSignal(str, str, int)  # 参数：(图片路径, 图片类型, 序号)
     download_complete = pyqtSignal()
     download_error = pyqtSignal(str)
     
-    def __init__(self, movie_id, api_base_url, movie_data, save_dir):
+    MAX_WORKERS = 4  # 每部影片同时下载的图片数
+    
+    # 设置请求头，模拟浏览器行为
+    HEADERS = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+        "Referer": "https://www.javbus.com/",
+        "Accept": "image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8",
+        "Accept-Language": "zh-CN,zh;q=0.9,en-US;q=0.8,en;q=0.7",
+        "Cache-Control": "no-cache",
+        "Pragma": "no-cache"
+    }
+    
+    def __init__(self, movie_id, api_base_url, movie_data, image_store, slots=None, rate_limiter=None):
         super().__init__()
         self.movie_id = movie_id
         self.api_base_url = api_base_url
         self.movie_data = movie_data
-        self.save_dir = save_dir
+        self.image_store = image_store
+        self.slots = slots
+        self.rate_limiter = rate_limiter
+    
+    def image_jobs(self):
+        """需要处理的图片[(图片地址, 图片类型, 序号)]，封面在前，预览图按顺序排列"""
+        jobs = []
+        cover_url = self.movie_data.get("img")
+        if cover_url:
+            jobs.append((cover_url, "cover", 0))
+        for i, sample in enumerate(self.movie_data.get("samples", [])):
+            sample_url = sample.get("src")
+            if sample_url:
+                jobs.append((sample_url, "sample", i + 1))
+        if self.slots is not None:
+            jobs = [job for job in jobs if (job[1], job[2]) in self.slots]
+        return jobs
         
     def run(self):
         try:
-            # 设置请求头，模拟浏览器行为
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-                "Referer": "https://www.javbus.com/",
-                "Accept": "image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8",
-                "Accept-Language": "zh-CN,zh;q=0.9,en-US;q=0.8,en;q=0.7",
-                "Cache-Control": "no-cache",
-                "Pragma": "no-cache"
-            }
+            jobs = self.image_jobs()
+            
+            # 已入库的图片（包括预取线程下载的封面）直接通知
+            stored_cover(self.image_store, self.movie_id)
+            missing = []
+            for url, image_type, index in jobs:
+                path = stored_image(self.image_store, "movie", self.movie_id, image_type, index)
+                if path:
+                    self.image_downloaded.emit(path, image_type, index)
+                else:
+                    missing.append((url, image_type, index))
             
-            # 下载封面图
-            cover_url = self.movie_data.get("img")
-            if cover_url:
-                # 下载封面图
-                image_response = requests.get(cover_url, headers=headers, timeout=10)
-                if image_response.status_code != 200:
-                    # 尝试使用另一种方法
-                    session = requests.Session()
-                    session.headers.update(headers)
-                    # 先访问影片页面建立会话
-                    session.get(f"https://www.javbus.com/{self.movie_id}")
-                    # 再次尝试下载图片
-                    image_response = session.get(cover_url, timeout=10)
-                
-                if image_response.status_code == 200:
-                    # 保存封面图
-                    file_extension = os.path.splitext(cover_url)[1] or ".jpg"
-                    cover_path = os.path.join(self.save_dir, f"cover{file_extension}")
-                    with open(cover_path, "wb") as f:
-                        f.write(image_response.content)
-                    
-                    # 发送信号通知已下载封面
-                    self.image_downloaded.emit(cover_path, "cover")
-            
-            # 下载预览图
-            samples = self.movie_data.get("samples", [])
-            for i, sample in enumerate(samples):
-                sample_url = sample.get("src")
-                if not sample_url:
-                    continue
-                
+            if missing:
+                executor = ThreadPoolExecutor(max_workers=self.MAX_WORKERS)
+                futures = {executor.submit(self.download, url, image_type, index): (image_type, index)
+                           for url, image_type, index in missing}
                 try:
-                    # 下载预览图
-                    sample_response = requests.get(sample_url, headers=headers, timeout=10)
-                    if sample_response.status_code != 200:
-                        # 尝试使用另一种方法
-                        session = requests.Session()
-                        session.headers.update(headers)
-                        # 先访问影片页面建立会话
-                        session.get(f"https://www.javbus.com/{self.movie_id}")
-                        # 再次尝试下载图片
-                        sample_response = session.get(sample_url, timeout=10)
-                    
-                    if sample_response.status_code == 200:
-                        # 保存预览图
-                        file_extension = os.path.splitext(sample_url)[1] or ".jpg"
-                        sample_path = os.path.join(self.save_dir, f"sample_{i+1}{file_extension}")
-                        with open(sample_path, "wb") as f:
-                            f.write(sample_response.content)
-                        
-                        # 发送信号通知已下载预览图
-                        self.image_downloaded.emit(sample_path, "sample")
-                except Exception as e:
-                    print(f"下载预览图 {sample_url} 失败: {str(e)}")
+                    for future in as_completed(futures):
+                        # 用户已切换到其他影片
+                        if self.is_cancelled():
+                            return
+                        image_type, index = futures[future]
+                        path = future.result()
+                        if path:
+                            # 入库时提前生成缩略图
+                            get_thumbnail_generator().pregenerate(
+                                path, ("list", "preview") if image_type == "cover" else ("preview",))
+                            self.image_downloaded.emit(path, image_type, index)
+                finally:
+                    for future in futures:
+                        future.cancel()
+                    executor.shutdown(wait=False)
             
             # 发送下载完成信号
             self.download_complete.emit()
-            
         except Exception as e:
             self.download_error.emit(f"下载图片失败: {str(e)}")
+    
+    def download(self, url, image_type, index):
+        """在线程池中下载一张图片并入库，返回图片路径，失败时返回None"""
+        if self.is_cancelled():
+            return None
+        try:
+            file_extension = os.path.splitext(url)[1] or ".jpg"
+            return self.image_store.download(
+                lambda path: download_image_file(url, path, self.HEADERS, f"https://www.javbus.com/{self.movie_id}",
+                                                 rate_limiter=self.rate_limiter),
+                "movie", self.movie_id, image_type, index, file_extension)
+        except Exception as e:
+            print(f"下载图片 {url} 失败: {str(e)}")
+            return None
+
+class BatchMovieTask(ImageDownloadTask):
+    """下载管理器中的一部影片：需要时先获取影片详情，下载后根据图片清单检查是否完整"""
+    movie_finished = pyqtSignal(str, bool, str)  # 参数：(影片ID, 图片是否完整, 错误信息)
+    
+    def __init__(self, movie_id, api_base_url, db, image_store, full_gallery=True, rate_limiter=None):
+        super().__init__(movie_id, api_base_url, {}, image_store,
+                         None if full_gallery else {("cover", 0)}, rate_limiter)
+        self.db = db
+        self.error = ""
+        self.download_error.connect(self.on_download_error, Qt.DirectConnection)
+    
+    def on_download_error(self, error_msg):
+        self.error = error_msg
+    
+    def missing_jobs(self):
+        """图片清单中还没有的图片"""
+        stored = {(role, index) for role, index, path in stored_movie_images(self.image_store, self.movie_id)}
+        return [job for job in self.image_jobs() if (job[1], job[2]) not in stored]
+    
+    def run(self):
+        try:
+            # 先从数据库获取影片详情，没有则从API获取
+            movie_data = self.db.get_movie(self.movie_id)
+            if not movie_data:
+                response = requests.get(f"{self.api_base_url}/movies/{self.movie_id}", timeout=15)
+                if response.status_code != 200:
+                    self.movie_finished.emit(self.movie_id, False, f"获取影片详情失败 ({response.status_code})")
+                    return
+                movie_data = response.json()
+                self.db.save_movie(movie_data)
+        except Exception as e:
+            self.movie_finished.emit(self.movie_id, False, f"获取影片详情失败: {str(e)}")
+            return
+        
+        self.movie_data = movie_data
+        # 图片已齐全的影片不需要再下载
+        if self.missing_jobs():
+            super().run()
+            if self.is_cancelled():
+                return
+            missing = self.missing_jobs()
+            if missing:
+                self.movie_finished.emit(self.movie_id, False,
+                                         self.error or f"缺少 {len(missing)} 张图片")
+                return
+        self.movie_finished.emit(self.movie_id, True, "")
+
+class BatchPageListTask(BackgroundTask):
+    """在后台逐页获取影片列表，供批量下载使用"""
+    page_loaded = pyqtSignal(int, list)  # 参数：(页码, 影片ID列表)
+    page_error = pyqtSignal(int, str)  # 参数：(页码, 错误信息)
+    
+    def __init__(self, api_base_url, db, request, pages):
+        super().__init__()
+        self.api_base_url = api_base_url
+        self.db = db
+        self.request = request  # 与current_list_request格式相同
+        self.pages = pages
+    
+    def run(self):
+        after = None
+        previous_page = None
+        for page in self.pages:
+            if self.is_cancelled():
+                return
+            # 连续的页面可以使用上一页末尾的排序键
+            if previous_page is None or page != previous_page + 1:
+                after = None
+            try:
+                movies, pagination = fetch_movie_page(self.api_base_url, self.db, self.request["mode"],
+                                                      self.request["target"], page, self.request["magnet_only"],
+                                                      self.request.get("star_name", ""), after)
+            except Exception as e:
+                self.page_error.emit(page, str(e))
+                after = None
+                previous_page = None
+                continue
+            after = (pagination or {}).get("nextCursor")
+            previous_page = page
+            self.page_loaded.emit(page, [movie.get("id") for movie in movies if movie.get("id")])
+
+class DownloadManager(QObject):
+    """批量图片下载管理器
+    
+    - 下载队列保存在数据库中，程序关闭后再次打开可以继续下载
+    - 同时下载的影片数量有上限，每部影片内部再并发下载图片，所有下载共用一个限速器
+    - 支持暂停、继续和取消；失败的影片延迟后自动重试，超过次数后标记为失败，可以手动重试
+    任务在调度器中单独的线程池执行，不占用界面操作和预取使用的线程。
+    """
+    item_changed = pyqtSignal(str)  # 参数：影片ID
+    queue_changed = pyqtSignal()  # 队列中增加或删除了影片
+    state_changed = pyqtSignal()  # 暂停、继续或全部完成
+    
+    POOL = "downloads"
+    GROUP = "batch_images"
+    MAX_ATTEMPTS = 3
+    RETRY_DELAY = 10  # 秒，第n次重试等待n倍的时间
+    
+    STATUS_TEXT = {
+        "pending": "等待",
+        "running": "下载中",
+        "done": "完成",
+        "failed": "失败"
+    }
+    
+    def __init__(self, scheduler, api_base_url, db, image_store, max_movies=2, rate_limit=0, parent=None):
+        super().__init__(parent)
+        self.scheduler = scheduler
+        self.api_base_url = api_base_url
+        self.db = db
+        self.image_store = image_store
+        self.max_movies = max_movies
+        self.scheduler.add_pool(self.POOL, max_movies)
+        self.rate_limiter = RateLimiter(rate_limit)
+        self.running = {}  # 影片ID -> 正在执行的任务
+        self.retry_at = {}  # 影片ID -> 可以重试的时间
+        
+        # 恢复上次未完成的队列，等待用户继续
+        self.items = OrderedDict()  # 影片ID -> 队列记录
+        for item in self.db.get_downloads():
+            if item["status"] == "running":
+                item["status"] = "pending"
+            self.items[item["movie_id"]] = item
+        self.paused = self.count("pending") > 0
+    
+    def count(self, status):
+        return sum(1 for item in self.items.values() if item["status"] == status)
+    
+    def is_active(self):
+        """是否还有等待或正在下载的影片"""
+        return bool(self.running) or self.count("pending") > 0
+    
+    def add(self, movie_ids, full_gallery=True):
+        """将影片加入队列并开始下载，正在下载的影片不会重复加入"""
+        movie_ids = [movie_id for movie_id in dict.fromkeys(movie_ids) if movie_id and movie_id not in self.running]
+        if not movie_ids:
+            return 0
+        self.db.enqueue_downloads(movie_ids, full_gallery)
+        complete = self.complete_movies(movie_ids, full_gallery)
+        for movie_id in movie_ids:
+            self.items.pop(movie_id, None)
+            self.items[movie_id] = {"movie_id": movie_id, "full_gallery": 1 if full_gallery else 0,
+                                    "status": "pending", "attempts": 0, "error": ""}
+            self.retry_at.pop(movie_id, None)
+            if movie_id in complete:
+                self.db.update_download(movie_id, "done")
+                self.items[movie_id]["status"] = "done"
+        self.queue_changed.emit()
+        self.resume()
+        return len(movie_ids)
+    
+    def complete_movies(self, movie_ids, full_gallery):
+        """一次查询影片详情和已入库的图片数量，返回图片已齐全、不需要下载的影片ID集合
+        
+        数据库中没有详情的影片需要在下载任务中获取详情后再检查。
+        """
+        details, _, _ = self.db.get_movies(movie_ids)
+        counts = self.image_store.count_images("movie", movie_ids)
+        complete = set()
+        for movie_id, movie_data in details.items():
+            expected = 1 if movie_data.get("img") else 0
+            if full_gallery:
+                expected += len(movie_data.get("samples", []))
+            if expected and counts.get(movie_id, 0) >= expected:
+                complete.add(movie_id)
+        return complete
+    
+    def set_status(self, movie_id, status, error=""):
+        item = self.items[movie_id]
+        item["status"] = status
+        item["error"] = error
+        self.db.update_download(movie_id, status, item["attempts"], error)
+        self.item_changed.emit(movie_id)
+    
+    def pump(self):
+        """在并发上限内开始下载等待中的影片"""
+        if self.paused:
+            return
+        now = time.time()
+        for movie_id, item in self.items.items():
+            if len(self.running) >= self.max_movies:
+                break
+            if item["status"] != "pending" or self.retry_at.get(movie_id, 0) > now:
+                continue
+            self.retry_at.pop(movie_id, None)
+            self.set_status(movie_id, "running")
+            task = BatchMovieTask(movie_id, self.api_base_url, self.db, self.image_store,
+                                  bool(item["full_gallery"]), self.rate_limiter)
+            task.movie_finished.connect(self.on_movie_finished)
+            task.finished.connect(self.on_task_finished)
+            self.running[movie_id] = task
+            self.scheduler.submit(task, TaskScheduler.PRIORITY_LOW, self.GROUP, exclusive=False, pool=self.POOL)
+        if not self.is_active():
+            self.state_changed.emit()
+    
+    def on_movie_finished(self, movie_id, complete, error):
+        task = self.sender()
+        if self.running.get(movie_id) is not task or movie_id not in self.items:
+            return
+        del self.running[movie_id]
+        item = self.items[movie_id]
+        if complete:
+            self.set_status(movie_id, "done")
+        else:
+            item["attempts"] += 1
+            if item["attempts"] < self.MAX_ATTEMPTS:
+                # 延迟后自动重试
+                delay = self.RETRY_DELAY * item["attempts"]
+                self.retry_at[movie_id] = time.time() + delay
+                self.set_status(movie_id, "pending", error)
+                QTimer.singleShot(delay * 1000, self.pump)
+            else:
+                self.set_status(movie_id, "failed", error)
+        self.pump()
+    
+    def on_task_finished(self):
+        """任务结束但没有结果（被取消或出错）时，把影片放回队列"""
+        task = self.sender()
+        if task is None or self.running.get(task.movie_id) is not task:
+            return
+        del self.running[task.movie_id]
+        if task.movie_id in self.items:
+            self.set_status(task.movie_id, "pending")
+        self.pump()
+    
+    def pause(self):
+        """暂停：不再开始新的影片，正在下载的影片继续完成"""
+        self.paused = True
+        self.state_changed.emit()
+    
+    def resume(self):
+        self.paused = False
+        self.state_changed.emit()
+        self.pump()
+    
+    def cancel(self):
+        """取消：停止正在下载的影片，并从队列中删除所有未完成的影片"""
+        for movie_id, task in list(self.running.items()):
+            self.scheduler.cancel(task)
+        self.running.clear()
+        self.retry_at.clear()
+        self.db.remove_downloads(["pending", "running"])
+        self.items = OrderedDict((movie_id, item) for movie_id, item in self.items.items()
+                                 if item["status"] not in ("pending", "running"))
+        self.paused = False
+        self.queue_changed.emit()
+        self.state_changed.emit()
+    
+    def retry_failed(self):
+        """手动重试所有失败的影片"""
+        failed = [movie_id for movie_id, item in self.items.items() if item["status"] == "failed"]
+        for movie_id in failed:
+            self.items[movie_id]["attempts"] = 0
+            self.set_status(movie_id, "pending")
+        if failed:
+            self.resume()
+    
+    def clear_finished(self):
+        """从队列中删除已完成的影片"""
+        self.db.remove_downloads(["done"])
+        self.items = OrderedDict((movie_id, item) for movie_id, item in self.items.items()
+                                 if item["status"] != "done")
+        self.queue_changed.emit()
+    
+    def set_rate_limit(self, rate):
+        self.rate_limiter.set_rate(rate)
+    
+    def shutdown(self):
+        """程序退出时停止下载，正在下载的影片保留在队列中，下次启动后继续"""
+        for movie_id, task in list(self.running.items()):
+            task.cancel()
+            self.db.update_download(movie_id, "pending", self.items[movie_id]["attempts"],
+                                    self.items[movie_id]["error"])
+        self.running.clear()
+
+class DownloadManagerDialog(QDialog):
+    """批量下载的进度窗口：显示队列中每部影片的状态，可以暂停、继续、取消和重试"""
+    
+    COLUMNS = ["影片", "状态", "重试次数", "说明"]
+    
+    def __init__(self, manager, parent=None):
+        super().__init__(parent)
+        self.manager = manager
+        self.rows = {}  # 影片ID -> 行号
+        self.setWindowTitle("下载管理")
+        self.resize(560, 420)
+        
+        layout = QVBoxLayout(self)
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+        
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.table)
+        
+        controls = QHBoxLayout()
+        self.pause_button = QPushButton()
+        self.pause_button.clicked.connect(self.on_pause_clicked)
+        retry_button = QPushButton("重试失败")
+        retry_button.clicked.connect(self.manager.retry_failed)
+        clear_button = QPushButton("清除已完成")
+        clear_button.clicked.connect(self.manager.clear_finished)
+        cancel_button = QPushButton("取消全部")
+        cancel_button.clicked.connect(self.on_cancel_clicked)
+        
+        # 限速，0表示不限速
+        self.rate_input = QSpinBox()
+        self.rate_input.setRange(0, 100000)
+        self.rate_input.setSingleStep(100)
+        self.rate_input.setSuffix(" KB/s")
+        self.rate_input.setSpecialValueText("不限速")
+        self.rate_input.setValue(int(self.manager.rate_limiter.rate / 1024))
+        self.rate_input.valueChanged.connect(self.on_rate_changed)
+        
+        controls.addWidget(self.pause_button)
+        controls.addWidget(retry_button)
+        controls.addWidget(clear_button)
+        controls.addWidget(cancel_button)
+        controls.addStretch()
+        controls.addWidget(QLabel("限速:"))
+        controls.addWidget(self.rate_input)
+        layout.addLayout(controls)
+        
+        self.manager.item_changed.connect(self.update_row)
+        self.manager.queue_changed.connect(self.rebuild)
+        self.manager.state_changed.connect(self.update_summary)
+        self.rebuild()
+    
+    def rebuild(self):
+        """重新填充整个表格"""
+        self.table.setRowCount(len(self.manager.items))
+        self.rows = {}
+        for row, movie_id in enumerate(self.manager.items):
+            self.rows[movie_id] = row
+            self.table.setItem(row, 0, QTableWidgetItem(movie_id))
+            for column in range(1, len(self.COLUMNS)):
+                self.table.setItem(row, column, QTableWidgetItem())
+            self.update_row(movie_id)
+        self.update_summary()
+    
+    def update_row(self, movie_id):
+        row = self.rows.get(movie_id)
+        item = self.manager.items.get(movie_id)
+        if row is None or item is None:
+            return
+        status = self.manager.STATUS_TEXT.get(item["status"], item["status"])
+        if item["status"] == "pending" and item["attempts"]:
+            status = "等待重试"
+        self.table.item(row, 1).setText(status)
+        self.table.item(row, 2).setText(str(item["attempts"]))
+        self.table.item(row, 3).setText(item["error"] or "")
+        self.update_summary()
+    
+    def update_summary(self):
+        manager = self.manager
+        total = len(manager.items)
+        state = "已暂停" if manager.paused else ("下载中" if manager.is_active() else "空闲")
+        self.summary_label.setText(f"{state}：共 {total} 部，完成 {manager.count('done')}，"
+                                   f"下载中 {len(manager.running)}，等待 {manager.count('pending')}，"
+                                   f"失败 {manager.count('failed')}")
+        self.pause_button.setText("继续" if manager.paused else "暂停")
+    
+    def on_pause_clicked(self):
+        if self.manager.paused:
+            self.manager.resume()
+        else:
+            self.manager.pause()
+    
+    def on_cancel_clicked(self):
+        reply = QMessageBox.question(self, "确认取消", "停止下载并从队列中删除所有未完成的影片？",
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            self.manager.cancel()
+    
+    def on_rate_changed(self, value):
+        self.manager.set_rate_limit(value * 1024)
+        CURRENT_CONFIG["batch_download_rate_kb"] = value
+        save_config(CURRENT_CONFIG)
 
-class SummaryWorker(QObject):
-    """用于在后台获取影片简介的工作类"""
+class SummaryTask(BackgroundTask):
+    """在后台获取影片简介并翻译标题和简介的任务"""
     summary_ready = pyqtSignal(str, str)  # 参数：(movie_id, summary)
     summary_error = pyqtSignal(str, str)  # 参数：(movie_id, error_message)
     translation_ready = pyqtSignal(str, str, str)  # 参数：(movie_id, original_summary, translated_summary)
@@ -1169,15 +2342,9 @@ class SummaryWorker(QObject):
         # 获取翻译器实例
         self.translator = get_translator()
         
-    def get_summary(self):
-        """获取影片简介"""
+    def run(self):
+        summary = ""
         try:
-            # 首先启动标题翻译，不需要等待简介结果
-            title = self.movie_data.get("title", "")
-            if title:
-                # 立即开始标题翻译，不等待简介结果
-                QTimer.singleShot(100, lambda: self.translate_title(title))
-            
             # 检查movie_data是否已有摘要信息
             summary = self.movie_data.get("summary", "")
             
@@ -1201,100 +2368,65 @@ class SummaryWorker(QObject):
             
             # 发射信号通知获取到的摘要
             self.summary_ready.emit(self.movie_id, summary)
-            
-            # 如果有摘要，尝试翻译
-            if summary:
-                # 连接翻译器的信号
-                self.translator.translation_ready.connect(self.on_translation_ready)
-                self.translator.translation_error.connect(self.on_translation_error)
-                
-                # 发送翻译请求
-                QTimer.singleShot(1000, lambda: self.translator.translate(self.movie_id, summary))
-                
         except Exception as e:
             print(f"获取影片摘要失败: {str(e)}")
             self.summary_error.emit(self.movie_id, str(e))
-            
-            # 即使获取简介出错，仍然尝试翻译标题
-            title = self.movie_data.get("title", "")
-            if title:
-                try:
-                    QTimer.singleShot(100, lambda: self.translate_title(title))
-                except Exception as title_error:
-                    print(f"安排标题翻译时出错: {str(title_error)}")
-    
-    def translate_title(self, title):
-        """翻译影片标题"""
-        try:
+        
+        # 即使获取简介出错，仍然翻译标题
+        title = self.movie_data.get("title", "")
+        if title and not self.is_cancelled():
             print(f"开始翻译标题: {title}")
-            # 使用translator发送翻译请求
-            # 创建一个临时ID用于标题翻译，避免与摘要翻译混淆
-            temp_id = f"{self.movie_id}_title"
-            
-            # 使用自定义连接器
-            try:
-                self.translator.translation_ready.connect(self.on_title_translation_ready)
-                self.translator.translation_error.connect(self.on_title_translation_error)
-            except Exception as e:
-                print(f"连接标题翻译信号时出错: {str(e)}")
-            
-            # 发送翻译请求
-            self.translator.translate(temp_id, title)
-        except Exception as e:
-            print(f"翻译标题失败: {str(e)}")
-            # 即使出错也不中断其他处理
-    
-    def on_title_translation_ready(self, temp_id, original_text, translated_text):
-        """处理标题翻译完成的回调"""
-        # 检查是否是标题翻译的临时ID
-        if temp_id.endswith("_title") and temp_id.split("_title")[0] == self.movie_id:
-            # 断开连接，避免重复接收信号
-            self.translator.translation_ready.disconnect(self.on_title_translation_ready)
-            self.translator.translation_error.disconnect(self.on_title_translation_error)
-            
-            # 发射标题翻译完成信号
-            self.title_translation_ready.emit(self.movie_id, translated_text)
-    
-    def on_title_translation_error(self, temp_id, error_message):
-        """处理标题翻译错误的回调"""
-        # 检查是否是标题翻译的临时ID
-        if temp_id.endswith("_title") and temp_id.split("_title")[0] == self.movie_id:
-            # 断开连接，避免重复接收信号
-            self.translator.translation_ready.disconnect(self.on_title_translation_ready)
-            self.translator.translation_error.disconnect(self.on_title_translation_error)
-            
-            print(f"标题翻译错误: {error_message}")
-    
-    def on_translation_ready(self, movie_id, original_summary, translated_summary):
-        """处理翻译完成的回调"""
-        if movie_id == self.movie_id:
-            # 发射翻译完成信号
-            print(f"SummaryWorker: 收到翻译结果，长度 {len(translated_summary)}")
-            self.translation_ready.emit(movie_id, original_summary, translated_summary)
-            
-            # 断开信号连接，避免重复接收
-            try:
-                self.translator.translation_ready.disconnect(self.on_translation_ready)
-                self.translator.translation_error.disconnect(self.on_translation_error)
-                print("已断开翻译信号连接")
-            except Exception as e:
-                print(f"断开翻译信号连接时出错: {str(e)}")
+            # 使用临时ID，避免与摘要翻译混淆
+            translated_title, error = self.translate(f"{self.movie_id}_title", title)
+            if error:
+                print(f"标题翻译错误: {error}")
+            elif translated_title:
+                self.title_translation_ready.emit(self.movie_id, translated_title)
+        
+        # 如果有摘要，尝试翻译
+        if summary and not self.is_cancelled():
+            translated_summary, error = self.translate(self.movie_id, summary)
+            if error:
+                print(f"SummaryTask: 翻译出错: {error}")
+                self.translation_error.emit(self.movie_id, error)
+            else:
+                print(f"SummaryTask: 收到翻译结果，长度 {len(translated_summary or '')}")
+                self.translation_ready.emit(self.movie_id, summary, translated_summary or "")
     
-    def on_translation_error(self, movie_id, error_message):
-        """处理翻译错误的回调"""
-        if movie_id == self.movie_id:
-            # 发射翻译错误信号
-            print(f"SummaryWorker: 翻译出错: {error_message}")
-            self.translation_error.emit(movie_id, error_message)
-            
-            # 断开信号连接，避免重复接收
-            try:
-                self.translator.translation_ready.disconnect(self.on_translation_ready)
-                self.translator.translation_error.disconnect(self.on_translation_error)
-            except Exception as e:
-                print(f"断开翻译信号连接时出错: {str(e)}")
+    def translate(self, request_id, text):
+        """在当前线程中调用翻译器，返回(译文, 错误信息)
+        
+        翻译器通过信号返回结果，这里用直接连接在发出信号的线程中接收，
+        并按请求ID过滤其他任务同时发起的翻译。
+        """
+        result = {}
+        
+        def on_ready(reply_id, original_text, translated_text):
+            if reply_id == request_id:
+                result["text"] = translated_text
+        
+        def on_error(reply_id, error_message):
+            if reply_id == request_id:
+                result["error"] = error_message
+        
+        self.translator.translation_ready.connect(on_ready, Qt.DirectConnection)
+        self.translator.translation_error.connect(on_error, Qt.DirectConnection)
+        try:
+            self.translator.translate(request_id, text)
+        except Exception as e:
+            result["error"] = str(e)
+        finally:
+            self.translator.translation_ready.disconnect(on_ready)
+            self.translator.translation_error.disconnect(on_error)
+        return result.get("text"), result.get("error")
 
 class JavbusGUI(QMainWindow):
+    AVATAR_CACHE_SIZE = 100  # 内存中最多保留的演员头像数量
+    TASK_WORKERS = 4  # 用户操作相关的后台任务的最大并发数
+    BACKGROUND_TASK_WORKERS = 2  # 预取任务的最大并发数
+    PREVIEW_WIDTH = 600  # 图片预览区域的尺寸
+    PREVIEW_HEIGHT = 400
+    
     def __init__(self):
         super().__init__()
         # 从配置文件获取API地址和视频网站前缀
@@ -1303,9 +2435,47 @@ class JavbusGUI(QMainWindow):
         self.current_page = 1
         self.current_star_id = None
         self.current_movie_keyword = None  # 新增变量，保存当前搜索的影片关键字
-        self.search_thread = None
-        self.movie_load_thread = None
+        # 所有后台任务都通过同一个调度器执行，按分组取消被取代的任务
+        self.task_scheduler = TaskScheduler(self.TASK_WORKERS, self.BACKGROUND_TASK_WORKERS, self)
+        self.search_result_ids = set()  # 当前搜索已显示的演员ID，用于去重
+        self.star_page_cursors = {}  # (演员ID, 页码) -> 上一页末尾影片的排序键
+        self.page_cache = PageCache(CURRENT_CONFIG.get("page_cache_size", 8))  # 已加载和预取的影片列表页
+        self.current_list_request = None  # 当前显示的影片列表的请求参数，用于缓存和预取
+        self.hovered_movie_row = -1  # 鼠标悬停的影片行，预取时优先处理
+        self.detail_request_token = 0  # 影片详情的请求序号，过期的异步结果据此丢弃
+        self.star_info_token = 0  # 演员资料的请求序号
+        self.avatar_cache = OrderedDict()  # 演员ID -> 已缩放的头像，按最近使用淘汰
         self.db = JavbusDatabase()  # 初始化数据库
+        self.image_store = ImageStore(self.db)  # 封面、预览图和头像按内容哈希保存
+        # 设置了磁盘预算时在后台淘汰最久未访问的图片，批量下载完成的影片最后淘汰
+        self.image_cache = ImageCacheManager(self.image_store,
+                                             CURRENT_CONFIG.get("image_cache_budget_mb", 0) * 1024 * 1024,
+                                             protected_ids=self.batch_downloaded_ids,
+                                             interval=CURRENT_CONFIG.get("image_cache_interval", 300))
+        self.task_scheduler.run_detached(self.image_cache.run, name="image_cache")
+        
+        # 为影片列表中可见的行预取详情、磁力链接和封面
+        self.magnet_cache = MagnetCache()
+        self.detail_prefetcher = DetailPrefetcher(self.task_scheduler, self.api_base_url, self.db,
+                                                  self.image_store, self.magnet_cache)
+        self.thumbnail_loader = ThumbnailLoader(self.task_scheduler, self.image_store,
+                                                CURRENT_CONFIG.get("thumbnail_cache_size", 300), self)
+        self.preview_loader = PreviewImageLoader(self.task_scheduler, self.PREVIEW_WIDTH, self.PREVIEW_HEIGHT,
+                                                 CURRENT_CONFIG.get("preview_cache_size", 40), self)
+        self.preview_loader.image_ready.connect(self.on_preview_image_ready)
+        self.detail_prefetch_timer = QTimer(self)
+        self.detail_prefetch_timer.setSingleShot(True)
+        self.detail_prefetch_timer.setInterval(200)  # 滚动或移动鼠标时合并多次触发
+        self.detail_prefetch_timer.timeout.connect(self.schedule_detail_prefetch)
+        
+        # 批量下载在独立的线程池中执行，队列保存在数据库中
+        self.download_manager = DownloadManager(self.task_scheduler, self.api_base_url, self.db, self.image_store,
+                                                CURRENT_CONFIG.get("batch_download_workers", 2),
+                                                CURRENT_CONFIG.get("batch_download_rate_kb", 0) * 1024, self)
+        self.download_manager.item_changed.connect(self.update_batch_progress)
+        self.download_manager.queue_changed.connect(self.update_batch_progress)
+        self.download_manager.state_changed.connect(self.update_batch_progress)
+        self.download_manager_dialog = None
         
         # 设置应用程序图标
         icon_path = "fb.ico"
@@ -1317,10 +2487,24 @@ class JavbusGUI(QMainWindow):
         # 检查API连接
         self.check_api_connection()
         
+        # 上次关闭时未完成的批量下载
+        if self.download_manager.is_active():
+            self.statusBar().showMessage(f"有 {self.download_manager.count('pending')} 部影片的批量下载未完成，"
+                                         f"可在下载管理中继续", 10000)
+        
     def closeEvent(self, event):
         """应用程序关闭时的处理"""
-        # 清理所有线程
-        self._cleanup_threads()
+        # 正在下载的影片保留在队列中，下次启动后继续
+        self.download_manager.shutdown()
+        # 取消所有后台任务，并等待正在运行的任务结束
+        self.task_scheduler.shutdown()
+        get_thumbnail_generator().shutdown()
+        
+        # 停止图片缓存清理，保存图片的访问时间
+        self.image_cache.stop()
+        stats = self.image_cache.stats()
+        print(f"图片缓存: 命中率 {stats['hit_rate']:.0%}，已淘汰 {stats['evicted_files']} 个文件，"
+              f"回收 {stats['reclaimed_bytes'] / 1024 / 1024:.1f} MB")
         
         # 关闭数据库连接
         self.db.close()
@@ -1462,6 +2646,18 @@ class JavbusGUI(QMainWindow):
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("输入演员名称")
         self.search_input.returnPressed.connect(self.search_stars)
+        
+        # 输入时从本地名字索引联想演员（支持假名、罗马字和别名），不访问网络
+        self.star_completer_model = QStringListModel(self)
+        self.star_completer = QCompleter(self.star_completer_model, self)
+        self.star_completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.star_completer.activated[str].connect(self.on_star_suggestion_activated)
+        self.search_input.setCompleter(self.star_completer)
+        self.suggest_timer = QTimer(self)
+        self.suggest_timer.setSingleShot(True)
+        self.suggest_timer.setInterval(150)
+        self.suggest_timer.timeout.connect(self.update_star_suggestions)
+        self.search_input.textEdited.connect(lambda _: self.suggest_timer.start())
         self.search_button = QPushButton("搜索")
         self.search_button.clicked.connect(self.search_stars)
         search_layout.addWidget(self.search_input)
@@ -1540,10 +2736,19 @@ class JavbusGUI(QMainWindow):
         self.next_pages_input.setPlaceholderText("1")
         next_pages_unit = QLabel("页")
         
+        # 完整图集选项：不勾选时只下载封面
+        self.batch_full_gallery_checkbox = QCheckBox("完整图集")
+        self.batch_full_gallery_checkbox.setChecked(True)
+        self.batch_full_gallery_checkbox.setToolTip("下载封面和全部预览图；不勾选时只下载封面")
+        
         # 下载按钮
         self.batch_download_button = QPushButton("下载页面内影片图片")
         self.batch_download_button.clicked.connect(self.start_batch_download)
         
+        # 下载管理按钮：查看进度、暂停、继续和重试
+        self.download_manager_button = QPushButton("下载管理")
+        self.download_manager_button.clicked.connect(self.show_download_manager)
+        
         # 添加到布局
         batch_download_input_layout.addWidget(prev_pages_label)
         batch_download_input_layout.addWidget(self.prev_pages_input)
@@ -1551,7 +2756,9 @@ class JavbusGUI(QMainWindow):
         batch_download_input_layout.addWidget(next_pages_label)
         batch_download_input_layout.addWidget(self.next_pages_input)
         batch_download_input_layout.addWidget(next_pages_unit)
+        batch_download_input_layout.addWidget(self.batch_full_gallery_checkbox)
         batch_download_input_layout.addWidget(self.batch_download_button)
+        batch_download_input_layout.addWidget(self.download_manager_button)
         
         batch_download_layout.addLayout(batch_download_input_layout)
         left_layout.addLayout(batch_download_layout)
@@ -1612,14 +2819,36 @@ class JavbusGUI(QMainWindow):
         self.refresh_button.setToolTip("清除当前演员的缓存数据并重新加载")
         self.refresh_button.clicked.connect(self.refresh_star_data)
         self.refresh_button.setEnabled(False)
+        # 在当前列表中按编号、名称或日期筛选，不发起请求
+        self.movie_filter_input = QLineEdit()
+        self.movie_filter_input.setPlaceholderText("筛选当前列表")
+        self.movie_filter_input.setClearButtonEnabled(True)
+        self.thumbnail_button = QPushButton("显示封面")
+        self.thumbnail_button.setCheckable(True)
+        self.thumbnail_button.setToolTip("在影片列表中显示封面缩略图")
         movies_control_layout.addWidget(movies_label)
-        movies_control_layout.addStretch()
+        movies_control_layout.addWidget(self.movie_filter_input, 1)
+        movies_control_layout.addWidget(self.thumbnail_button)
         movies_control_layout.addWidget(self.refresh_button)
         middle_layout.addLayout(movies_control_layout)
         
         # 影片列表 - 增加高度以占满中间栏
-        self.movies_table = QTableWidget(0, 3)
-        self.movies_table.setHorizontalHeaderLabels(["影片编号", "影片名称", "发行日期"])
+        # 数据保存在模型中，代理模型负责本地排序和筛选
+        self.movie_model = MovieTableModel(self)
+        self.movie_proxy = QSortFilterProxyModel(self)
+        self.movie_proxy.setSourceModel(self.movie_model)
+        self.movie_proxy.setFilterKeyColumn(-1)  # 匹配所有列
+        self.movie_proxy.setFilterCaseSensitivity(Qt.CaseInsensitive)
+        self.movie_filter_input.textChanged.connect(self.on_movie_filter_changed)
+        
+        self.movies_table = QTableView()
+        self.movies_table.setModel(self.movie_proxy)
+        self.movies_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.movies_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.movies_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)  # 固定行高，无需逐行计算
+        # 默认按发行日期排序（新的在前），点击表头可改变排序
+        self.movies_table.setSortingEnabled(True)
+        self.movies_table.sortByColumn(2, Qt.DescendingOrder)
         self.movies_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeToContents)
         
         # 设置影片名称列宽，使其能显示约18个汉字
@@ -1630,9 +2859,22 @@ class JavbusGUI(QMainWindow):
         self.movies_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeToContents)
         self.movies_table.setColumnWidth(2, 100)  # 设置日期列固定宽度，确保完全显示10个字符
         
-        self.movies_table.itemClicked.connect(self.on_movie_selected)
+        self.movies_table.clicked.connect(self.on_movie_selected)
+        
+        # 可见行、鼠标悬停行和选中行变化时重新安排详情预取
+        self.movies_table.setMouseTracking(True)
+        self.movies_table.entered.connect(lambda index: self.on_movie_row_hovered(index.row(), index.column()))
+        self.movies_table.selectionModel().currentChanged.connect(lambda *args: self.detail_prefetch_timer.start())
+        self.movies_table.verticalScrollBar().valueChanged.connect(lambda value: self.detail_prefetch_timer.start())
         middle_layout.addWidget(self.movies_table, 1)  # 添加拉伸因子1，使表格占满剩余空间
         
+        # 封面缩略图显示在影片编号列
+        self.default_row_height = self.movies_table.verticalHeader().defaultSectionSize()
+        self.movies_table.setIconSize(QSize(ThumbnailLoader.THUMB_WIDTH, ThumbnailLoader.THUMB_HEIGHT))
+        self.thumbnail_button.setChecked(CURRENT_CONFIG.get("show_thumbnails", False))
+        self.apply_thumbnail_mode(self.thumbnail_button.isChecked())
+        self.thumbnail_button.toggled.connect(self.on_thumbnail_toggled)
+        
         # 分页控制
         pagination_layout = QHBoxLayout()
         self.page_label = QLabel("第1页")
@@ -1656,7 +2898,7 @@ class JavbusGUI(QMainWindow):
         
         # 图片预览区
         self.preview_label = QLabel()
-        self.preview_label.setFixedSize(600, 400)  # 修改为600*400
+        self.preview_label.setFixedSize(self.PREVIEW_WIDTH, self.PREVIEW_HEIGHT)  # 修改为600*400
         self.preview_label.setAlignment(Qt.AlignCenter)
         self.preview_label.setStyleSheet("border: 1px solid #cccccc;")
         self.preview_label.setText("选择影片查看图片")
@@ -1760,8 +3002,13 @@ class JavbusGUI(QMainWindow):
         main_splitter.setSizes([300, 780, 600])  # 调整初始分割比例，增加中间栏的宽度
         
         # 初始化图片预览相关变量
+        # 图集按位置保存：current_image_slots为(图片类型, 序号)，封面在前、预览图按序号排列；
+        # current_images为对应的图片路径，尚未下载的位置为None
         self.current_images = []
+        self.current_image_slots = []
         self.current_image_index = 0
+        self.gallery_movie_data = None  # 当前影片的详情，按需下载图片时使用
+        self.gallery_requested = set()  # 已提交下载的图片位置
     
     def create_menu_bar(self):
         """创建菜单栏"""
@@ -1779,6 +3026,7 @@ class JavbusGUI(QMainWindow):
         """打开选项设置对话框"""
         api_url, watch_url_prefix = OptionsDialog.get_options(self, self.api_base_url, self.watch_url_prefix)
         self.api_base_url = api_url
+        self.detail_prefetcher.api_base_url = api_url
         self.watch_url_prefix = watch_url_prefix
     
     def search_stars(self):
@@ -1787,9 +3035,6 @@ class JavbusGUI(QMainWindow):
             QMessageBox.warning(self, "警告", "请输入演员名称")
             return
         
-        # 清理批量下载状态，防止搜索时触发批量下载
-        self.cleanup_batch_download_state()
-        
         # 保存搜索历史
         self.db.save_search_history(keyword)
         
@@ -1798,36 +3043,84 @@ class JavbusGUI(QMainWindow):
         self.progress_bar.setVisible(True)
         self.progress_bar.setRange(0, 0)  # 设置为不确定模式
         
-        # 创建并启动搜索线程
-        self.search_thread = StarSearchThread(self.api_base_url, keyword, self.db)
-        self.search_thread.search_complete.connect(self.on_search_complete)
-        self.search_thread.search_error.connect(self.on_search_error)
-        self.search_thread.finished.connect(self.on_search_finished)
-        self.search_thread.start()
+        # 清空演员列表，搜索结果将逐步加入
+        self.stars_list.clear()
+        self.search_result_ids = set()
+        
+        # 提交搜索任务，上一次搜索如果还在进行会被取消，其结果将被忽略
+        task = StarSearchTask(self.api_base_url, keyword, self.db)
+        task.search_partial.connect(self.on_search_partial)
+        task.search_complete.connect(self.on_search_complete)
+        task.search_error.connect(self.on_search_error)
+        task.finished.connect(self.on_search_finished)
+        self.task_scheduler.submit(task, TaskScheduler.PRIORITY_HIGH, "star_search")
+    
+    def add_star_results(self, stars):
+        """将演员加入列表，跳过已显示的演员"""
+        for star in stars:
+            star_id = star.get('id', '')
+            if star_id in self.search_result_ids:
+                continue
+            self.search_result_ids.add(star_id)
+            self.stars_list.addItem(f"{star.get('name', '')} ({star_id})")
+    
+    def on_search_partial(self, stars):
+        # 忽略已被新搜索取代的任务发来的结果
+        if self.sender() is not self.task_scheduler.current("star_search"):
+            return
+        self.add_star_results(stars)
     
     def on_search_complete(self, stars):
+        if self.sender() is not self.task_scheduler.current("star_search"):
+            return
         # 更新列表
-        self.stars_list.clear()
-        for star in stars:
-            self.stars_list.addItem(f"{star.get('name', '')} ({star.get('id', '')})")
+        self.add_star_results(stars)
         
         if not stars:
             QMessageBox.information(self, "提示", "未找到匹配的演员")
     
     def on_search_error(self, error_msg):
+        if self.sender() is not self.task_scheduler.current("star_search"):
+            return
         QMessageBox.critical(self, "错误", error_msg)
     
     def on_search_finished(self):
+        if self.sender() is not self.task_scheduler.current("star_search"):
+            return
         # 恢复搜索按钮，隐藏进度条
         self.search_button.setEnabled(True)
         self.progress_bar.setVisible(False)
     
+    def update_star_suggestions(self):
+        """根据输入内容更新演员联想列表"""
+        text = self.search_input.text().strip()
+        suggestions = self.db.suggest_stars(text, limit=15) if text else []
+        self.star_completer_model.setStringList(
+            [f"{star['name']} ({star['id']})" for star in suggestions]
+        )
+        if suggestions:
+            self.star_completer.complete()
+    
+    def on_star_suggestion_activated(self, text):
+        """选中联想项后直接加载该演员"""
+        name = text.rsplit(" (", 1)[0]
+        # 补全器会先把选中项写入输入框，这里延迟改回演员名
+        QTimer.singleShot(0, lambda: self.search_input.setText(name))
+        
+        self.stars_list.clear()
+        self.search_result_ids = set()
+        self.stars_list.addItem(text)
+        item = self.stars_list.item(0)
+        self.stars_list.setCurrentItem(item)
+        self.on_star_selected(item)
+    
     def on_star_selected(self, item):
         # 从列表项中提取演员ID
         text = item.text()
         star_id = text.split("(")[-1].strip(")")
         self.current_star_id = star_id
         self.current_page = 1
+        self.star_page_cursors = {}
         
         # 清空上一次的影片演员信息
         self.stars_text.setText("演员: ")
@@ -1847,23 +3140,53 @@ class JavbusGUI(QMainWindow):
         # 获取演员影片（先加载影片列表，提高响应速度）
         self.load_star_movies(star_id, self.current_page)
         
-        # 获取演员详情（在加载影片后再获取详情，避免阻塞）
-        QTimer.singleShot(100, lambda: self.load_star_info(star_id))
+        # 在后台获取演员详情和头像
+        self.load_star_info(star_id)
         
         # 启用刷新按钮
         self.refresh_button.setEnabled(True)
 
-    def on_movie_selected(self, item):
-        """当选择影片时的处理"""
-        # 清理之前的异步线程
-        self._cleanup_threads()
+    def movie_id_at(self, row):
+        """获取影片列表中第row行（按当前的排序和筛选）的影片编号"""
+        index = self.movie_proxy.index(row, 0)
+        return index.data() if index.isValid() else ""
+    
+    def apply_thumbnail_mode(self, enabled):
+        """切换影片列表是否显示封面缩略图"""
+        self.movie_model.set_thumbnail_loader(self.thumbnail_loader if enabled else None)
+        if enabled:
+            self.movies_table.verticalHeader().setDefaultSectionSize(ThumbnailLoader.THUMB_HEIGHT + 6)
+        else:
+            self.thumbnail_loader.cancel_pending()
+            self.movies_table.verticalHeader().setDefaultSectionSize(self.default_row_height)
+    
+    def on_thumbnail_toggled(self, checked):
+        """切换缩略图显示并保存到配置"""
+        self.apply_thumbnail_mode(checked)
+        CURRENT_CONFIG["show_thumbnails"] = checked
+        config = load_config()
+        config["show_thumbnails"] = checked
+        save_config(config)
+    
+    def on_movie_filter_changed(self, text):
+        """按输入的文字筛选当前影片列表"""
+        self.movie_proxy.setFilterFixedString(text.strip())
+        self.hovered_movie_row = -1
+        self.detail_prefetch_timer.start()
+    
+    def on_movie_selected(self, index):
+        """当选择影片时的处理
         
-        # 获取选中的行
-        row = item.row()
+        详情、磁力链接、简介和图片都在后台加载并逐步更新界面；每次选择都会生成新的请求序号，
+        之前尚未完成的加载不再等待，其结果到达时会被丢弃。
+        """
+        # 取消之前的异步加载，不等待其结束
+        self.cancel_movie_tasks()
         
         # 获取影片ID
-        movie_id = self.movies_table.item(row, 0).text()
+        movie_id = self.movie_id_at(index.row())
         self.current_movie_id = movie_id
+        self.detail_request_token += 1
         
         # 启用播放按钮
         self.play_video_button.setEnabled(True)
@@ -1886,234 +3209,216 @@ class JavbusGUI(QMainWindow):
         # 重置图片预览
         self.preview_label.setText("正在加载图片...")
         self.current_images = []
+        self.current_image_slots = []
         self.current_image_index = 0
+        self.gallery_movie_data = None
+        self.gallery_requested = set()
         self.image_index_label.setText("0/0")
         self.prev_image_button.setEnabled(False)
         self.next_image_button.setEnabled(False)
         
         try:
-            # 创建保存目录
-            save_dir = os.path.join("buspic", movie_id)
-            os.makedirs(save_dir, exist_ok=True)
-            
-            # 第一步：立即显示本地已有的封面图片（如果有的话）
-            local_images = self.get_local_images(save_dir)
+            # 第一步：立即显示图片仓库中已有的封面和预览图（如果有的话）
+            local_images = self.get_local_images(movie_id)
             if local_images:
-                # 找到封面（通常是文件名以cover开头的图片）
-                cover_images = [img for img in local_images if os.path.basename(img).startswith('cover')]
-                if cover_images:
-                    # 先显示封面
-                    self.current_images = cover_images
-                    self.current_image_index = 0
-                    self.display_current_image()
-                    
-                    # 添加其他预览图到图片列表
-                    other_images = [img for img in local_images if not os.path.basename(img).startswith('cover')]
-                    self.current_images.extend(other_images)
-                    
-                    # 更新图片计数
-                    self.image_index_label.setText(f"1/{len(self.current_images)}")
-                    self.next_image_button.setEnabled(len(self.current_images) > 1)
-            
-            # 第二步：从数据库或API获取基础影片信息并立即显示
-            # 先从数据库中获取影片信息
-            movie_data = self.db.get_movie(movie_id)
-            
-            # 如果数据库中没有，则从API获取
-            if not movie_data:
-                self.progress_bar.setValue(20)
-                response = requests.get(f"{self.api_base_url}/movies/{movie_id}")
-                
-                if response.status_code != 200:
-                    QMessageBox.warning(self, "错误", f"获取影片详情失败: {response.status_code}")
-                    self.progress_bar.setVisible(False)
-                    return
+                # 封面在前，预览图按序号排列
+                self.current_image_slots = [(role, index) for role, index, path in local_images]
+                self.current_images = [path for role, index, path in local_images]
+                self.current_image_index = 0
+                self.display_current_image()
                 
-                movie_data = response.json()
-                # 保存到数据库
-                self.db.save_movie(movie_data)
+                # 更新图片计数
+                self.image_index_label.setText(f"1/{len(self.current_images)}")
+                self.next_image_button.setEnabled(len(self.current_images) > 1)
             
-            self.progress_bar.setValue(40)
-            
-            # 立即显示基础信息：片名、厂牌、类别、演员信息
-            # 设置片名信息
-            title = movie_data.get("title", "未知标题")
-            
-            # 更新片名显示
-            self.title_text.setText(f'片名: {title}')
-            
-            # 设置厂牌信息
-            producer = movie_data.get("producer", {})
-            producer_name = producer.get("name", "未知厂牌")
-            producer_id = producer.get("id", "")
-            
-            # 更新厂牌信息
-            self.producer_text.setText(f'厂牌: <a href="{producer_id}">{producer_name}</a>')
-            
-            # 设置类别信息
-            genres = movie_data.get("genres", [])
-            genres_text = "类别: "
-            for i, genre in enumerate(genres):
-                genre_name = genre.get("name", "")
-                genre_id = genre.get("id", "")
-                if i > 0:
-                    genres_text += ", "
-                genres_text += f'<a href="{genre_id}">{genre_name}</a>'
-            
-            self.genres_text.setText(genres_text)
-            
-            # 设置演员信息
-            stars = movie_data.get("stars", [])
-            stars_text = "演员: "
-            for i, star in enumerate(stars):
-                star_name = star.get("name", "")
-                star_id = star.get("id", "")
-                if i > 0:
-                    stars_text += ", "
-                stars_text += f'<a href="{star_id}">{star_name}</a>'
-            
-            self.stars_text.setText(stars_text)
-            
-            # 显示磁力链接（从API获取，不需要网站爬取）
-            self.display_magnets_from_movie_data(movie_data)
-            
-            # 进度条更新
-            self.progress_bar.setValue(60)
-            
-            # 重置复制按钮状态
-            self.copy_magnet_button.setEnabled(False)
-            
-            # 第三步：异步加载需要从网站爬取的信息
-            
-            # 简介信息加载（异步）
-            self.summary_thread = QThread()
-            self.scraper_worker = SummaryWorker(movie_id, movie_data, self.db)
-            self.scraper_worker.moveToThread(self.summary_thread)
-            self.summary_thread.started.connect(self.scraper_worker.get_summary)
-            self.scraper_worker.summary_ready.connect(self.on_summary_loaded)
-            self.scraper_worker.summary_error.connect(self.on_summary_error)
-            
-            # 连接翻译信号
-            self.scraper_worker.translation_ready.connect(self.on_translation_ready)
-            self.scraper_worker.translation_error.connect(self.on_translation_error)
-            self.scraper_worker.title_translation_ready.connect(self.on_title_translation_ready)
-            
-            self.summary_thread.start()
-            
-            # 图片下载（异步，如果没有本地图片）
-            if not local_images:
-                # 创建并启动图片下载线程
-                self.image_download_thread = ImageDownloadThread(movie_id, self.api_base_url, movie_data, save_dir)
-                self.image_download_thread.image_downloaded.connect(self.on_image_downloaded)
-                self.image_download_thread.download_complete.connect(self.on_images_download_complete)
-                self.image_download_thread.download_error.connect(self.on_images_download_error)
-                self.image_download_thread.start()
-            else:
-                # 已经完成所有任务，隐藏进度条
-                self.progress_bar.setValue(100)
-                self.progress_bar.setVisible(False)
+            # 第二步：在后台获取影片详情和磁力链接
+            task = MovieDetailTask(self.detail_request_token, movie_id, self.api_base_url,
+                                   self.db, self.magnet_cache)
+            task.detail_loaded.connect(self.on_movie_detail_loaded)
+            task.magnets_loaded.connect(self.on_movie_magnets_loaded)
+            task.detail_error.connect(self.on_movie_detail_error)
+            self.task_scheduler.submit(task, TaskScheduler.PRIORITY_HIGH, "movie_detail")
             
         except Exception as e:
             QMessageBox.critical(self, "错误", f"获取影片详情时出错: {str(e)}")
             self.progress_bar.setVisible(False)
     
+    def on_movie_detail_loaded(self, token, movie_data):
+        """影片详情加载完成：显示基础信息，并开始加载简介和图片"""
+        if token != self.detail_request_token:
+            return
+        
+        movie_id = self.current_movie_id
+        self.progress_bar.setValue(40)
+        
+        # 立即显示基础信息：片名、厂牌、类别、演员信息
+        # 设置片名信息
+        title = movie_data.get("title", "未知标题")
+        
+        # 更新片名显示
+        self.title_text.setText(f'片名: {title}')
+        
+        # 设置厂牌信息
+        producer = movie_data.get("producer", {})
+        producer_name = producer.get("name", "未知厂牌")
+        producer_id = producer.get("id", "")
+        
+        # 更新厂牌信息
+        self.producer_text.setText(f'厂牌: <a href="{producer_id}">{producer_name}</a>')
+        
+        # 设置类别信息
+        genres = movie_data.get("genres", [])
+        genres_text = "类别: "
+        for i, genre in enumerate(genres):
+            genre_name = genre.get("name", "")
+            genre_id = genre.get("id", "")
+            if i > 0:
+                genres_text += ", "
+            genres_text += f'<a href="{genre_id}">{genre_name}</a>'
+        
+        self.genres_text.setText(genres_text)
+        
+        # 设置演员信息
+        stars = movie_data.get("stars", [])
+        stars_text = "演员: "
+        for i, star in enumerate(stars):
+            star_name = star.get("name", "")
+            star_id = star.get("id", "")
+            if i > 0:
+                stars_text += ", "
+            stars_text += f'<a href="{star_id}">{star_name}</a>'
+        
+        self.stars_text.setText(stars_text)
+        
+        # 进度条更新
+        self.progress_bar.setValue(60)
+        
+        # 重置复制按钮状态
+        self.copy_magnet_button.setEnabled(False)
+        
+        # 第三步：异步加载需要从网站爬取的信息
+        
+        # 简介信息加载（异步）
+        summary_task = SummaryTask(movie_id, movie_data, self.db)
+        summary_task.summary_ready.connect(self.on_summary_loaded)
+        summary_task.summary_error.connect(self.on_summary_error)
+        
+        # 连接翻译信号
+        summary_task.translation_ready.connect(self.on_translation_ready)
+        summary_task.translation_error.connect(self.on_translation_error)
+        summary_task.title_translation_ready.connect(self.on_title_translation_ready)
+        
+        self.task_scheduler.submit(summary_task, TaskScheduler.PRIORITY_NORMAL, "movie_summary")
+        
+        # 根据影片详情确定图集中的全部位置，尚未下载的图片显示为占位
+        self.gallery_movie_data = movie_data
+        slots = [("cover", 0)] if movie_data.get("img") else []
+        slots += [("sample", i + 1) for i, sample in enumerate(movie_data.get("samples", [])) if sample.get("src")]
+        self.set_gallery_slots(slots)
+        
+        # 图片下载（异步）：按需模式只下载封面和当前图片的下一张，否则下载完整图集
+        if CURRENT_CONFIG.get("lazy_gallery", True):
+            positions = [0, self.current_image_index, self.current_image_index + 1]
+        else:
+            positions = range(len(self.current_image_slots))
+        requested = self.request_gallery_images(positions)
+        if self.current_images:
+            self.display_current_image()
+        if not requested:
+            # 已经完成所有任务，隐藏进度条
+            self.progress_bar.setValue(100)
+            self.progress_bar.setVisible(False)
+    
+    def on_movie_magnets_loaded(self, token, magnets):
+        """磁力链接加载完成"""
+        if token != self.detail_request_token:
+            return
+        self.magnet_list.clear()
+        self.add_magnet_items(magnets)
+    
+    def on_movie_detail_error(self, token, error_msg):
+        """影片详情加载失败"""
+        if token != self.detail_request_token:
+            return
+        self.progress_bar.setVisible(False)
+        QMessageBox.warning(self, "错误", error_msg)
+    
     def load_star_info(self, star_id):
-        try:
-            # 先从数据库中获取演员信息
-            star_info = self.db.get_star(star_id)
-            
-            # 如果数据库中没有，则从API获取
-            if not star_info:
-                response = requests.get(f"{self.api_base_url}/stars/{star_id}")
-                
-                if response.status_code != 200:
-                    QMessageBox.warning(self, "错误", f"获取演员信息失败: {response.status_code}")
-                    return
-                
-                star_info = response.json()
-                # 保存到数据库
-                self.db.save_star(star_info)
-            
-            # 更新演员信息
-            self.name_label.setText(f"姓名: {star_info.get('name', '')}")
-            self.birthday_label.setText(f"生日: {star_info.get('birthday', '')}")
-            self.age_label.setText(f"年龄: {star_info.get('age', '')}")
-            self.height_label.setText(f"身高: {star_info.get('height', '')}")
-            self.bust_label.setText(f"胸围: {star_info.get('bust', '')}")
-            self.waistline_label.setText(f"腰围: {star_info.get('waistline', '')}")
-            self.hipline_label.setText(f"臀围: {star_info.get('hipline', '')}")
-            self.birthplace_label.setText(f"出生地: {star_info.get('birthplace', '')}")
-            self.hobby_label.setText(f"爱好: {star_info.get('hobby', '')}")
-            
-            # 加载头像
-            avatar_url = star_info.get('avatar')
-            if avatar_url:
-                try:
-                    # 保存头像的目录和文件路径
-                    save_dir = os.path.join("buspic", "stars")
-                    os.makedirs(save_dir, exist_ok=True)
-                    file_extension = os.path.splitext(avatar_url)[1] or ".jpg"
-                    save_path = os.path.join(save_dir, f"{star_id}{file_extension}")
-                    
-                    # 检查本地是否已有头像文件
-                    if os.path.exists(save_path) and os.path.getsize(save_path) > 0:
-                        # 如果本地已有头像文件，直接加载
-                        pixmap = QPixmap(save_path).scaled(200, 200, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                        self.avatar_label.setPixmap(pixmap)
-                        print(f"从本地加载演员头像: {save_path}")
-                    else:
-                        # 设置请求头，模拟浏览器行为
-                        headers = {
-                            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-                            "Referer": "https://www.javbus.com/",
-                            "Accept": "image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8",
-                            "Accept-Language": "zh-CN,zh;q=0.9,en-US;q=0.8,en;q=0.7",
-                            "Cache-Control": "no-cache",
-                            "Pragma": "no-cache"
-                        }
-                        
-                        # 下载头像
-                        image_response = requests.get(avatar_url, headers=headers, timeout=10)
-                        if image_response.status_code != 200:
-                            # 尝试使用另一种方法
-                            session = requests.Session()
-                            session.headers.update(headers)
-                            # 先访问演员页面建立会话
-                            session.get(f"https://www.javbus.com/star/{star_id}")
-                            # 再次尝试下载图片
-                            image_response = session.get(avatar_url, timeout=10)
-                            
-                            if image_response.status_code != 200:
-                                self.avatar_label.setText("头像加载失败")
-                                return
-                        
-                        # 显示头像
-                        image = QImage()
-                        image.loadFromData(image_response.content)
-                        pixmap = QPixmap(image).scaled(200, 200, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                        self.avatar_label.setPixmap(pixmap)
-                        
-                        # 保存头像
-                        with open(save_path, "wb") as f:
-                            f.write(image_response.content)
-                        print(f"下载并保存演员头像: {save_path}")
-                    
-                except Exception as e:
-                    self.avatar_label.setText("头像加载失败")
-                    print(f"加载头像失败: {str(e)}")
-            else:
-                self.avatar_label.setText("无头像")
-                
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"获取演员信息失败: {str(e)}")
+        """在后台加载演员资料和头像，已看过的演员头像从内存直接显示"""
+        self.star_info_token += 1
+        
+        cached_avatar = self.avatar_cache.get(star_id)
+        if cached_avatar is not None:
+            self.avatar_cache.move_to_end(star_id)
+            self.avatar_label.setPixmap(cached_avatar)
+        
+        # 之前尚未完成的演员加载会被取消
+        task = StarInfoTask(self.star_info_token, star_id, self.api_base_url, self.db, self.image_store,
+                            load_avatar=cached_avatar is None)
+        task.info_loaded.connect(self.on_star_info_loaded)
+        task.avatar_loaded.connect(self.on_star_avatar_loaded)
+        task.avatar_failed.connect(self.on_star_avatar_failed)
+        task.info_error.connect(self.on_star_info_error)
+        self.task_scheduler.submit(task, TaskScheduler.PRIORITY_HIGH, "star_info")
+    
+    def on_star_info_loaded(self, token, star_info):
+        """演员资料加载完成"""
+        if token != self.star_info_token:
+            return
+        
+        # 更新演员信息
+        self.name_label.setText(f"姓名: {star_info.get('name', '')}")
+        self.birthday_label.setText(f"生日: {star_info.get('birthday', '')}")
+        self.age_label.setText(f"年龄: {star_info.get('age', '')}")
+        self.height_label.setText(f"身高: {star_info.get('height', '')}")
+        self.bust_label.setText(f"胸围: {star_info.get('bust', '')}")
+        self.waistline_label.setText(f"腰围: {star_info.get('waistline', '')}")
+        self.hipline_label.setText(f"臀围: {star_info.get('hipline', '')}")
+        self.birthplace_label.setText(f"出生地: {star_info.get('birthplace', '')}")
+        self.hobby_label.setText(f"爱好: {star_info.get('hobby', '')}")
+    
+    def on_star_avatar_loaded(self, token, star_id, image):
+        """头像加载完成，加入内存缓存"""
+        pixmap = QPixmap.fromImage(image)
+        self.avatar_cache[star_id] = pixmap
+        self.avatar_cache.move_to_end(star_id)
+        while len(self.avatar_cache) > self.AVATAR_CACHE_SIZE:
+            self.avatar_cache.popitem(last=False)
+        
+        if token == self.star_info_token:
+            self.avatar_label.setPixmap(pixmap)
+    
+    def on_star_avatar_failed(self, token, message):
+        if token == self.star_info_token:
+            self.avatar_label.setText(message)
+    
+    def on_star_info_error(self, token, error_msg):
+        if token == self.star_info_token:
+            QMessageBox.warning(self, "错误", error_msg)
     
     def load_star_movies(self, star_id, page):
+        title_search = self.title_search_radio.isChecked()
+        self.current_list_request = {
+            "mode": "title" if title_search else "star",
+            "target": star_id,
+            "page": page,
+            "magnet_only": self.magnet_only_checkbox.isChecked(),
+            "star_name": ""
+        }
+        
+        # 已加载或预取过的页面直接从内存显示，之前尚未完成的加载不再需要
+        cached = self.page_cache.get(self.page_cache_key(self.current_list_request))
+        if cached:
+            self.task_scheduler.cancel_group("movie_list")
+            self.on_movies_loaded(*cached)
+            return
+        
         # 显示进度条
         self.progress_bar.setVisible(True)
         self.progress_bar.setRange(0, 0)  # 设置为不确定模式
         
         # 根据搜索模式决定搜索参数
-        if self.title_search_radio.isChecked():
+        if title_search:
             # 获取演员名称
             for i in range(self.stars_list.count()):
                 item = self.stars_list.item(i)
@@ -2137,43 +3442,37 @@ class JavbusGUI(QMainWindow):
                 else:
                     star_name = star_info.get('name', '')
             
-            # 创建并启动加载线程 - 搜索影片名称中包含演员名称的影片
-            self.movie_load_thread = MovieLoadThread(self.api_base_url, star_id, page, self.db, star_name, True, self.magnet_only_checkbox.isChecked())
-        else:
-            # 创建并启动加载线程 - 搜索演员参演的所有影片
-            self.movie_load_thread = MovieLoadThread(self.api_base_url, star_id, page, self.db, "", False, self.magnet_only_checkbox.isChecked())
+            self.current_list_request["star_name"] = star_name
             
-        self.movie_load_thread.load_complete.connect(self.on_movies_loaded)
-        self.movie_load_thread.load_error.connect(self.on_movies_load_error)
-        self.movie_load_thread.finished.connect(self.on_movies_load_finished)
-        self.movie_load_thread.start()
+            # 创建加载任务 - 搜索影片名称中包含演员名称的影片
+            task = MovieLoadTask(self.api_base_url, self.db, "title", star_id, page,
+                                 self.magnet_only_checkbox.isChecked(), star_name)
+        else:
+            # 创建加载任务 - 搜索演员参演的所有影片
+            # 已知上一页末尾的排序键时，数据库分页使用键集分页
+            after = self.star_page_cursors.get((star_id, page))
+            task = MovieLoadTask(self.api_base_url, self.db, "star", star_id, page,
+                                 self.magnet_only_checkbox.isChecked(), "", after)
+            
+        # 按发起请求时的参数缓存结果，避免与之后的请求混淆
+        cache_key = self.page_cache_key(self.current_list_request)
+        task.load_complete.connect(
+            lambda movies, pagination: self.page_cache.put(cache_key, movies, pagination))
+        task.load_complete.connect(self.on_movies_loaded)
+        task.load_error.connect(self.on_movies_load_error)
+        task.finished.connect(self.on_movies_load_finished)
+        self.task_scheduler.submit(task, TaskScheduler.PRIORITY_HIGH, "movie_list")
+    
+    def is_superseded_list_task(self):
+        """当前槽函数是否由已被取代的影片列表任务触发（直接调用时返回False）"""
+        sender = self.sender()
+        return isinstance(sender, MovieLoadTask) and sender is not self.task_scheduler.current("movie_list")
     
     def on_movies_loaded(self, movies, pagination):
-        # 更新影片表格
-        self.movies_table.setRowCount(0)
-        
-        # 按发行日期排序（新的在前）
-        sorted_movies = sorted(movies, key=lambda x: x.get("date", ""), reverse=True)
-        
-        for movie in sorted_movies:
-            row = self.movies_table.rowCount()
-            self.movies_table.insertRow(row)
-            
-            # 设置影片编号
-            movie_id = movie.get("id", "")
-            self.movies_table.setItem(row, 0, QTableWidgetItem(movie_id))
-            
-            # 设置影片名称 - 去除与影片编号重复的部分
-            title = movie.get("title", "")
-            # 如果标题以影片编号开头，则去除这部分
-            if movie_id and title.startswith(movie_id):
-                title = title[len(movie_id):].strip()
-            title_item = QTableWidgetItem(title)
-            title_item.setToolTip(title)
-            self.movies_table.setItem(row, 1, title_item)
-            
-            # 设置发行日期
-            self.movies_table.setItem(row, 2, QTableWidgetItem(movie.get("date", "")))
+        if self.is_superseded_list_task():
+            return
+        # 更新影片表格，代理模型按当前排序列（默认发行日期，新的在前）排序
+        self.movie_model.set_movies(movies)
         
         # 更新分页信息
         current_page = pagination.get("currentPage", 1)
@@ -2188,6 +3487,16 @@ class JavbusGUI(QMainWindow):
         self.next_page_button.setEnabled(has_next_page)
         self.prev_page_button.setEnabled(current_page > 1)
         
+        # 记录数据库分页的排序键，下一页从这里继续
+        if self.current_star_id and has_next_page and pagination.get("nextCursor"):
+            self.star_page_cursors[(self.current_star_id, current_page + 1)] = pagination["nextCursor"]
+        
+        # 在后台预取相邻页面和可见影片的详情
+        if self.current_list_request:
+            self.schedule_page_prefetch(pagination)
+        self.hovered_movie_row = -1
+        self.detail_prefetch_timer.start()
+        
         # 更新窗口标题
         if self.current_star_id:
             # 获取演员名称
@@ -2201,11 +3510,6 @@ class JavbusGUI(QMainWindow):
                 magnet_filter = "（仅含磁力）" if self.magnet_only_checkbox.isChecked() else ""
                 self.setWindowTitle(f'JavBus简易版 - 演员: {star_name} {magnet_filter}')
         
-        # 在方法最后添加对批量下载的支持
-        # 检查是否处于批量下载模式
-        if hasattr(self, 'batch_download_pages') and hasattr(self, 'batch_download_current_page_index') and not hasattr(self, 'batch_download_finished'):
-            self.process_batch_download_page_loaded()
-
     def calculate_total_pages(self, pagination, current_page):
         """智能计算总页数"""
         # 默认至少有1页
@@ -2236,18 +3540,101 @@ class JavbusGUI(QMainWindow):
         
         return total_pages
     
+    def page_cache_key(self, request, page=None):
+        """影片列表页的缓存键"""
+        return (request["mode"], request["target"], page or request["page"], request["magnet_only"])
+    
+    def schedule_page_prefetch(self, pagination):
+        """当前页加载完成后，在后台预取下一页（以及可选的上一页）"""
+        if not CURRENT_CONFIG.get("prefetch_pages", True) or not self.current_list_request:
+            return
+        
+        request = self.current_list_request
+        page = pagination.get("currentPage", request["page"])
+        pages = []
+        if pagination.get("hasNextPage"):
+            pages.append(page + 1)
+        if CURRENT_CONFIG.get("prefetch_prev_page", False) and page > 1:
+            pages.append(page - 1)
+        
+        page_requests = []
+        for prefetch_page in pages:
+            key = self.page_cache_key(request, prefetch_page)
+            if key in self.page_cache:
+                continue
+            page_requests.append(dict(request, key=key, page=prefetch_page,
+                                      after=self.star_page_cursors.get((request["target"], prefetch_page))
+                                      if request["mode"] == "star" else None))
+        if not page_requests:
+            return
+        
+        # 用户已经翻到其他页面，之前的预取不再需要，提交新任务时会被取消
+        task = PagePrefetchTask(self.api_base_url, self.db, self.image_store, page_requests,
+                                CURRENT_CONFIG.get("prefetch_cover_limit", 30))
+        task.page_prefetched.connect(self.on_page_prefetched)
+        self.task_scheduler.submit(task, TaskScheduler.PRIORITY_LOW, "page_prefetch", background=True)
+    
+    def on_movie_row_hovered(self, row, column):
+        """鼠标移到新的影片行时提高该行的预取优先级"""
+        if row != self.hovered_movie_row:
+            self.hovered_movie_row = row
+            self.detail_prefetch_timer.start()
+    
+    def schedule_detail_prefetch(self):
+        """按选中行、悬停行、与选中行的距离为可见影片安排详情预取，未处理的旧任务作废"""
+        row_count = self.movie_proxy.rowCount()
+        if row_count == 0:
+            self.detail_prefetcher.cancel()
+            return
+        
+        first = self.movies_table.rowAt(0)
+        last = self.movies_table.rowAt(self.movies_table.viewport().height() - 1)
+        first = first if first >= 0 else 0
+        last = last if last >= 0 else row_count - 1
+        
+        selected = self.movies_table.currentIndex().row()
+        anchor = selected if selected >= 0 else first
+        
+        # 可见行加上选中行附近的几行
+        rows = set(range(first, last + 1))
+        if selected >= 0:
+            rows.update(range(max(0, selected - 3), min(row_count, selected + 4)))
+        
+        prioritized = []
+        for row in rows:
+            movie_id = self.movie_id_at(row)
+            if not movie_id:
+                continue
+            if row == selected:
+                priority = 0
+            elif row == self.hovered_movie_row:
+                priority = 1
+            else:
+                priority = 2 + abs(row - anchor)
+            prioritized.append((priority, movie_id))
+        
+        self.detail_prefetcher.schedule(prioritized)
+    
+    def on_page_prefetched(self, key, movies, pagination):
+        """预取的页面加入缓存"""
+        self.page_cache.put(key, movies, pagination)
+        mode, target, page, _ = key
+        if mode == "star" and pagination.get("hasNextPage") and pagination.get("nextCursor"):
+            self.star_page_cursors[(target, page + 1)] = pagination["nextCursor"]
+    
     def on_movies_load_error(self, error_msg):
+        if self.is_superseded_list_task():
+            return
         QMessageBox.critical(self, "错误", error_msg)
     
     def on_movies_load_finished(self):
+        if self.is_superseded_list_task():
+            return
         # 隐藏进度条
         self.progress_bar.setVisible(False)
     
     def load_next_page(self):
         """加载下一页结果"""
-        # 清理批量下载状态，防止翻页时触发批量下载
-        self.cleanup_batch_download_state()
-        
         if self.current_star_id:
             # 演员查询模式
             self.current_page += 1
@@ -2259,9 +3646,6 @@ class JavbusGUI(QMainWindow):
     
     def load_prev_page(self):
         """加载上一页结果"""
-        # 清理批量下载状态，防止翻页时触发批量下载
-        self.cleanup_batch_download_state()
-        
         if self.current_page > 1:
             self.current_page -= 1
             if self.current_star_id:
@@ -2271,6 +3655,42 @@ class JavbusGUI(QMainWindow):
                 # 影片查询模式
                 self.load_movie_search_results(self.current_movie_keyword, self.current_page)
     
+    def set_gallery_slots(self, slots):
+        """设置图集中的图片位置，保留已有的图片和当前显示的位置"""
+        paths = dict(zip(self.current_image_slots, self.current_images))
+        current_slot = self.current_image_slots[self.current_image_index] if self.current_image_slots else None
+        slots = set(slots) | {slot for slot, path in paths.items() if path}
+        self.current_image_slots = sorted(slots, key=lambda slot: (0 if slot[0] == "cover" else 1, slot[1]))
+        self.current_images = [paths.get(slot) for slot in self.current_image_slots]
+        self.current_image_index = (self.current_image_slots.index(current_slot)
+                                    if current_slot in self.current_image_slots else 0)
+    
+    def request_gallery_images(self, positions):
+        """下载图集中指定位置尚未下载的图片，返回是否提交了下载任务"""
+        if not self.gallery_movie_data:
+            return False
+        slots = set()
+        for position in positions:
+            if 0 <= position < len(self.current_image_slots) and self.current_images[position] is None:
+                slot = self.current_image_slots[position]
+                if slot not in self.gallery_requested:
+                    slots.add(slot)
+        if not slots:
+            return False
+        self.gallery_requested.update(slots)
+        task = ImageDownloadTask(self.current_movie_id, self.api_base_url, self.gallery_movie_data,
+                                 self.image_store, slots)
+        task.image_downloaded.connect(self.on_image_downloaded)
+        task.download_complete.connect(self.on_images_download_complete)
+        task.download_error.connect(self.on_images_download_error)
+        # 翻页时提交的小任务互不取消，切换影片时由cancel_movie_tasks统一取消
+        self.task_scheduler.submit(task, TaskScheduler.PRIORITY_NORMAL, "movie_images", exclusive=False)
+        return True
+    
+    def is_current_image_task(self, task):
+        """图片下载任务是否属于当前影片且未被取消"""
+        return task is not None and not task.is_cancelled() and task.movie_id == self.current_movie_id
+    
     def show_prev_image(self):
         if self.current_images and self.current_image_index > 0:
             self.current_image_index -= 1
@@ -2286,11 +3706,26 @@ class JavbusGUI(QMainWindow):
             return
         
         image_path = self.current_images[self.current_image_index]
-        pixmap = QPixmap(image_path)
         
-        # 保持宽高比例缩放到固定区域
-        scaled_pixmap = pixmap.scaled(600, 400, Qt.KeepAspectRatio, Qt.SmoothTransformation)  # 修改为600*400
-        self.preview_label.setPixmap(scaled_pixmap)
+        if image_path is None:
+            # 尚未下载的图片，下载完成后由on_image_downloaded显示
+            self.preview_label.setText("正在加载图片...")
+        else:
+            # 已缩放的图片直接显示，否则在后台解码，完成后由on_preview_image_ready显示
+            pixmap = self.preview_loader.get(image_path)
+            if pixmap is not None:
+                self.preview_label.setPixmap(pixmap)
+            else:
+                self.preview_loader.request(image_path, TaskScheduler.PRIORITY_HIGH)
+        
+        # 按需下载当前图片，并预取下一张
+        self.request_gallery_images([self.current_image_index, self.current_image_index + 1])
+        
+        # 预先解码前后相邻的图片，翻页时可以立即显示
+        for offset in (1, -1, 2):
+            neighbour = self.current_image_index + offset
+            if 0 <= neighbour < len(self.current_images) and self.current_images[neighbour]:
+                self.preview_loader.request(self.current_images[neighbour])
         
         # 更新图片索引标签
         self.image_index_label.setText(f"{self.current_image_index + 1}/{len(self.current_images)}")
@@ -2299,6 +3734,11 @@ class JavbusGUI(QMainWindow):
         self.prev_image_button.setEnabled(self.current_image_index > 0)
         self.next_image_button.setEnabled(self.current_image_index < len(self.current_images) - 1)
     
+    def on_preview_image_ready(self, image_path):
+        """后台解码的预览图就绪，如果仍是当前图片则显示"""
+        if self.current_images and self.current_images[self.current_image_index] == image_path:
+            self.preview_label.setPixmap(self.preview_loader.get(image_path))
+    
     def on_summary_loaded(self, movie_id, summary):
         """处理异步加载的简介数据"""
         if movie_id == self.current_movie_id:  # 确保仍然是当前选中的影片
@@ -2309,7 +3749,7 @@ class JavbusGUI(QMainWindow):
             self.original_summary = summary
             
             # 检查是否所有异步任务都完成了
-            if not hasattr(self, 'image_download_thread') or not self.image_download_thread.isRunning():
+            if not self.task_scheduler.is_active("movie_images"):
                 self.progress_bar.setValue(100)
                 self.progress_bar.setVisible(False)
                 
@@ -2321,7 +3761,7 @@ class JavbusGUI(QMainWindow):
             self.progress_bar.setValue(80)
             
             # 检查是否所有异步任务都完成了
-            if not hasattr(self, 'image_download_thread') or not self.image_download_thread.isRunning():
+            if not self.task_scheduler.is_active("movie_images"):
                 self.progress_bar.setValue(100)
                 self.progress_bar.setVisible(False)
     
@@ -2352,121 +3792,42 @@ class JavbusGUI(QMainWindow):
                 self.summary_text.setText(f"简介: {self.original_summary}\n\n【翻译失败: {error_message}】")
             print(f"翻译错误: {error_message}")
                 
-    def on_images_download_complete(self):
-        """处理图片下载完成的信号"""
-        # 已有实现，但增加进度条更新
-        self.progress_bar.setValue(100)
-        self.progress_bar.setVisible(False)
-        
-    def on_images_download_error(self, error_msg):
-        """处理图片下载出错的情况"""
-        print(f"图片下载错误: {error_msg}")
-        # 即使图片下载失败，也不影响其他功能使用
-        self.progress_bar.setValue(100)
-        self.progress_bar.setVisible(False)
+    def add_magnet_items(self, magnets):
+        """将磁力链接添加到列表中"""
+        for magnet in magnets:
+            magnet_title = magnet.get("title", "")
+            magnet_link = magnet.get("link", "")
+            magnet_size = magnet.get("size", "")
+            # 兼容两种可能的日期字段名
+            magnet_date = magnet.get("shareDate", magnet.get("date", ""))
+            has_subtitle = magnet.get("hasSubtitle", False)
+            is_hd = magnet.get("isHD", False)
+            
+            # 创建列表项，添加更多信息和标记
+            subtitle_mark = "[中字]" if has_subtitle else ""
+            hd_mark = "[HD]" if is_hd else ""
+            item_text = f"{magnet_title} {subtitle_mark} {hd_mark} [{magnet_size}] ({magnet_date})"
+            item = QListWidgetItem(item_text)
+            item.setToolTip(magnet_link)  # 设置工具提示为完整链接
+            item.setData(Qt.UserRole, magnet_link)  # 存储链接数据
+            
+            # 设置不同类型的磁力链接的颜色
+            if has_subtitle:
+                item.setForeground(QColor(0, 128, 0))  # 绿色表示有字幕
+            elif is_hd:
+                item.setForeground(QColor(0, 0, 255))  # 蓝色表示高清
+            
+            self.magnet_list.addItem(item)
     
-    def display_magnets_from_movie_data(self, movie_data):
-        """从影片数据中提取并显示磁力链接"""
-        try:
-            # 获取并显示磁力链接
-            # 从影片详情中获取gid和uc参数
-            gid = movie_data.get("gid", "")
-            uc = movie_data.get("uc", "")
-            movie_id = movie_data.get("id", "")
-            
-            if gid and uc:
-                # 使用新的API获取磁力链接
-                magnet_response = requests.get(f"{self.api_base_url}/magnets/{movie_id}", params={
-                    "gid": gid,
-                    "uc": uc,
-                    "sortBy": "date",
-                    "sortOrder": "desc"
-                })
-                
-                if magnet_response.status_code == 200:
-                    magnets_data = magnet_response.json()
-                    # 修改这里：API返回的是直接的磁力链接数组，而不是包含magnets字段的对象
-                    magnets = magnets_data if isinstance(magnets_data, list) else magnets_data.get("magnets", [])
-                    
-                    if magnets:
-                        for magnet in magnets:
-                            magnet_title = magnet.get("title", "")
-                            magnet_link = magnet.get("link", "")
-                            magnet_size = magnet.get("size", "")
-                            # 兼容两种可能的日期字段名
-                            magnet_date = magnet.get("shareDate", magnet.get("date", ""))
-                            has_subtitle = magnet.get("hasSubtitle", False)
-                            is_hd = magnet.get("isHD", False)
-                            
-                            # 创建列表项，添加更多信息和标记
-                            subtitle_mark = "[中字]" if has_subtitle else ""
-                            hd_mark = "[HD]" if is_hd else ""
-                            item_text = f"{magnet_title} {subtitle_mark} {hd_mark} [{magnet_size}] ({magnet_date})"
-                            item = QListWidgetItem(item_text)
-                            item.setToolTip(magnet_link)  # 设置工具提示为完整链接
-                            item.setData(Qt.UserRole, magnet_link)  # 存储链接数据
-                            
-                            # 设置不同类型的磁力链接的颜色
-                            if has_subtitle:
-                                item.setForeground(QColor(0, 128, 0))  # 绿色表示有字幕
-                            elif is_hd:
-                                item.setForeground(QColor(0, 0, 255))  # 蓝色表示高清
-                            
-                            self.magnet_list.addItem(item)
-                        return
-            
-            # 如果没有gid和uc参数，或者API获取失败，使用旧的获取方式
-            magnets = movie_data.get("magnets", [])
-            if magnets:
-                for magnet in magnets:
-                    magnet_title = magnet.get("title", "")
-                    magnet_link = magnet.get("link", "")
-                    magnet_size = magnet.get("size", "")
-                    # 兼容两种可能的日期字段名
-                    magnet_date = magnet.get("shareDate", magnet.get("date", ""))
-                    has_subtitle = magnet.get("hasSubtitle", False)
-                    is_hd = magnet.get("isHD", False)
-                    
-                    # 创建列表项，添加更多信息和标记
-                    subtitle_mark = "[中字]" if has_subtitle else ""
-                    hd_mark = "[HD]" if is_hd else ""
-                    item_text = f"{magnet_title} {subtitle_mark} {hd_mark} [{magnet_size}] ({magnet_date})"
-                    item = QListWidgetItem(item_text)
-                    item.setToolTip(magnet_link)  # 设置工具提示为完整链接
-                    item.setData(Qt.UserRole, magnet_link)  # 存储链接数据
-                    
-                    # 设置不同类型的磁力链接的颜色
-                    if has_subtitle:
-                        item.setForeground(QColor(0, 128, 0))  # 绿色表示有字幕
-                    elif is_hd:
-                        item.setForeground(QColor(0, 0, 255))  # 蓝色表示高清
-                    
-                    self.magnet_list.addItem(item)
-        except Exception as e:
-            print(f"显示磁力链接失败: {str(e)}")
-    
-    def get_local_images(self, directory):
-        """获取目录中的所有图片文件"""
-        if not os.path.exists(directory):
-            return []
-        
-        image_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.webp']
-        images = []
-        
-        # 查找所有图片文件
-        for filename in os.listdir(directory):
-            file_path = os.path.join(directory, filename)
-            if os.path.isfile(file_path) and os.path.getsize(file_path) > 0:
-                ext = os.path.splitext(filename)[1].lower()
-                if ext in image_extensions:
-                    images.append(file_path)
-        
-        # 对图片进行排序：封面图放在第一位，其他按文件名排序
-        cover_images = [img for img in images if os.path.basename(img).startswith('cover')]
-        sample_images = [img for img in images if not os.path.basename(img).startswith('cover')]
-        sample_images.sort(key=lambda x: os.path.basename(x))
-        
-        return cover_images + sample_images
+    def get_local_images(self, movie_id):
+        """从图片仓库获取影片已有的图片[(角色, 序号, 路径)]，封面在前、预览图按序号排列
+        
+        旧版本保存在 buspic/<影片ID>/ 中的图片第一次访问时移入仓库。
+        """
+        images = stored_movie_images(self.image_store, movie_id)
+        if not images and self.image_store.import_legacy_movie_dir(movie_id):
+            images = stored_movie_images(self.image_store, movie_id)
+        return images
 
     def refresh_star_data(self):
         """清除当前演员的数据库缓存并重新加载数据"""
@@ -2493,6 +3854,10 @@ class JavbusGUI(QMainWindow):
             # 清除数据库中的演员数据
             success, deleted_count = self.db.clear_star_data(self.current_star_id)
             
+            # 内存中的列表页和分页位置也随之失效
+            self.page_cache.clear()
+            self.star_page_cursors = {}
+            
             if success:
                 # 重置页码
                 self.current_page = 1
@@ -2566,9 +3931,6 @@ class JavbusGUI(QMainWindow):
             QMessageBox.warning(self, "警告", "请输入影片编号")
             return
         
-        # 清理批量下载状态，防止搜索时触发批量下载
-        self.cleanup_batch_download_state()
-        
         # 保存搜索历史
         self.db.save_search_history(movie_id)
         
@@ -2586,76 +3948,50 @@ class JavbusGUI(QMainWindow):
 
     def load_movie_search_results(self, keyword, page):
         """加载影片搜索结果，支持分页"""
+        self.current_list_request = {
+            "mode": "keyword",
+            "target": keyword,
+            "page": page,
+            "magnet_only": self.magnet_only_checkbox.isChecked(),
+            "star_name": ""
+        }
+        
+        # 已加载或预取过的页面直接从内存显示
+        cached = self.page_cache.get(self.page_cache_key(self.current_list_request))
+        if cached:
+            self.task_scheduler.cancel_group("movie_list")
+            self.display_movie_search_result(cached[0], cached[1], keyword)
+            return
+        
         # 显示进度条
         self.progress_bar.setVisible(True)
         self.progress_bar.setRange(0, 0)  # 设置为不确定模式
         
-        try:
-            # 根据"只包含有磁力影片"选项的状态决定参数
-            magnet_param = None if self.magnet_only_checkbox.isChecked() else "all"
-            
-            # 构建API请求参数
-            params = {
-                "keyword": keyword,
-                "page": str(page)
-            }
-            
-            # 只有当需要包含无磁力影片时才添加magnet参数
-            if magnet_param:
-                params["magnet"] = magnet_param
-            
-            # 从API获取数据
-            response = requests.get(f"{self.api_base_url}/movies/search", params=params)
-            
-            if response.status_code != 200:
-                QMessageBox.warning(self, "警告", f"搜索失败: {response.status_code}")
-                self.progress_bar.setVisible(False)
-                return
-            
-            data = response.json()
-            movies = data.get("movies", [])
-            pagination = data.get("pagination", {})
-            
-            if not movies and page == 1:  # 只在第一页没有结果时显示提示
-                QMessageBox.information(self, "提示", "未找到匹配的影片")
-                self.progress_bar.setVisible(False)
-                return
-            
-            # 显示搜索结果
-            self.display_movie_search_result(movies, pagination, keyword)
-            
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"搜索影片失败: {str(e)}")
-        finally:
-            self.progress_bar.setVisible(False)
+        # 提交加载任务，之前尚未完成的影片列表加载会被取消
+        task = MovieLoadTask(self.api_base_url, self.db, "keyword", keyword, page,
+                             self.magnet_only_checkbox.isChecked())
+        task.load_complete.connect(self.on_movie_search_loaded)
+        task.load_error.connect(self.on_movies_load_error)
+        task.finished.connect(self.on_movies_load_finished)
+        self.task_scheduler.submit(task, TaskScheduler.PRIORITY_HIGH, "movie_list")
+    
+    def on_movie_search_loaded(self, movies, pagination):
+        """影片搜索结果加载完成：缓存并显示"""
+        if self.is_superseded_list_task():
+            return
+        request = self.current_list_request
+        if not movies and request["page"] == 1:  # 只在第一页没有结果时显示提示
+            QMessageBox.information(self, "提示", "未找到匹配的影片")
+            return
+        
+        # 缓存并显示搜索结果
+        self.page_cache.put(self.page_cache_key(request), movies, pagination)
+        self.display_movie_search_result(movies, pagination, request["target"])
 
     def display_movie_search_result(self, movies, pagination, keyword=None):
         """显示影片搜索结果，支持分页"""
-        # 清空当前影片列表
-        self.movies_table.setRowCount(0)
-        
-        # 按发行日期排序（新的在前）
-        sorted_movies = sorted(movies, key=lambda x: x.get("date", ""), reverse=True)
-        
-        for movie in sorted_movies:
-            row = self.movies_table.rowCount()
-            self.movies_table.insertRow(row)
-            
-            # 设置影片编号
-            movie_id = movie.get("id", "")
-            self.movies_table.setItem(row, 0, QTableWidgetItem(movie_id))
-            
-            # 设置影片名称 - 去除与影片编号重复的部分
-            title = movie.get("title", "")
-            # 如果标题以影片编号开头，则去除这部分
-            if movie_id and title.startswith(movie_id):
-                title = title[len(movie_id):].strip()
-            title_item = QTableWidgetItem(title)
-            title_item.setToolTip(title)
-            self.movies_table.setItem(row, 1, title_item)
-            
-            # 设置发行日期
-            self.movies_table.setItem(row, 2, QTableWidgetItem(movie.get("date", "")))
+        # 替换当前影片列表，代理模型按当前排序列（默认发行日期，新的在前）排序
+        self.movie_model.set_movies(movies)
         
         # 更新分页信息
         current_page = pagination.get("currentPage", self.current_page)
@@ -2670,62 +4006,17 @@ class JavbusGUI(QMainWindow):
         self.next_page_button.setEnabled(has_next_page)
         self.prev_page_button.setEnabled(current_page > 1)
         
+        # 在后台预取相邻页面和可见影片的详情
+        if self.current_list_request and self.current_list_request["mode"] == "keyword":
+            self.schedule_page_prefetch(pagination)
+        self.hovered_movie_row = -1
+        self.detail_prefetch_timer.start()
+        
         # 更新标题提示搜索模式
         if keyword:
             magnet_filter = "（仅含磁力）" if self.magnet_only_checkbox.isChecked() else ""
             self.setWindowTitle(f'JavBus简易版 - 影片搜索: {keyword} {magnet_filter}')
         
-        # 在方法最后添加对批量下载的支持
-        # 检查是否处于批量下载模式
-        if hasattr(self, 'batch_download_pages') and hasattr(self, 'batch_download_current_page_index') and not hasattr(self, 'batch_download_finished'):
-            self.process_batch_download_page_loaded()
-
-    def process_batch_download_page_loaded(self):
-        """处理批量下载页面加载完成后的操作"""
-        # 获取当前页面的所有影片ID
-        current_page_movies = []
-        for row in range(self.movies_table.rowCount()):
-            movie_id = self.movies_table.item(row, 0).text()
-            if movie_id:
-                current_page_movies.append(movie_id)
-        
-        # 添加到下载队列
-        self.batch_download_movies.extend(current_page_movies)
-        
-        # 进入下一页
-        self.batch_download_current_page_index += 1
-        if self.batch_download_current_page_index < len(self.batch_download_pages):
-            # 加载下一页
-            next_page = self.batch_download_pages[self.batch_download_current_page_index]
-            # 更新状态栏
-            self.statusBar().showMessage(f"正在加载第{next_page}页影片列表...")
-            # 切换到下一页
-            self.current_page = next_page
-            if self.current_star_id:
-                # 演员查询模式
-                self.load_star_movies(self.current_star_id, next_page)
-            elif hasattr(self, 'current_movie_keyword') and self.current_movie_keyword:
-                # 影片查询模式
-                self.load_movie_search_results(self.current_movie_keyword, next_page)
-        else:
-            # 所有页面加载完毕，开始下载影片
-            self.batch_movie_download_queue = self.batch_download_movies.copy()
-            self.batch_movie_download_completed = 0
-            self.batch_movie_download_errors = []
-            self.batch_download_finished = False
-            
-            # 设置进度条
-            self.progress_bar.setRange(0, len(self.batch_movie_download_queue))
-            self.progress_bar.setValue(0)
-            
-            # 保存当前页码，以便下载完成后恢复
-            self.batch_download_previous_page = self.current_page
-            # 保存当前磁力过滤设置，以便下载完成后恢复
-            self.batch_download_previous_magnet_only = self.magnet_only_checkbox.isChecked()
-            
-            # 开始下载
-            QTimer.singleShot(0, self.download_next_movie)
-
     def handle_text_click(self, event, text_browser):
         """处理文本点击事件"""
         if event.type() == QEvent.MouseButtonDblClick:
@@ -2761,34 +4052,55 @@ class JavbusGUI(QMainWindow):
         # 继承默认处理方法
         QTextBrowser.mousePressEvent(text_browser, event)
 
-    def on_image_downloaded(self, image_path, image_type):
+    def on_image_downloaded(self, image_path, image_type, index):
         """当图片下载完成时被调用"""
-        if image_type == "cover" and not self.current_images:
-            # 如果是封面且当前没有显示图片，则立即显示
-            self.current_images = [image_path]
-            self.current_image_index = 0
-            self.display_current_image()
-        else:
-            # 将新图片添加到列表中
-            if image_path not in self.current_images:
-                self.current_images.append(image_path)
-                # 更新图片计数
-                self.image_index_label.setText(f"{self.current_image_index + 1}/{len(self.current_images)}")
-                self.next_image_button.setEnabled(self.current_image_index < len(self.current_images) - 1)
+        # 忽略已切换的影片的下载任务发来的图片
+        if not self.is_current_image_task(self.sender()):
+            return
+        slot = (image_type, index)
+        if slot not in self.current_image_slots:
+            self.set_gallery_slots(self.current_image_slots + [slot])
+        # 图片并发下载，到达顺序不固定；按位置填入，封面在前、预览图按序号排列
+        position = self.current_image_slots.index(slot)
+        if self.current_images[position] is None:
+            self.current_images[position] = image_path
+            if position == self.current_image_index:
+                # 正在等待的图片，立即显示
+                self.display_current_image()
+            elif abs(position - self.current_image_index) <= 2:
+                # 紧挨着当前图片的新图片预先解码
+                self.preview_loader.request(image_path)
         
         # 显示下载进度状态
-        self.statusBar().showMessage(f"已下载 {len(self.current_images)} 张图片", 2000)
+        downloaded = sum(1 for path in self.current_images if path)
+        self.statusBar().showMessage(f"已下载 {downloaded}/{len(self.current_images)} 张图片", 2000)
 
     def on_images_download_complete(self):
-        """当所有图片下载完成时被调用"""
+        """当一次图片下载完成时被调用"""
+        task = self.sender()
+        if not self.is_current_image_task(task):
+            return
+        # 下载失败的位置允许在翻到时重试
+        failed = {slot for slot, path in zip(self.current_image_slots, self.current_images)
+                  if path is None and (task.slots is None or slot in task.slots)}
+        self.gallery_requested -= failed
+        if self.current_images and self.current_images[self.current_image_index] is None and \
+                self.current_image_slots[self.current_image_index] in failed:
+            self.preview_label.setText("图片加载失败")
+        
         # 隐藏进度条
         self.progress_bar.setVisible(False)
         
         # 显示完成消息
-        self.statusBar().showMessage(f"图片下载完成，共 {len(self.current_images)} 张", 3000)
+        downloaded = sum(1 for path in self.current_images if path)
+        self.statusBar().showMessage(f"图片下载完成，已有 {downloaded}/{len(self.current_images)} 张", 3000)
 
     def on_images_download_error(self, error_msg):
         """当图片下载出错时被调用"""
+        task = self.sender()
+        if not self.is_current_image_task(task):
+            return
+        self.gallery_requested -= task.slots or set(self.current_image_slots)
         # 隐藏进度条
         self.progress_bar.setVisible(False)
         
@@ -2799,7 +4111,7 @@ class JavbusGUI(QMainWindow):
     def start_batch_download(self):
         """开始批量下载页面内影片图片"""
         # 检查当前是否有查询结果
-        if self.movies_table.rowCount() == 0:
+        if self.movie_model.rowCount() == 0:
             QMessageBox.warning(self, "警告", "当前没有影片可下载")
             return
         
@@ -2825,9 +4137,9 @@ class JavbusGUI(QMainWindow):
         # 解析后X页输入
         try:
             next_pages = int(self.next_pages_input.text()) if self.next_pages_input.text() else 1
-            # 调整后X页的数量，不能超过剩余页数，且不能超过5
+            # 调整后X页的数量，不能超过剩余页数
             remaining_pages = total_pages - current_page
-            next_pages = min(next_pages, remaining_pages, 5) if next_pages > 0 else 0
+            next_pages = min(next_pages, remaining_pages) if next_pages > 0 else 0
         except ValueError:
             next_pages = 0  # 如果输入无效，则默认不下载后面的页
         
@@ -2836,187 +4148,67 @@ class JavbusGUI(QMainWindow):
         end_page = current_page + next_pages
         
         # 确认对话框
-        msg = f"将下载第{start_page}页到第{end_page}页的所有影片图片，共{end_page - start_page + 1}页。\n"
-        msg += "下载过程可能需要较长时间，确定继续吗？"
+        full_gallery = self.batch_full_gallery_checkbox.isChecked()
+        msg = (f"将下载第{start_page}页到第{end_page}页的所有影片{'图片' if full_gallery else '封面'}，"
+               f"共{end_page - start_page + 1}页。\n")
+        msg += "影片将加入下载队列在后台下载，可在下载管理中查看进度，确定继续吗？"
         reply = QMessageBox.question(self, "确认下载", msg, QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         
         if reply != QMessageBox.Yes:
             return
         
-        # 初始化批量下载相关的属性
-        self.batch_download_pages = list(range(start_page, end_page + 1))
-        self.batch_download_current_page_index = 0
-        self.batch_download_movies = []
-        self.batch_movie_download_queue = []  # 初始化下载队列
-        self.batch_movie_download_completed = 0  # 初始化完成计数
-        self.batch_movie_download_errors = []  # 初始化错误列表
-        self.batch_download_finished = False  # 初始化完成标志
-        
-        # 显示进度条
-        self.progress_bar.setVisible(True)
-        self.progress_bar.setRange(0, 0)  # 不确定模式
-        
-        # 获取当前页面的所有影片ID
-        current_page_movies = []
-        for row in range(self.movies_table.rowCount()):
-            movie_id = self.movies_table.item(row, 0).text()
-            if movie_id:
-                current_page_movies.append(movie_id)
-        
-        # 将当前页面的影片添加到下载队列
-        self.batch_movie_download_queue = current_page_movies
-        
-        # 设置进度条的最大值
-        self.progress_bar.setRange(0, len(current_page_movies))
-        self.progress_bar.setValue(0)
-        
-        # 开始下载第一个影片
-        self.download_next_movie()
-
-    def download_next_movie(self):
-        """从队列中下载下一个影片的图片"""
-        try:
-            # 检查是否所有影片都已经下载完成，并且没有显示过完成提示
-            if not self.batch_movie_download_queue and not self.batch_download_finished:
-                # 设置完成标志
-                self.batch_download_finished = True
-                
-                # 下载完成
-                self.progress_bar.setVisible(False)
-                
-                # 清除状态栏消息
-                self.statusBar().clearMessage()
-                
-                # 显示下载结果
-                errors_count = len(self.batch_movie_download_errors)
-                if errors_count > 0:
-                    error_msg = "\n".join(self.batch_movie_download_errors[:10])
-                    if errors_count > 10:
-                        error_msg += f"\n... 及其他 {errors_count - 10} 个错误"
-                    
-                    QMessageBox.warning(self, "下载完成",
-                                       f"已完成 {self.batch_movie_download_completed} 个影片的图片下载，"
-                                       f"但有 {errors_count} 个影片下载失败。\n\n"
-                                       f"错误信息:\n{error_msg}")
-                else:
-                    QMessageBox.information(self, "下载完成",
-                                          f"已成功下载 {self.batch_movie_download_completed} 个影片的图片。")
-                
-                # 清理批量下载相关的状态，防止重复触发批量下载
-                self.cleanup_batch_download_state()
-                
-                # 恢复之前的页面和设置
-                if hasattr(self, 'batch_download_previous_page'):
-                    # 恢复之前的查询页面
-                    previous_page = self.batch_download_previous_page
-                    self.current_page = previous_page
-                    
-                    # 恢复之前的磁力过滤设置
-                    if hasattr(self, 'batch_download_previous_magnet_only'):
-                        self.magnet_only_checkbox.setChecked(self.batch_download_previous_magnet_only)
-                    
-                    # 重新加载对应页面的数据
-                    if self.current_star_id:
-                        self.load_star_movies(self.current_star_id, previous_page)
-                    elif hasattr(self, 'current_movie_keyword') and self.current_movie_keyword:
-                        self.load_movie_search_results(self.current_movie_keyword, previous_page)
-                
-                return
-            elif not self.batch_movie_download_queue:
-                # 如果队列为空但已经显示过完成提示，直接返回
-                return
-            
-            # 获取下一个要下载的影片ID
-            movie_id = self.batch_movie_download_queue.pop(0)
-            
-            # 更新状态栏
-            self.statusBar().showMessage(f"正在处理影片 {movie_id} 的图片...")
-            
-            # 创建保存目录
-            save_dir = os.path.join("buspic", movie_id)
-            os.makedirs(save_dir, exist_ok=True)
-            
-            # 检查本地是否已有图片
-            local_images = self.get_local_images(save_dir)
-            if local_images:
-                # 已有本地图片，更新计数并继续下一个
-                self.batch_movie_download_completed += 1
-                self.progress_bar.setValue(self.batch_movie_download_completed)
-                # 使用 QTimer 延迟调用下一个下载，避免递归
-                QTimer.singleShot(0, self.download_next_movie)
-                return
-            
-            # 获取影片详情
-            movie_data = self.db.get_movie(movie_id)
-            
-            # 如果数据库中没有，则从API获取
-            if not movie_data:
-                response = requests.get(f"{self.api_base_url}/movies/{movie_id}")
-                
-                if response.status_code != 200:
-                    # 记录错误
-                    self.batch_movie_download_errors.append(f"{movie_id}: 获取影片详情失败 ({response.status_code})")
-                    # 更新计数
-                    self.batch_movie_download_completed += 1
-                    self.progress_bar.setValue(self.batch_movie_download_completed)
-                    # 使用 QTimer 延迟调用下一个下载，避免递归
-                    QTimer.singleShot(0, self.download_next_movie)
-                    return
-                
-                movie_data = response.json()
-                # 保存到数据库
-                self.db.save_movie(movie_data)
-            
-            # 创建批量下载线程
-            self.batch_image_download_thread = ImageDownloadThread(movie_id, self.api_base_url, movie_data, save_dir)
-            self.batch_image_download_thread.download_complete.connect(self.on_batch_image_download_complete)
-            self.batch_image_download_thread.download_error.connect(self.on_batch_image_download_error)
-            self.batch_image_download_thread.start()
-            
-        except Exception as e:
-            # 记录错误
-            self.batch_movie_download_errors.append(f"{movie_id}: {str(e)}")
-            # 更新计数
-            self.batch_movie_download_completed += 1
-            self.progress_bar.setValue(self.batch_movie_download_completed)
-            # 使用 QTimer 延迟调用下一个下载，避免递归
-            QTimer.singleShot(0, self.download_next_movie)
-
-    def on_batch_image_download_complete(self):
-        """批量下载某个影片图片完成的回调"""
-        # 更新计数器
-        self.batch_movie_download_completed += 1
-        self.progress_bar.setValue(self.batch_movie_download_completed)
-        
-        # 继续下载下一个
-        self.download_next_movie()
-
-    def on_batch_image_download_error(self, error_msg):
-        """批量下载某个影片图片出错的回调"""
-        # 记录错误
-        self.batch_movie_download_errors.append(error_msg)
-        
-        # 更新计数器
-        self.batch_movie_download_completed += 1
-        self.progress_bar.setValue(self.batch_movie_download_completed)
+        # 当前页面的影片立即加入队列
+        self.download_manager.add(self.movie_model.movie_ids(), full_gallery)
         
-        # 继续下载下一个
-        self.download_next_movie()
-
-    def cleanup_batch_download_state(self):
-        """清理批量下载的状态变量"""
-        if hasattr(self, 'batch_download_pages'):
-            delattr(self, 'batch_download_pages')
-        if hasattr(self, 'batch_download_current_page_index'):
-            delattr(self, 'batch_download_current_page_index')
-        if hasattr(self, 'batch_download_movies'):
-            delattr(self, 'batch_download_movies')
-        if hasattr(self, 'batch_movie_download_queue'):
-            delattr(self, 'batch_movie_download_queue')
-        if hasattr(self, 'batch_download_finished'):
-            delattr(self, 'batch_download_finished')
-        # 不删除batch_download_previous_page，因为它可能在后面还需要用到
-        # 不删除batch_download_previous_magnet_only，因为它可能在后面还需要用到
+        # 其他页面的影片列表在后台获取，不切换当前显示的页面
+        other_pages = [page for page in range(start_page, end_page + 1) if page != current_page]
+        if other_pages and self.current_list_request:
+            task = BatchPageListTask(self.api_base_url, self.db, dict(self.current_list_request), other_pages)
+            task.page_loaded.connect(lambda page, movie_ids: self.on_batch_page_loaded(page, movie_ids, full_gallery))
+            task.page_error.connect(self.on_batch_page_error)
+            self.task_scheduler.submit(task, TaskScheduler.PRIORITY_LOW, "batch_pages", exclusive=False, background=True)
+    
+    def on_batch_page_loaded(self, page, movie_ids, full_gallery):
+        """批量下载的一页影片列表获取完成，加入下载队列"""
+        added = self.download_manager.add(movie_ids, full_gallery)
+        print(f"批量下载: 已将第{page}页的 {added} 部影片加入下载队列")
+    
+    def on_batch_page_error(self, page, error_msg):
+        print(f"批量下载: 获取第{page}页影片列表失败: {error_msg}")
+        self.statusBar().showMessage(f"获取第{page}页影片列表失败: {error_msg}", 5000)
+    
+    def update_batch_progress(self, *args):
+        """在进度条和状态栏显示批量下载的进度"""
+        manager = self.download_manager
+        finished = manager.count("done") + manager.count("failed")
+        total = len(manager.items)
+        if manager.is_active() and not manager.paused:
+            self.batch_progress_shown = True
+            self.progress_bar.setVisible(True)
+            self.progress_bar.setRange(0, total)
+            self.progress_bar.setValue(finished)
+            self.statusBar().showMessage(f"批量下载: {finished}/{total}，下载中 {len(manager.running)} 部")
+        elif getattr(self, 'batch_progress_shown', False):
+            # 全部结束或已暂停
+            self.batch_progress_shown = False
+            self.progress_bar.setVisible(False)
+            message = f"批量下载{'已暂停' if manager.paused else '完成'}: {manager.count('done')}/{total}"
+            failed = manager.count("failed")
+            if failed:
+                message += f"，{failed} 部失败，可在下载管理中重试"
+            self.statusBar().showMessage(message, 10000)
+    
+    def batch_downloaded_ids(self):
+        """批量下载已完成的影片ID，这些影片的图片由用户主动下载，清理图片仓库时最后淘汰"""
+        return [item["movie_id"] for item in self.db.get_downloads() if item["status"] == "done"]
+    
+    def show_download_manager(self):
+        """显示下载管理窗口（非模态）"""
+        if self.download_manager_dialog is None:
+            self.download_manager_dialog = DownloadManagerDialog(self.download_manager, self)
+        self.download_manager_dialog.show()
+        self.download_manager_dialog.raise_()
+        self.download_manager_dialog.activateWindow()
 
     # 添加播放视频的功能
     def play_selected_video(self):
@@ -3084,25 +4276,17 @@ class JavbusGUI(QMainWindow):
                 except Exception as e:
                     QMessageBox.critical(None, "错误", f"播放器启动失败: {str(e)}")
             
-            # 将tkinter的部分完全隔离在一个单独的线程中
-            player_thread = threading.Thread(target=start_player, daemon=True)
-            player_thread.start()
+            # 将tkinter的部分完全隔离在一个单独的线程中，播放器会一直占用该线程，因此不使用线程池
+            self.task_scheduler.run_detached(start_player, name="video_player")
             
         except Exception as e:
             QMessageBox.critical(self, "错误", f"无法启动播放器: {str(e)}")
 
-    def _cleanup_threads(self):
-        """清理所有正在运行的异步线程"""
-        # 清理简介线程
-        if hasattr(self, 'summary_thread') and self.summary_thread.isRunning():
-            self.summary_thread.quit()
-            self.summary_thread.wait(1000)  # 最多等待1秒
-            
-        # 清理图片下载线程
-        if hasattr(self, 'image_download_thread') and self.image_download_thread.isRunning():
-            # 图片下载线程可能需要更多时间来完成
-            self.image_download_thread.quit()
-            self.image_download_thread.wait(1000)  # 最多等待1秒
+    def cancel_movie_tasks(self):
+        """取消当前影片尚未完成的详情、简介和图片下载任务，不等待其结束"""
+        for group in ("movie_detail", "movie_summary", "movie_images"):
+            self.task_scheduler.cancel_group(group)
+        self.preview_loader.cancel_pending()
             
     def on_title_translation_ready(self, movie_id, translated_title):
         """处理标题翻译完成的回调"""
@@ -3127,4 +4311,6 @@ def main():
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
+    # 打包为exe后，缩略图生成器的子进程需要此调用
+    multiprocessing.freeze_support()
     main() 
\ No newline at end of file
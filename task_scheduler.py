@@ -0,0 +1,184 @@
+import threading
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class TaskCancelled(Exception):
+    """任务被取消时由任务内部抛出，调度器会静默结束该任务"""
+
+
+class CancellationToken:
+    """线程安全的取消标记，由界面线程设置、后台任务在检查点读取"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        """已取消时抛出TaskCancelled，用于在长循环中提前退出"""
+        if self._event.is_set():
+            raise TaskCancelled()
+
+
+class BackgroundTask(QObject):
+    """后台任务基类：子类声明自己的结果信号并实现run()
+
+    任务对象在界面线程中创建，工作线程中发出的信号会排队到界面线程处理，
+    因此槽函数中仍可以用sender()判断结果是否来自最新的任务。
+    """
+    finished = pyqtSignal()
+
+    def __init__(self):
+        super().__init__()
+        self.token = CancellationToken()
+
+    def cancel(self):
+        self.token.cancel()
+
+    def is_cancelled(self):
+        return self.token.cancelled
+
+    def run(self):
+        raise NotImplementedError
+
+
+class _TaskRunner(QRunnable):
+    """在线程池中执行一个BackgroundTask"""
+
+    def __init__(self, task):
+        super().__init__()
+        self.task = task
+
+    def run(self):
+        try:
+            if not self.task.is_cancelled():
+                self.task.run()
+        except TaskCancelled:
+            pass
+        except Exception as e:
+            print(f"后台任务 {type(self.task).__name__} 出错: {str(e)}")
+        finally:
+            self.task.finished.emit()
+
+
+class TaskScheduler(QObject):
+    """统一的后台任务调度器
+
+    - 前台线程池执行用户正在等待的任务（搜索、详情、图片等），后台线程池执行预取任务，
+      两者的并发数都有上限，预取不会占满用户操作需要的线程
+    - 优先级数值越大越先开始执行
+    - 同一分组中提交新任务时，默认取消该组之前的任务；尚未开始的任务直接从队列中移除
+    - 需要长时间独占线程的工作（如播放器）通过run_detached在独立的守护线程中运行
+    - 长时间运行的批量任务可以使用add_pool添加的独立线程池，不占用前台和后台线程池
+    """
+    PRIORITY_LOW = 0
+    PRIORITY_NORMAL = 5
+    PRIORITY_HIGH = 10
+
+    def __init__(self, max_workers=4, background_workers=2, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_workers)
+        self.background_pool = QThreadPool(self)
+        self.background_pool.setMaxThreadCount(background_workers)
+        self.named_pools = {}  # 名称 -> 通过add_pool添加的线程池
+        self.runners = {}  # 未结束的任务 -> (线程池, 执行器)，保持引用直到任务结束
+        self.group_tasks = {}  # 分组名 -> 该组未结束的任务列表
+        self.latest = {}  # 分组名 -> 该组最近提交的任务
+        self.detached_threads = []
+
+    def add_pool(self, name, max_workers):
+        """添加或调整一个独立的线程池，提交任务时通过pool参数指定"""
+        pool = self.named_pools.get(name)
+        if pool is None:
+            pool = QThreadPool(self)
+            self.named_pools[name] = pool
+        pool.setMaxThreadCount(max_workers)
+        return pool
+
+    def submit(self, task, priority=PRIORITY_NORMAL, group=None, exclusive=True, background=False, pool=None):
+        """提交任务并返回任务本身
+
+        group不为空且exclusive为True时，先取消同组中之前的任务；
+        background为True时使用后台线程池，pool为add_pool添加的线程池名称。
+        """
+        if group is not None:
+            if exclusive:
+                self.cancel_group(group)
+            self.group_tasks.setdefault(group, []).append(task)
+            self.latest[group] = task
+
+        if pool is not None:
+            pool = self.named_pools[pool]
+        else:
+            pool = self.background_pool if background else self.pool
+        runner = _TaskRunner(task)
+        # 由Python持有执行器，run()结束后在forget()中释放，否则Qt会提前删除C++对象，
+        # 在finished信号处理之前调用tryTake会出错
+        runner.setAutoDelete(False)
+        self.runners[task] = (pool, runner)
+        task.finished.connect(self.on_task_finished)
+        pool.start(runner, priority)
+        return task
+
+    def current(self, group):
+        """获取分组中最近提交的任务，用于判断异步结果是否已过期"""
+        return self.latest.get(group)
+
+    def is_active(self, group):
+        """分组中是否还有未取消且未结束的任务"""
+        return any(not task.is_cancelled() for task in self.group_tasks.get(group, []))
+
+    def cancel(self, task):
+        """取消任务：尚未开始的任务从队列中移除，正在运行的任务在下一个检查点结束"""
+        task.cancel()
+        entry = self.runners.get(task)
+        if entry and entry[0].tryTake(entry[1]):
+            self.forget(task)
+
+    def cancel_group(self, group):
+        """取消分组中所有未结束的任务"""
+        for task in list(self.group_tasks.get(group, [])):
+            self.cancel(task)
+
+    def cancel_all(self):
+        """取消所有未结束的任务"""
+        for task in list(self.runners):
+            self.cancel(task)
+
+    def on_task_finished(self):
+        task = self.sender()
+        if task is not None:
+            self.forget(task)
+
+    def forget(self, task):
+        """任务结束后释放引用"""
+        self.runners.pop(task, None)
+        for group, tasks in list(self.group_tasks.items()):
+            if task in tasks:
+                tasks.remove(task)
+                if not tasks:
+                    del self.group_tasks[group]
+
+    def run_detached(self, target, *args, name=None):
+        """在独立的守护线程中运行长时间占用线程的工作，不占用线程池的名额"""
+        self.detached_threads = [thread for thread in self.detached_threads if thread.is_alive()]
+        thread = threading.Thread(target=target, args=args, name=name, daemon=True)
+        self.detached_threads.append(thread)
+        thread.start()
+        return thread
+
+    def shutdown(self, timeout=2000):
+        """程序退出前取消所有任务，并等待正在运行的任务结束（毫秒）"""
+        self.cancel_all()
+        pools = [self.pool, self.background_pool] + list(self.named_pools.values())
+        for pool in pools:
+            pool.clear()
+        for pool in pools:
+            pool.waitForDone(timeout)
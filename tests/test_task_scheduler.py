@@ -0,0 +1,74 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+QtCore = pytest.importorskip("PyQt5.QtCore")
+gui = pytest.importorskip("javbus_gui_improved")
+
+from task_scheduler import BackgroundTask, TaskScheduler
+
+
+class FakeDatabase:
+    """只提供MovieDetailTask用到的接口，影片数据直接从内存返回"""
+
+    def __init__(self, movies):
+        self.movies = movies
+
+    def get_movie(self, movie_id):
+        return self.movies.get(movie_id)
+
+
+@pytest.fixture
+def app():
+    return QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+
+
+def wait_until(app, condition, timeout=5.0):
+    """处理事件直到条件成立，排队的跨线程信号需要事件循环才能送达"""
+    timer = QtCore.QElapsedTimer()
+    timer.start()
+    while not condition() and timer.elapsed() < timeout * 1000:
+        app.processEvents(QtCore.QEventLoop.AllEvents, 50)
+    return condition()
+
+
+def test_movie_detail_task_emits_detail_loaded(app):
+    scheduler = TaskScheduler()
+    movie = {"id": "ABC-123", "title": "test", "magnets": []}
+    magnet_cache = gui.MagnetCache()
+    magnet_cache.put("ABC-123", [])
+    task = gui.MovieDetailTask(7, "ABC-123", "http://localhost", FakeDatabase({"ABC-123": movie}), magnet_cache)
+
+    loaded = []
+    errors = []
+    task.detail_loaded.connect(lambda token, data: loaded.append((token, data)))
+    task.detail_error.connect(lambda token, message: errors.append((token, message)))
+    scheduler.submit(task, group="movie_detail")
+
+    assert wait_until(app, lambda: loaded or errors)
+    assert errors == []
+    assert loaded == [(7, movie)]
+    # 请求序号不能覆盖基类的取消标记，界面线程仍然可以取消任务
+    scheduler.cancel(task)
+    scheduler.shutdown()
+
+
+class QuickTask(BackgroundTask):
+    def run(self):
+        pass
+
+
+def test_cancel_group_after_run_before_finished_is_handled(app):
+    scheduler = TaskScheduler()
+    task = scheduler.submit(QuickTask(), group="quick")
+    # 任务已经执行完，但排队的finished信号尚未处理，执行器仍在runners中
+    scheduler.pool.waitForDone(5000)
+    assert task in scheduler.runners
+
+    scheduler.cancel_group("quick")
+    scheduler.submit(QuickTask(), group="quick")
+    assert wait_until(app, lambda: not scheduler.runners)
+    scheduler.shutdown()
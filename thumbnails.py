@@ -0,0 +1,297 @@
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageOps
+
+
+# 固定的缩略图尺寸（最大宽, 最大高），按比例缩放到框内
+SIZES = {
+    "list": (96, 64),  # 影片列表中的缩略图
+    "card": (450, 300),  # 网页卡片中的封面和预览图
+    "preview": (600, 400),  # 图片预览区
+}
+
+# 按宽度缩放时可用的宽度，请求的宽度向上取整到其中之一，同一张图片最多只有这几种宽度的缩略图
+WIDTHS = (160, 240, 320, 480, 640, 960)
+WIDTH_MAX_HEIGHT = 4  # 按宽度缩放时高度最多为宽度的倍数
+
+# 缩略图格式 -> (Pillow格式名, 扩展名, 质量)
+FORMATS = {
+    "jpeg": ("JPEG", ".jpg", 85),
+    "webp": ("WEBP", ".webp", 80),
+}
+
+# 预览图拼图：所有预览图缩小后按网格拼成一张图，页面用一次请求显示整个图集
+SHEET_TILE = (300, 200)  # 每张预览图的最大尺寸
+SHEET_COLUMNS = 5
+SHEET_BACKGROUND = (233, 236, 239)
+
+IMAGE_ROOT = "buspic"
+VARIANT_DIR = "_variants"  # 缩略图保存在 buspic/_variants/<尺寸>/<原图相对路径>
+SHEET_DIR = "sheets"  # 拼图保存在 buspic/_variants/sheets/<影片ID>/<拼图ID><扩展名>，清单为同名的.json
+
+
+def width_size_name(width):
+    """将请求的宽度向上取整到WIDTHS中的一项，返回尺寸名如"w320"，超过最大宽度时使用最大宽度"""
+    for step in WIDTHS:
+        if width <= step:
+            return f"w{step}"
+    return f"w{WIDTHS[-1]}"
+
+
+def size_box(size_name):
+    """返回尺寸名对应的(最大宽, 最大高)，未知的尺寸返回None"""
+    if size_name in SIZES:
+        return SIZES[size_name]
+    if size_name.startswith("w") and size_name[1:].isdigit() and int(size_name[1:]) in WIDTHS:
+        width = int(size_name[1:])
+        return width, width * WIDTH_MAX_HEIGHT
+    return None
+
+
+def variant_path(source_path, size_name, image_root=IMAGE_ROOT, fmt="jpeg"):
+    """返回原图对应尺寸和格式的缩略图路径"""
+    relative = os.path.relpath(source_path, image_root)
+    if relative.startswith(os.pardir):
+        # 不在图片根目录下的文件按文件名保存
+        relative = os.path.basename(source_path)
+    return os.path.join(image_root, VARIANT_DIR, size_name, os.path.splitext(relative)[0] + FORMATS[fmt][1])
+
+
+def all_variant_paths(source_path, image_root=IMAGE_ROOT):
+    """返回原图所有可能存在的缩略图路径，删除原图时一并删除"""
+    size_names = list(SIZES) + [f"w{width}" for width in WIDTHS]
+    return [variant_path(source_path, size_name, image_root, fmt) for size_name in size_names for fmt in FORMATS]
+
+
+def sheet_dir(movie_id, image_root=IMAGE_ROOT):
+    """返回影片的预览图拼图目录"""
+    return os.path.join(image_root, VARIANT_DIR, SHEET_DIR, movie_id)
+
+
+def sheet_id(digests, fmt):
+    """由预览图的内容哈希和拼图参数计算拼图ID，预览图变化时ID随之变化"""
+    key = f"{SHEET_TILE}:{SHEET_COLUMNS}:{fmt}:" + ",".join(digests)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def is_fresh(source_path, dest_path):
+    """缩略图存在且不比原图旧"""
+    try:
+        return os.path.getmtime(dest_path) >= os.path.getmtime(source_path)
+    except OSError:
+        return False
+
+
+def make_thumbnail(source_path, dest_path, size, fmt="jpeg"):
+    """用Pillow生成缩略图，先写临时文件再改名，返回缩略图路径，失败时返回None
+
+    在进程池中执行，因此只使用可序列化的参数并返回普通值。
+    """
+    temp_path = f"{dest_path}.{os.getpid()}.tmp"
+    try:
+        with Image.open(source_path) as image:
+            # 按原图尺寸计算的解码比例，JPEG可以在解码时直接缩小
+            image.draft("RGB", size)
+            image = ImageOps.exif_transpose(image)
+            if image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            image.thumbnail(size, Image.LANCZOS)
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            format_name, _, quality = FORMATS[fmt]
+            if fmt == "webp":
+                image.save(temp_path, format_name, quality=quality, method=4)
+            else:
+                image.save(temp_path, format_name, quality=quality, optimize=True)
+        os.replace(temp_path, dest_path)
+        return dest_path
+    except Exception as e:
+        print(f"生成缩略图失败 {source_path}: {e}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return None
+
+
+def make_contact_sheet(source_paths, dest_path, tile=SHEET_TILE, columns=SHEET_COLUMNS, fmt="jpeg"):
+    """把多张图片缩小后按网格拼成一张图，返回{"width", "height", "tiles"}，失败时返回None
+
+    tiles按source_paths的顺序给出每张图片在拼图中的[x, y, 宽, 高]，无法读取的图片为None。
+    与make_thumbnail一样在进程池中执行。
+    """
+    temp_path = f"{dest_path}.{os.getpid()}.tmp"
+    try:
+        rows = (len(source_paths) + columns - 1) // columns
+        sheet = Image.new("RGB", (tile[0] * min(columns, len(source_paths)), tile[1] * rows), SHEET_BACKGROUND)
+        tiles = []
+        for i, source_path in enumerate(source_paths):
+            x, y = (i % columns) * tile[0], (i // columns) * tile[1]
+            try:
+                with Image.open(source_path) as image:
+                    image.draft("RGB", tile)
+                    image = ImageOps.exif_transpose(image)
+                    if image.mode != "RGB":
+                        image = image.convert("RGB")
+                    image.thumbnail(tile, Image.LANCZOS)
+                    sheet.paste(image, (x, y))
+                    tiles.append([x, y, image.width, image.height])
+            except Exception as e:
+                print(f"拼图时读取图片失败 {source_path}: {e}")
+                tiles.append(None)
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        format_name, _, quality = FORMATS[fmt]
+        sheet.save(temp_path, format_name, quality=quality)
+        os.replace(temp_path, dest_path)
+        return {"width": sheet.width, "height": sheet.height, "tiles": tiles}
+    except Exception as e:
+        print(f"生成拼图失败 {dest_path}: {e}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return None
+
+
+class ThumbnailGenerator:
+    """缩略图生成器：在进程池中用Pillow缩放图片，避免占用界面线程或网页服务的线程
+
+    - get()在需要时生成并等待结果，已有的缩略图直接返回路径
+    - pregenerate()在图片下载完成后提前生成，不等待结果
+    - 同一张缩略图同时只会生成一次
+    - contact_sheet()把一部影片的预览图拼成一张图，并保存各图片位置的清单
+    尺寸可以是SIZES中的名称，也可以是width_size_name()返回的宽度名；格式为FORMATS中的一种。
+    """
+
+    def __init__(self, image_root=IMAGE_ROOT, max_workers=2):
+        self.image_root = image_root
+        self.max_workers = max_workers
+        self.executor = None
+        self.pending = {}  # 缩略图路径 -> Future
+        self.lock = threading.RLock()  # 已完成的Future会在submit中立即回调discard
+
+    def get_executor(self):
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self.executor
+
+    def submit(self, source_path, size_name, fmt="jpeg"):
+        """安排生成一张缩略图，返回(缩略图路径, Future)，缩略图已是最新时Future为None"""
+        dest_path = variant_path(source_path, size_name, self.image_root, fmt)
+        if is_fresh(source_path, dest_path):
+            return dest_path, None
+        with self.lock:
+            future = self.pending.get(dest_path)
+            if future is None:
+                future = self.get_executor().submit(make_thumbnail, source_path, dest_path, size_box(size_name), fmt)
+                self.pending[dest_path] = future
+                future.add_done_callback(lambda _, path=dest_path: self.discard(path))
+        return dest_path, future
+
+    def discard(self, dest_path):
+        with self.lock:
+            self.pending.pop(dest_path, None)
+
+    def get(self, source_path, size_name, timeout=30, fmt="jpeg"):
+        """返回指定尺寸和格式的缩略图路径，没有则生成；原图不存在、尺寸或格式未知、生成失败时返回None"""
+        if size_box(size_name) is None or fmt not in FORMATS or not os.path.exists(source_path):
+            return None
+        dest_path, future = self.submit(source_path, size_name, fmt)
+        if future is None:
+            return dest_path
+        try:
+            return future.result(timeout=timeout)
+        except Exception as e:
+            print(f"等待缩略图生成失败 {source_path}: {e}")
+            return None
+
+    def pregenerate(self, source_path, size_names, fmt="jpeg"):
+        """图片入库后提前生成各尺寸的缩略图，不等待结果"""
+        if not os.path.exists(source_path) or fmt not in FORMATS:
+            return
+        for size_name in size_names:
+            if size_box(size_name) is not None:
+                self.submit(source_path, size_name, fmt)
+
+    def contact_sheet(self, movie_id, images, fmt="jpeg", timeout=30):
+        """返回影片预览图拼图的清单，没有则生成；images为[(序号, 内容哈希, 路径)]，按序号排列
+
+        清单包含拼图文件名file、宽高、格式和tiles[{index, x, y, w, h}]。拼图ID由图片哈希决定，
+        已有的清单直接读取；生成失败时返回None。生成新拼图后删除该影片由其他图片组成的旧拼图。
+        """
+        if not images or fmt not in FORMATS:
+            return None
+        sheet_name = sheet_id([digest for _, digest, _ in images], fmt)
+        directory = sheet_dir(movie_id, self.image_root)
+        dest_path = os.path.join(directory, sheet_name + FORMATS[fmt][1])
+        manifest_path = os.path.join(directory, sheet_name + ".json")
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+
+        with self.lock:
+            future = self.pending.get(dest_path)
+            if future is None:
+                future = self.get_executor().submit(make_contact_sheet, [path for _, _, path in images],
+                                                    dest_path, SHEET_TILE, SHEET_COLUMNS, fmt)
+                self.pending[dest_path] = future
+                future.add_done_callback(lambda _, path=dest_path: self.discard(path))
+        try:
+            layout = future.result(timeout=timeout)
+        except Exception as e:
+            print(f"等待拼图生成失败 {movie_id}: {e}")
+            return None
+        if not layout:
+            return None
+
+        manifest = {
+            "file": os.path.basename(dest_path),
+            "format": fmt,
+            "width": layout["width"],
+            "height": layout["height"],
+            "tiles": [{"index": index, "x": rect[0], "y": rect[1], "w": rect[2], "h": rect[3]}
+                      for (index, _, _), rect in zip(images, layout["tiles"]) if rect],
+        }
+        temp_path = f"{manifest_path}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f)
+            os.replace(temp_path, manifest_path)
+        except OSError as e:
+            print(f"保存拼图清单失败 {manifest_path}: {e}")
+        self.remove_stale_sheets(directory, [digest for _, digest, _ in images])
+        return manifest
+
+    def remove_stale_sheets(self, directory, digests):
+        """删除目录中不是由这些图片生成的拼图和清单，同一组图片的其他格式保留"""
+        current = {sheet_id(digests, fmt) for fmt in FORMATS}
+        try:
+            filenames = os.listdir(directory)
+        except OSError:
+            return
+        for filename in filenames:
+            if filename.endswith(".tmp") or filename.split(".")[0] in current:
+                continue
+            try:
+                os.remove(os.path.join(directory, filename))
+            except OSError as e:
+                print(f"删除旧拼图失败 {filename}: {e}")
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+
+_generator = None
+_generator_lock = threading.Lock()
+
+
+def get_generator():
+    """获取共享的缩略图生成器"""
+    global _generator
+    with _generator_lock:
+        if _generator is None:
+            _generator = ThumbnailGenerator()
+        return _generator